@@ -1,20 +1,92 @@
 from PyQt5 import QtGui, QtCore, uic
 from PyQt5.QtWidgets import QLabel, QLineEdit, QMainWindow, QMessageBox
-from PyQt5.QtWidgets import QPushButton, QTableWidget, QTableWidgetItem
+from PyQt5.QtWidgets import QPushButton, QSlider, QTableWidget
+from PyQt5.QtWidgets import QTableWidgetItem
+from importlib import import_module
+from os import path
 from threading import Thread
 from time import sleep
 
 from hardware.system import System
-from hardware.cpu.processor import Processor
-from utils.formats import instr2string
+from utils.replay import Replay, snapshot, unflatten
+
+
+# Qt Designer file and its compiled module
+UI_FILE: str = path.join(path.dirname(__file__), 'mainwindow.ui')
+UI_MODULE: str = path.join(path.dirname(__file__), 'ui_mainwindow.py')
+# Processors and rows of the cache and memory tables of the window
+CORES: int = 4
+CACHE_ROWS: int = 4
+MEMORY_ROWS: int = 16
+
+
+def compile_ui() -> None:
+    """This function compiles the .ui file to a Python module, so the
+    XML is not parsed each launch.
+    """
+    with open(UI_MODULE, 'w') as module:
+        uic.compileUi(UI_FILE, module)
+
+
+def check_view(view: dict) -> None:
+    """This function checks that the window can show a state, since
+    it has a fixed number of processors and table rows.
+
+    Params
+    ------------------------------------------------------------------
+        view: dict.
+            State to be shown.
+    """
+    cpus = view['processors']
+
+    if len(cpus) != CORES:
+        raise ValueError(f'The window shows {CORES} processors, not '
+                         f'{len(cpus)}!')
+
+    if any(len(cpu['cache']) > CACHE_ROWS for cpu in cpus):
+        raise ValueError(f'The window shows caches of up to {CACHE_ROWS} '
+                         f'blocks!')
+
+    if len(view['memory']) > MEMORY_ROWS:
+        raise ValueError(f'The window shows a memory of up to '
+                         f'{MEMORY_ROWS} blocks!')
+
+
+def load_ui(window: QMainWindow) -> None:
+    """This function sets up the window using the compiled .ui file.
+    It is compiled again if it is missing or outdated.
+
+    Params
+    ------------------------------------------------------------------
+        window: QMainWindow.
+            Window to be set up.
+    """
+    try:
+        if not path.exists(UI_MODULE) or \
+            path.getmtime(UI_MODULE) < path.getmtime(UI_FILE):
+            compile_ui()
+    except OSError:
+        # The directory is read-only, so the XML is parsed
+        uic.loadUi(UI_FILE, window)
+        return
+
+    import_module('gui.ui_mainwindow').Ui_MainWindow().setupUi(window)
 
 
 class MainWindow(QMainWindow):
     """Main Window class.
     """
-    def __init__(self):
+    def __init__(self, replay: Replay = None):
         """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            replay: Replay.
+                Recorded run to be shown instead of a new system. The
+                step and back buttons and the slider move through it.
+                Its state must pass check_view.
         """
+        self.__replay = replay
         self.__cycles = 0
         self.__frequency = 1
         self.__total_cycles = 0
@@ -26,7 +98,7 @@ class MainWindow(QMainWindow):
         super(MainWindow, self).__init__()
 
         # Load the .ui file
-        uic.loadUi('./gui/mainwindow.ui', self)
+        load_ui(self)
 
         # Components
         # Restart button
@@ -41,6 +113,14 @@ class MainWindow(QMainWindow):
         self.__btnStep = self.findChild(QPushButton, 'btnStep')
         self.__btnStep.clicked.connect(self.__btnStepOnClick)
 
+        # Back button
+        self.__btnBack = self.findChild(QPushButton, 'btnBack')
+        self.__btnBack.clicked.connect(self.__btnBackOnClick)
+
+        # Cycle slider
+        self.__sldCycle = self.findChild(QSlider, 'sldCycle')
+        self.__sldCycle.valueChanged.connect(self.__sldCycleOnChange)
+
         # Processors' instruction labels
         self.__lblP1Instruction = self.findChild(QLabel, 'lblP1Instr')
         self.__lblP2Instruction = self.findChild(QLabel, 'lblP2Instr')
@@ -79,11 +159,22 @@ class MainWindow(QMainWindow):
                                                           'tbSharedMem')
 
         # Create system
-        self.__system: System = System(4)
+        self.__system: System = System(CORES)
+
+        if replay is None:
+            # Recordings are needed to go back
+            self.__btnBack.hide()
+            self.__sldCycle.hide()
+        else:
+            self.__btnStart.setEnabled(False)
+            self.__btnRestart.setEnabled(False)
+            self.__sldCycle.setRange(replay.get_first_cycle(),
+                                     replay.get_last_cycle())
 
         # Create tables
-        self.__initCacheTables()
-        self.__initMemoryTable()
+        view = self.__getView()
+        self.__initCacheTables(view)
+        self.__initMemoryTable(view)
 
         # Create thread to update the GUI
         self.__t_update = Thread(target=self.__update)
@@ -99,7 +190,7 @@ class MainWindow(QMainWindow):
         self.__cycles = 0
 
         # Create a new system
-        self.__system = System(4)
+        self.__system = System(CORES)
 
         # Enable the start button again
         self.__btnStart.setEnabled(True)
@@ -145,10 +236,21 @@ class MainWindow(QMainWindow):
                                     'A number is required.',
                                     QMessageBox.Warning)
 
+    def __btnBackOnClick(self) -> None:
+        """This method is executed when the back button is pressed.
+        Shows the previous cycle of the recording.
+        """
+        self.__sldCycle.setValue(self.__replay.get_cycle() - 1)
+
     def __btnStepOnClick(self) -> None:
         """This method is executed when the start button is pressed.
         Run one step in the system.
         """
+        if self.__replay is not None:
+            # Show the next cycle of the recording
+            self.__sldCycle.setValue(self.__replay.get_cycle() + 1)
+            return
+
         # No wait
         self.__wait = False
 
@@ -159,17 +261,37 @@ class MainWindow(QMainWindow):
         self.__system.turn_on(False)
         self.__running = True
 
-    def __initCacheTables(self) -> None:
+    def __getView(self) -> dict:
+        """This method returns the state shown, from the recording if
+        it is given or from the system otherwise.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the cycle, the state of each processor
+            and the memory.
+        """
+        if self.__replay is not None:
+            return self.__replay.get_state()
+
+        view = unflatten(snapshot(self.__system),
+                         [self.__system.get_processor(i).get_cache_size()
+                          for i in range(self.__system.get_size())])
+
+        return dict(cycle=self.__cycles, **view)
+
+    def __initCacheTables(self, view: dict) -> None:
         """This method fills the cache table of each processor.
+
+        Params
+        --------------------------------------------------------------
+            view: dict.
+                State shown.
         """
         for i in range(len(self._cache_tables)):
             # Clear the table
             self._cache_tables[i].clear()
 
-            # Get processor
-            processor: Processor = self.__system.get_processor(i)
-
-            for j, block in enumerate(processor.get_cache_mem()):
+            for j, block in enumerate(view['processors'][i]['cache']):
                 # Compute address
                 address = block['address']
 
@@ -187,18 +309,22 @@ class MainWindow(QMainWindow):
                 self._cache_tables[i].setItem(j, 2,
                                 QTableWidgetItem(block['state']))
 
-    def __initMemoryTable(self) -> None:
+    def __initMemoryTable(self, view: dict) -> None:
         """This method fills the memory table.
+
+        Params
+        --------------------------------------------------------------
+            view: dict.
+                State shown.
         """
         self._tb_shared_mem.clear()
  
-        for i in range(self.__system.get_shared_mem_size()):
+        for i, value in enumerate(view['memory']):
             # Compute address
             address: str = bin(i)[2:]
             address = '0' * (4 - len(address)) + address
 
             # Compute value
-            value: str = self.__system.read_shared_memory(address)
             value = '0x' + '0' * (4 - len(value)) + value
         
             # Insert address
@@ -208,6 +334,17 @@ class MainWindow(QMainWindow):
             self._tb_shared_mem.setItem(i, 1,
                                     QTableWidgetItem(value))
 
+    def __sldCycleOnChange(self, cycle: int) -> None:
+        """This method is executed when the slider moves. Seeks the
+        cycle in the recording.
+
+        Params
+        --------------------------------------------------------------
+            cycle: int.
+                Cycle selected.
+        """
+        self.__replay.seek(cycle)
+
     def __showMessageDialog(self, title: str, msg: str,
                             icon=QMessageBox.Information,
                             buttons=[('Ok', QMessageBox.YesRole)]) -> int:
@@ -252,7 +389,7 @@ class MainWindow(QMainWindow):
         while (self.__opened):
             # Update cycles
             if (self.__running):
-                self.__cycles += 1
+                self.__cycles = self.__system.get_cycle()
 
                 # Stop if it doesn't have to wait
                 if not self.__wait:
@@ -261,40 +398,40 @@ class MainWindow(QMainWindow):
                     # Check it the cycles are not infinite
                     if self.__total_cycles > 0:
                         # Check if the cycles were completed
-                        if self.__cycles == self.__total_cycles:
+                        if self.__cycles >= self.__total_cycles:
                             # And stop
                             sleep(0.5)
                             self.__system.turn_off()
                             self.__running = False
                             self.__btnStart.setEnabled(True)
 
-            # Get instructions
-            instructions = self.__system.get_instructions()
-            old_instr = self.__system.get_old_instructions()
+            # Get the state shown
+            view = self.__getView()
+            cpus = view['processors']
 
             # Set instruction text
-            self.__lblP1Instruction.setText(instr2string(0, instructions[0]))
-            self.__lblP2Instruction.setText(instr2string(1, instructions[1]))
-            self.__lblP3Instruction.setText(instr2string(2, instructions[2]))
-            self.__lblP4Instruction.setText(instr2string(3, instructions[3]))
+            self.__lblP1Instruction.setText(cpus[0]['instruction'])
+            self.__lblP2Instruction.setText(cpus[1]['instruction'])
+            self.__lblP3Instruction.setText(cpus[2]['instruction'])
+            self.__lblP4Instruction.setText(cpus[3]['instruction'])
 
             # Set processors actions
-            self.__lblP1Action.setText(self.__system.get_processor(0).get_state())
-            self.__lblP2Action.setText(self.__system.get_processor(1).get_state())
-            self.__lblP3Action.setText(self.__system.get_processor(2).get_state())
-            self.__lblP4Action.setText(self.__system.get_processor(3).get_state())
+            self.__lblP1Action.setText(cpus[0]['state'])
+            self.__lblP2Action.setText(cpus[1]['state'])
+            self.__lblP3Action.setText(cpus[2]['state'])
+            self.__lblP4Action.setText(cpus[3]['state'])
 
-            self.__lblP1PInstruction.setText(instr2string(0, old_instr[0]))
-            self.__lblP2PInstruction.setText(instr2string(1, old_instr[1]))
-            self.__lblP3PInstruction.setText(instr2string(2, old_instr[2]))
-            self.__lblP4PInstruction.setText(instr2string(3, old_instr[3]))
+            self.__lblP1PInstruction.setText(cpus[0]['previous'])
+            self.__lblP2PInstruction.setText(cpus[1]['previous'])
+            self.__lblP3PInstruction.setText(cpus[2]['previous'])
+            self.__lblP4PInstruction.setText(cpus[3]['previous'])
 
             # Set current cycle
-            self.__lblCycles.setText(f'Cycle: {self.__cycles}')
+            self.__lblCycles.setText(f'Cycle: {view["cycle"]}')
 
             # Update tables
-            self.__initCacheTables()
-            self.__initMemoryTable()
+            self.__initCacheTables(view)
+            self.__initMemoryTable(view)
 
             sleep(0.5)
 
@@ -0,0 +1,155 @@
+from hardware.control.directory import Directory
+from hardware.memory.ram import RAM
+
+
+def written_value(instr: dict, result: str) -> str:
+    """This function returns the data that an instruction wrote.
+
+    Params
+    ------------------------------------------------------------------
+        instr: dict.
+            Executed instruction.
+        result: str.
+            Value returned by the instruction.
+
+    Returns
+    ------------------------------------------------------------------
+        The data written, or None if the instruction did not write.
+    """
+    if instr['type'] == 'WRITE':
+        return instr['data']
+    elif instr['type'] == 'TAS':
+        return '0001'
+    elif instr['type'] == 'FAA':
+        return format((int(result, 16) + int(instr['data'], 16)) & 0xffff,
+                      '04x')
+    elif instr['type'] == 'CAS' and result == instr['expected']:
+        return instr['data']
+    elif instr['type'] == 'SC' and result == '0001':
+        return instr['data']
+
+    return None
+
+
+def block_errors(copies: list, memory: str, value: str) -> list:
+    """This function checks the coherence invariants of a block.
+
+    Params
+    ------------------------------------------------------------------
+        copies: list.
+            Processor, state and data of each valid copy.
+        memory: str.
+            Data of the block in memory.
+        value: str.
+            Last value written in the block.
+
+    Returns
+    ------------------------------------------------------------------
+        A list with the violations found.
+    """
+    states = [state for _, state, _ in copies]
+    errors = []
+
+    if len(copies) > 1 and ('M' in states or 'E' in states):
+        errors.append(f'an exclusive copy is shared {states}')
+
+    if sum(state in ('E', 'O', 'M', 'F') for state in states) > 1:
+        errors.append(f'there are several owners {states}')
+
+    for i, state, data in copies:
+        if data != value:
+            errors.append(f'P{i} has {data} in {state} instead of {value}')
+
+    if 'M' not in states and 'O' not in states and memory != value:
+        errors.append(f'the memory has {memory} instead of {value}')
+
+    return errors
+
+
+class InvariantChecker:
+    """This class checks the coherence invariants of a block after a
+    transition. Only the caches of the accessed block are checked, so
+    it can run on every transition.
+
+    A block has a single writer or multiple readers (SWMR), that is
+    an exclusive (E or M) copy is the only valid one, and at most one
+    cache owns it. Every valid copy has the last value written (data
+    value invariant), which the memory also has unless a cache owns
+    it dirty. The directory knows every valid copy.
+    """
+    def __init__(self, cpus: list, memory: RAM,
+                 directory: Directory = None) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            cpus: list.
+                Processors whose caches are checked.
+            memory: RAM.
+                Shared memory.
+            directory: Directory.
+                Directory to be checked, if it is used.
+        """
+        self.__cpus: list = cpus
+        self.__memory: RAM = memory
+        self.__directory: Directory = directory
+        # Last value written in each address
+        self.__values: dict = {}
+        self.__violations: list = []
+
+    def check(self, address: str, cycle: int, written: str = None) -> list:
+        """This method checks the invariants of a block.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+            cycle: int.
+                Current cycle, used in the messages.
+            written: str.
+                Data written by the transition, if it wrote.
+
+        Returns
+        --------------------------------------------------------------
+            A list with the violations found.
+        """
+        if written is not None:
+            self.__values[address] = written
+
+        value = self.__values.get(address)
+
+        # Until it is written, the block has the initial memory value
+        if value is None:
+            value = self.__values[address] = self.__memory.read(address)
+
+        copies = []
+
+        for i, cpu in enumerate(self.__cpus):
+            block = cpu.read_cache(address)
+
+            if block and block['state'] != 'I':
+                copies.append((i, block['state'], block['data']))
+
+        errors = block_errors(copies, self.__memory.read(address), value)
+
+        if self.__directory is not None:
+            missing = {i for i, _, _ in copies} - \
+                self.__directory.get_sharers(address)
+
+            if missing:
+                errors.append(f'the directory misses {sorted(missing)}')
+
+        errors = [f'Cycle {cycle}, block {address}: {error}'
+                  for error in errors]
+        self.__violations.extend(errors)
+
+        return errors
+
+    def get_violations(self) -> list:
+        """This method returns the violations found so far.
+
+        Returns
+        --------------------------------------------------------------
+            A list with a message for each violation.
+        """
+        return list(self.__violations)
@@ -1,27 +1,126 @@
-from hardware.system import System
+from hardware import kernel
 
 
 class FSMController:
     """This class is used to control the cache using a FSM.
     """
-    def change_state(self, _id: int, state: str, transition: str,
-                    system: System) -> str:
+    # New state of a cache block when another processor reads it, and
+    # state of a block read when there are not other copies and when
+    # there are
+    __protocols: dict = {
+        'MSI': ({'S': 'S', 'M': 'S'}, 'S', 'S'),
+        'MESI': ({'S': 'S', 'E': 'S', 'M': 'S'}, 'E', 'S'),
+        'MOESI': ({'S': 'S', 'E': 'S', 'O': 'O', 'M': 'O'}, 'E', 'S'),
+        'MESIF': ({'S': 'S', 'E': 'S', 'F': 'S', 'M': 'S'}, 'E', 'F')
+    }
+
+    # States whose cache supplies the data to another processor
+    SUPPLIERS: tuple = ('E', 'O', 'M', 'F')
+
+    def __init__(self, protocol: str = 'MOESI') -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            protocol: str.
+                Coherence protocol. MOESI by default.
+        """
+        if protocol not in FSMController.__protocols:
+            raise ValueError(f'Unknown protocol {protocol}!')
+
+        self.__protocol: str = protocol
+        self.__remote_read, self.__fill_alone, self.__fill_shared = \
+            FSMController.__protocols[protocol]
+
+    @staticmethod
+    def get_protocols() -> tuple:
+        """This method returns the supported protocols.
+
+        Returns
+        --------------------------------------------------------------
+            A tuple with the protocol names.
+        """
+        return tuple(FSMController.__protocols)
+
+    def change_state(self, state: str, transition: str,
+                     shared: bool = False) -> str:
         """This method is used to get the new state of a cache block.
 
         Params
         --------------------------------------------------------------
-            _id: int.
-                Processor ID.
             state: str.
                 Current state of the cache block.
             transition: str.
-                Transition to be executed by the controller.
-            system: System.
-                Multi processor System.
-        
+                Transition to be executed by the controller. READ and
+                WRITE for the local processor, BUS READ and BUS WRITE
+                when another processor accesses the block.
+            shared: bool.
+                Indicates if other caches have a copy of the block.
+                Only used by READ misses.
+
         Returns
         --------------------------------------------------------------
             New cache block state.
         """
-        return
+        if transition == 'READ':
+            if state != 'I':
+                return state
+
+            return self.__fill_shared if shared else self.__fill_alone
+        elif transition == 'WRITE':
+            return 'M'
+        elif transition == 'BUS READ':
+            return self.__remote_read.get(state, state)
+        elif transition == 'BUS WRITE':
+            return 'I'
+
+        raise ValueError(f'Unknown transition {transition}!')
+
+    def get_exclusive_state(self) -> str:
+        """This method returns the state of a clean block that no
+        other cache has, e.g. one prefetched for ownership.
+
+        Returns
+        --------------------------------------------------------------
+            Exclusive (E) if the protocol has it, Modified (M)
+            otherwise.
+        """
+        return 'M' if self.__fill_alone == 'S' else self.__fill_alone
+
+    def get_protocol(self) -> str:
+        """This method returns the protocol name.
+
+        Returns
+        --------------------------------------------------------------
+            The protocol name.
+        """
+        return self.__protocol
+
+    def get_states(self) -> tuple:
+        """This method returns the states that the protocol uses.
+
+        Returns
+        --------------------------------------------------------------
+            A tuple with the states in the batch kernel order.
+        """
+        used = set(self.__remote_read) | {'I', 'M', self.__fill_alone,
+                                          self.__fill_shared}
+
+        return tuple(state for state in kernel.STATES if state in used)
+
+    def get_tables(self) -> tuple:
+        """This method returns the transitions encoded for the batch
+        kernel.
+
+        Returns
+        --------------------------------------------------------------
+            The new state of a remote copy when another processor
+            reads it, indexed by its current state, and the state of
+            a block read without and with sharers.
+        """
+        remote_read = tuple(kernel.STATES.index(self.change_state(state,
+                                                                  'BUS READ'))
+                            for state in kernel.STATES)
 
+        return remote_read, kernel.STATES.index(self.__fill_alone), \
+            kernel.STATES.index(self.__fill_shared)
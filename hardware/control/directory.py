@@ -0,0 +1,59 @@
+class Directory:
+    """This class models a directory that keeps the processors that
+    have a valid copy of each memory block.
+    """
+    def __init__(self) -> None:
+        """Constructor.
+        """
+        self.__sharers: dict = {}
+
+    def add(self, address: str, _id: int) -> None:
+        """This method adds a processor to the sharers of a block.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+            _id: int.
+                Processor index.
+        """
+        self.__sharers.setdefault(address, set()).add(_id)
+
+    def clear(self) -> None:
+        """This method removes all the sharers.
+        """
+        self.__sharers = {}
+
+    def get_sharers(self, address: str) -> set:
+        """This method returns the processors that have a valid copy
+        of a block.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+
+        Returns
+        --------------------------------------------------------------
+            A set with the processor indexes.
+        """
+        return set(self.__sharers.get(address, ()))
+
+    def remove(self, address: str, _id: int) -> None:
+        """This method removes a processor from the sharers of a
+        block.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+            _id: int.
+                Processor index.
+        """
+        sharers = self.__sharers.get(address)
+
+        if sharers is not None:
+            sharers.discard(_id)
+
+            if not sharers:
+                del self.__sharers[address]
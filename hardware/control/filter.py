@@ -0,0 +1,169 @@
+class SnoopFilter:
+    """This class is the base of the snoop filters. A filter tracks
+    the blocks held by the caches of a cluster, so a snoop is only
+    sent to them if they may have a valid copy. Filters never miss a
+    copy, but they may let through snoops that were not needed.
+    """
+    def add(self, address: str) -> None:
+        """This method records a block filled in a cache of the
+        cluster.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """This method forgets every block.
+        """
+        raise NotImplementedError
+
+    def query(self, address: str) -> bool:
+        """This method returns True if a cache of the cluster may have
+        a valid copy of a block, False otherwise.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+
+        Returns
+        --------------------------------------------------------------
+            True if the caches must be snooped, False otherwise.
+        """
+        raise NotImplementedError
+
+    def remove(self, address: str) -> None:
+        """This method records a block evicted or invalidated in a
+        cache of the cluster.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+        """
+        raise NotImplementedError
+
+
+class InclusiveFilter(SnoopFilter):
+    """This class keeps the tags of every valid block of the cluster
+    and how many caches hold each one, so it is exact.
+    """
+    def __init__(self, entries: int = 8, hashes: int = 2) -> None:
+        """Constructor. The filter has an entry for each block, so the
+        sizes of a Bloom filter are not used.
+        """
+        self.__tags: dict = {}
+
+    def add(self, address: str) -> None:
+        """This method counts another copy of a block.
+        """
+        self.__tags[address] = self.__tags.get(address, 0) + 1
+
+    def clear(self) -> None:
+        """This method forgets every block.
+        """
+        self.__tags = {}
+
+    def query(self, address: str) -> bool:
+        """This method returns True if the cluster has a copy.
+        """
+        return address in self.__tags
+
+    def remove(self, address: str) -> None:
+        """This method discounts a copy of a block.
+        """
+        if self.__tags.get(address, 0) > 1:
+            self.__tags[address] -= 1
+        else:
+            self.__tags.pop(address, None)
+
+
+class BloomFilter(SnoopFilter):
+    """This class is a counting Bloom filter. Each block increments a
+    counter chosen by each hash function, and it may be in the cluster
+    if all of them are positive. Blocks that share the counters are
+    false positives.
+    """
+    def __init__(self, entries: int = 8, hashes: int = 2) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            entries: int.
+                Number of counters.
+            hashes: int.
+                Number of hash functions.
+        """
+        self.__counters: list = [0] * entries
+        self.__hashes: int = hashes
+
+    def __indexes(self, address: str) -> list:
+        """This method returns the counters of a block.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+
+        Returns
+        --------------------------------------------------------------
+            A list with a counter index for each hash function.
+        """
+        block = int(address, 2)
+        entries = len(self.__counters)
+
+        # Hashes of integer tuples do not change between runs
+        return [hash((i, block)) % entries for i in range(self.__hashes)]
+
+    def add(self, address: str) -> None:
+        """This method increments the counters of a block.
+        """
+        for i in self.__indexes(address):
+            self.__counters[i] += 1
+
+    def clear(self) -> None:
+        """This method resets the counters.
+        """
+        self.__counters = [0] * len(self.__counters)
+
+    def query(self, address: str) -> bool:
+        """This method returns True if every counter of the block is
+        positive.
+        """
+        return all(self.__counters[i] for i in self.__indexes(address))
+
+    def remove(self, address: str) -> None:
+        """This method decrements the counters of a block.
+        """
+        for i in self.__indexes(address):
+            self.__counters[i] -= 1
+
+
+# Available snoop filters
+FILTERS: dict = { 'inclusive': InclusiveFilter, 'bloom': BloomFilter }
+
+
+def create_filter(name: str, entries: int = 8,
+                  hashes: int = 2) -> SnoopFilter:
+    """This function creates a snoop filter.
+
+    Params
+    ------------------------------------------------------------------
+        name: str.
+            Filter name, 'inclusive' or 'bloom'.
+        entries: int.
+            Number of counters of a Bloom filter.
+        hashes: int.
+            Number of hash functions of a Bloom filter.
+
+    Returns
+    ------------------------------------------------------------------
+        The new snoop filter.
+    """
+    if name not in FILTERS:
+        raise ValueError(f'Unknown snoop filter {name}!')
+
+    return FILTERS[name](entries, hashes)
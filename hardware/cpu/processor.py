@@ -1,25 +1,85 @@
-from numpy.random import normal
-from random import randint
+from collections import deque
+from random import gauss, randint
 
 from hardware.memory.cache import CacheL1
+from utils.formats import addr2string
+
+
+# Read-modify-write instructions, they need an exclusive copy
+ATOMICS: tuple = ('TAS', 'CAS', 'FAA', 'SC')
+# Operation of each instruction type in the event logs, atomics read
+# and write the block
+OPERATIONS: dict = { 'READ': 'R', 'LL': 'R', 'WRITE': 'W', 'TAS': 'A',
+                     'CAS': 'A', 'FAA': 'A', 'SC': 'A' }
+# Cycles of each processor stage, execution and cache ones are core
+# cycles and memory ones are system cycles
+LATENCY: dict = { 'exec': 1, 'cache': 2, 'memory': 8 }
 
 
 class Processor():
     """This class models a processor with a L1 Cache
     """
-    def __init__(self, _id: int):
+    def __init__(self, _id: int, cache_size: int = 4,
+                 associativity: int = 2, mem_size: int = 16,
+                 workload=None, window: int = 0, mshrs: int = 1,
+                 latency: dict = None, clock_ratio: int = 1,
+                 _class: str = 'core'):
         """Constructor.
 
         Params
         --------------------------------------------------------------
             _id: int.
                 Processor identifier.
+            cache_size: int.
+                Number of blocks of the L1 cache.
+            associativity: int.
+                L1 cache associativity.
+            mem_size: int.
+                Shared memory size.
+            workload: iterable.
+                Instructions to be executed. They are generated
+                randomly by default.
+            window: int.
+                Instruction window size of an out-of-order core. The
+                core blocks on each instruction if it is 0.
+            mshrs: int.
+                Misses that the L1 cache can have outstanding.
+            latency: dict.
+                Cycles of the execution, cache and memory stages, the
+                defaults are used for the missing ones.
+            clock_ratio: int.
+                System cycles of each core cycle, e.g. 2 runs the core
+                at half the system clock.
+            _class: str.
+                Name of the core class, e.g. big or little.
         """
+        if clock_ratio < 1:
+            raise ValueError('The clock ratio must be positive!')
+
         self.__id: int = _id
-        self.__cache_l1: CacheL1 = CacheL1(2, 4)
-        self.__cycles: dict = { 'exec': 1, 'cache': 2, 'memory': 8 }
+        self.__class: str = _class
+        self.__clock_ratio: int = clock_ratio
+        self.__cache_l1: CacheL1 = CacheL1(associativity, cache_size,
+                                           mem_size, mshrs)
+        # Completion cycle of the instructions in the window
+        self.__window: int = window
+        self.__rob: deque = deque()
+        self.__mem_size: int = mem_size
+        self.__workload = None if workload is None else iter(workload)
+        self.__finished: bool = False
+        # Latencies in system cycles, the memory runs at the system
+        # clock
+        latency = dict(LATENCY, **(latency or {}))
+        self.__latency: dict = { 'exec': latency['exec'] * clock_ratio,
+                                 'cache': latency['cache'] * clock_ratio,
+                                 'memory': latency['memory'] }
+        self.__cycles: dict = dict(self.__latency)
         self.__executing: bool = False
         self.__instruction: dict = {}
+        # Value returned by the last instruction and address reserved
+        # by the last load linked
+        self.__result: str = None
+        self.__link: str = None
         self.__instruction_types: list = ['READ', 'WRITE', 'CALC']
         self.__state = 'NOP'
 
@@ -29,42 +89,85 @@ class Processor():
         """
         self.__executing = True
         self.__state = 'EXECUTING'
+        _type = self.__instruction['type']
 
         # Check if the instruction needs memory
-        if self.__instruction['type'] != 'CALC':
-            found: bool = False
-
-            # Search for the cache block
-            for i, block in enumerate(self.__cache_l1.get_mem()):
-                # Check if the block is valid and the memory address
-                # is the correct
-                if block['state'] != 'I' and \
-                    block['address'] == self.__instruction['address']:
-                    found = True
-                    break
-
-            # Check if the cache block was found
-            if found:
-                # Check if it has to read
-                if self.__instruction['type'] == 'READING':
-                    self.__state = 'READING CACHE'
-                else:
-                    self.__state = 'WRITING IN CACHE'
-
-                    # Get current data and state
-                    block: dict = self.__cache_l1.read(self.__instruction['address'])
-                    state: str = 'M'
-
-                    # Check data state
-                    if block['state'] == '':
-                        state = ''
-
-            # Cache miss
-            else:
-                self.__state = f'MISS {self.__instruction["address"]}'
-        else:
+        if _type == 'CALC':
             self.__state = 'COMPUTING'
             self.__executing = False
+        # A store conditional fails without accessing the cache if
+        # the block was lost since its load linked
+        elif _type == 'SC' and self.__link != self.__instruction['address']:
+            self.__state = 'SC FAILED'
+            self.__result = '0000'
+            self.__executing = False
+        # Check if the cache block was found
+        elif self.__cache_l1.is_in_cache(self.__instruction['address']):
+            # Get current data and state
+            block: dict = self.__cache_l1.read(self.__instruction['address'])
+
+            # Check if it has to read
+            if _type in ('READ', 'LL'):
+                self.__state = 'READING CACHE'
+                self.modify(block['data'])
+                self.__executing = False
+            # Shared copies must be invalidated through the bus, so it
+            # is handled as a miss
+            elif block['state'] in ('S', 'O', 'F'):
+                self.__state = f'MISS {self.__instruction["address"]}'
+            else:
+                self.__state = 'WRITING IN CACHE'
+                data = self.modify(block['data'])
+
+                if data is not None:
+                    self.__cache_l1.write(self.__instruction['address'],
+                                          data, 'M')
+
+                self.__executing = False
+        # Cache miss
+        else:
+            self.__state = f'MISS {self.__instruction["address"]}'
+
+    def can_issue(self, cycle: int) -> bool:
+        """This method retires the completed instructions in order and
+        returns True if the window has room for another one, False
+        otherwise.
+
+        Params
+        --------------------------------------------------------------
+            cycle: int.
+                Current cycle.
+
+        Returns
+        --------------------------------------------------------------
+            True if an instruction can be issued, False otherwise.
+        """
+        while self.__rob and self.__rob[0] <= cycle:
+            self.__rob.popleft()
+
+        return len(self.__rob) < self.__window
+
+    def clear_link(self, address: str) -> None:
+        """This method cancels the reservation of a load linked when
+        its block is invalidated or evicted.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+        """
+        if self.__link == address:
+            self.__link = None
+
+    def dispatch(self, done: int) -> None:
+        """This method puts the current instruction in the window.
+
+        Params
+        --------------------------------------------------------------
+            done: int.
+                Cycle when the instruction is completed.
+        """
+        self.__rob.append(done)
 
     def finish(self) -> None:
         """This method finished the execution of the instruction.
@@ -72,17 +175,47 @@ class Processor():
         self.__executing = False
 
     def generate_instruction(self) -> dict:
-        """This method generates a random instruction.
+        """This method gets the next instruction of the workload, or
+        generates a random one if there is not a workload.
 
         Returns
         --------------------------------------------------------------
-            A dictionary representing all the instruction parts.
+            A dictionary representing all the instruction parts. It is
+            empty if the workload has finished.
         """
+        self.__cycles = { 'exec': self.__latency['exec'], 'cache': 0,
+                          'memory': 0 }
+
+        if self.__workload is not None:
+            # Generators receive the result of the last instruction
+            if hasattr(self.__workload, 'send'):
+                try:
+                    instr = dict(self.__workload.send(self.__result))
+                except StopIteration:
+                    instr = {}
+            else:
+                instr = dict(next(self.__workload, {}))
+
+            self.__result = None
+
+            if instr:
+                instr['processor'] = self.__id
+
+                # Add two cycle to read cache blocks
+                if instr['type'] != 'CALC':
+                    self.__cycles['cache'] = self.__latency['cache']
+            else:
+                self.__state = 'NOP'
+                self.__finished = True
+
+            self.__instruction = instr
+
+            return instr
+
         instr = { 'processor': self.__id }
-        self.__cycles = { 'exec': 1, 'cache': 0, 'memory': 0 }
 
         # Generate a random number to get an instruction type
-        number = normal()
+        number = gauss(0, 1)
         _type = self.__instruction_types[-1]
 
         if number < -1:
@@ -95,11 +228,11 @@ class Processor():
         # If the instruction is write or read
         if _type == 'READ' or _type == 'WRITE':
             # Insert the address
-            address: str = bin(randint(0, 15))[2:]
-            instr['address'] = '0' * (4 - len(address)) + address
+            instr['address'] = addr2string(randint(0, self.__mem_size - 1),
+                                           self.__mem_size)
 
             # Add two cycle to read cache blocks
-            self.__cycles['cache'] = 2
+            self.__cycles['cache'] = self.__latency['cache']
 
             # If the instruction is write
             if _type == 'WRITE':
@@ -138,6 +271,34 @@ class Processor():
         """
         return self.__cache_l1.get_size()
 
+    def get_class(self) -> str:
+        """This method returns the name of the core class.
+
+        Returns
+        --------------------------------------------------------------
+            The class name.
+        """
+        return self.__class
+
+    def get_clock_ratio(self) -> int:
+        """This method returns the system cycles of each core cycle.
+
+        Returns
+        --------------------------------------------------------------
+            The clock ratio.
+        """
+        return self.__clock_ratio
+
+    def get_cycles(self) -> int:
+        """This method returns the number of cycles needed by the
+        current instruction.
+
+        Returns
+        --------------------------------------------------------------
+            Number of cycles.
+        """
+        return sum(self.__cycles.values())
+
     def get_id(self) -> int:
         """This method returns the processor identifier.
 
@@ -147,6 +308,52 @@ class Processor():
         """
         return self.__id
 
+    def get_in_flight(self, cycle: int) -> int:
+        """This method returns the number of instructions in the
+        window that are not completed yet.
+
+        Params
+        --------------------------------------------------------------
+            cycle: int.
+                Current cycle.
+
+        Returns
+        --------------------------------------------------------------
+            The number of instructions.
+        """
+        return sum(done > cycle for done in self.__rob)
+
+    def get_latency(self) -> dict:
+        """This method returns the latency of each processor stage in
+        system cycles.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the execution, cache and memory latency.
+        """
+        return self.__latency
+
+    def get_link(self) -> str:
+        """This method returns the address reserved by the last load
+        linked.
+
+        Returns
+        --------------------------------------------------------------
+            The address, or None if there is no reservation.
+        """
+        return self.__link
+
+    def get_result(self) -> str:
+        """This method returns the value returned by the last
+        instruction, e.g. the data read or the old value of an atomic
+        instruction.
+
+        Returns
+        --------------------------------------------------------------
+            The result, or None if the instruction does not return.
+        """
+        return self.__result
+
     def get_state(self) -> str:
         """This method returns the current processor state.
 
@@ -156,6 +363,26 @@ class Processor():
         """
         return self.__state
 
+    def is_finished(self) -> bool:
+        """This method returns True if the workload has finished,
+        False otherwise.
+
+        Returns
+        --------------------------------------------------------------
+            True if the workload has finished, False otherwise.
+        """
+        return self.__finished
+
+    def is_out_of_order(self) -> bool:
+        """This method returns True if the core does not block on each
+        instruction, False otherwise.
+
+        Returns
+        --------------------------------------------------------------
+            True if the core is out-of-order, False otherwise.
+        """
+        return self.__window > 0
+
     def is_in_cache(self, address: str) -> bool:
         """This method returns True if an address is in cache, False
         otherwise.
@@ -169,7 +396,7 @@ class Processor():
         --------------------------------------------------------------
             True if an address is in cache, False otherwise.
         """
-        return self.__cache_l1.is_in_cache()
+        return self.__cache_l1.is_in_cache(address)
 
     def is_executing(self) -> bool:
         """This method returns True if the processor is executing an
@@ -182,6 +409,46 @@ class Processor():
         """
         return self.__executing
 
+    def modify(self, data: str) -> str:
+        """This method executes the current instruction on the data of
+        its address, which the cache holds with the needed permission.
+        The value read is kept as the instruction result.
+
+        Params
+        --------------------------------------------------------------
+            data: str.
+                Current data in the instruction address.
+
+        Returns
+        --------------------------------------------------------------
+            The data to be written, or None if the instruction does
+            not write.
+        """
+        instr = self.__instruction
+        self.__result = data
+
+        if instr['type'] == 'READ':
+            return None
+        elif instr['type'] == 'LL':
+            self.__link = instr['address']
+            return None
+        elif instr['type'] == 'WRITE':
+            self.__result = None
+            return instr['data']
+        elif instr['type'] == 'TAS':
+            return '0001'
+        elif instr['type'] == 'CAS':
+            return instr['data'] if data == instr['expected'] else None
+        elif instr['type'] == 'FAA':
+            return format((int(data, 16) + int(instr['data'], 16)) & 0xffff,
+                          '04x')
+
+        # The store conditional succeeds
+        self.__link = None
+        self.__result = '0001'
+
+        return instr['data']
+
     def read_cache(self, addr: str) -> dict:
         """This method reads L1 cache address.
 
@@ -196,6 +463,16 @@ class Processor():
         """
         return self.__cache_l1.read(addr)
 
+    def set_link(self, address: str) -> None:
+        """This method sets the address reserved by a load linked.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address, or None to cancel the reservation.
+        """
+        self.__link = address
+
     def set_state(self, state: str) -> None:
         """This method sets the new state for the processor.
 
@@ -206,7 +483,8 @@ class Processor():
         """
         self.__state = state
 
-    def write(self, addr: str, data: str, state: str = 'E') -> None:
+    def write(self, addr: str, data: str, state: str = 'E',
+              victim: int = None) -> dict:
         """This method writes the data in a cache address and change
         the block state.
 
@@ -219,6 +497,11 @@ class Processor():
             state: str.
                 New state for the cache block. Exclusive (E) by
                 default.
-        """
-        self.__cache_l1.write(addr, data, state)
+            victim: int.
+                Block to be replaced if needed. Random by default.
 
+        Returns
+        --------------------------------------------------------------
+            The evicted cache block, or an empty dictionary.
+        """
+        return self.__cache_l1.write(addr, data, state, victim)
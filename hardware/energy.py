@@ -0,0 +1,50 @@
+# Energy in picojoules of each event. Link energy is given for each
+# byte sent through each link, so distant nodes cost more
+COSTS: dict = {
+    'cache_access': 5.0,
+    'snoop': 2.0,
+    'filter_lookup': 1.0,
+    'directory_lookup': 4.0,
+    'invalidation': 3.0,
+    'cache_transfer': 10.0,
+    'memory_read': 150.0,
+    'memory_write': 150.0,
+    'link_byte': 0.5
+}
+# Processor counter of each event
+EVENTS: dict = {
+    'cache_access': 'cache_accesses',
+    'snoop': 'snoops',
+    'filter_lookup': 'filter_lookups',
+    'directory_lookup': 'directory_lookups',
+    'invalidation': 'invalidations',
+    'cache_transfer': 'cache_transfers',
+    'memory_read': 'memory_reads',
+    'memory_write': 'memory_writes',
+    'link_byte': 'byte_hops'
+}
+
+
+def estimate_energy(counters: dict, costs: dict = None) -> dict:
+    """This function attributes energy to the events counted by a
+    processor, or by the whole system.
+
+    Params
+    ------------------------------------------------------------------
+        counters: dict.
+            Event counters.
+        costs: dict.
+            Energy of each event, the defaults are used for the
+            missing ones.
+
+    Returns
+    ------------------------------------------------------------------
+        A dictionary with the energy of each event and the total one
+        in picojoules.
+    """
+    costs = dict(COSTS, **(costs or {}))
+    energy = {event: counters[counter] * costs[event]
+              for event, counter in EVENTS.items()}
+    energy['total'] = sum(energy.values())
+
+    return energy
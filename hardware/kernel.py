@@ -0,0 +1,586 @@
+from random import randint
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+# Cache block states encoded as integers
+STATES: tuple = ('I', 'S', 'E', 'O', 'M', 'F')
+I, S, E, O, M, F = range(len(STATES))
+
+# Memory access types, in the order of the instruction types. CAS
+# packs the expected value in the upper 16 bits of its value
+KINDS: tuple = ('READ', 'WRITE', 'TAS', 'CAS', 'FAA', 'LL', 'SC')
+READ, WRITE, TAS, CAS, FAA, LL, SC = range(len(KINDS))
+
+# Counters kept for each processor
+COUNTERS: tuple = ('hits', 'read_misses', 'write_misses', 'upgrades',
+                   'invalidations', 'writebacks', 'cache_fills',
+                   'memory_fills')
+HITS, READ_MISSES, WRITE_MISSES, UPGRADES, INVALIDATIONS, WRITEBACKS, \
+    CACHE_FILLS, MEMORY_FILLS = range(len(COUNTERS))
+
+# MOESI transitions, new state of a remote copy when another
+# processor reads it and state of a block filled without and with
+# sharers
+REMOTE_READ: tuple = (I, S, S, O, O, S)
+FILL_ALONE: int = E
+FILL_SHARED: int = S
+
+# Available backends
+BACKENDS: tuple = ('python', 'numba')
+
+
+def _process_batch(cores, kinds, addresses, values, victims, states, tags,
+                   data, memory, links, sharers, counters, remote_read,
+                   n_blocks, ways, fill_alone, fill_shared):
+    """This function processes a batch of memory accesses against the
+    array-backed state of all caches. Every array is flat, the block
+    j of the processor p is in the position p * n_blocks + j, and the
+    set s of a cache holds its blocks s * ways to (s + 1) * ways - 1.
+
+    Atomic instructions read the block for ownership: the other copies
+    are invalidated, an owner supplies the data and a dirty one writes
+    it back. The directory, as a bit mask of the processors that have
+    each block, is kept like the system keeps it.
+
+    Params
+    ------------------------------------------------------------------
+        cores: array.
+            Processor index of each access.
+        kinds: array.
+            Access type (READ, WRITE, TAS, CAS, FAA, LL or SC) of each
+            access.
+        addresses: array.
+            Memory address of each access.
+        values: array.
+            Data to be written, or added, by each access.
+        victims: array.
+            Way to be replaced by each access if it is needed.
+        states: array.
+            State of each cache block.
+        tags: array.
+            Address of each cache block.
+        data: array.
+            Data of each cache block.
+        memory: array.
+            Shared memory.
+        links: array.
+            Address reserved by the last load linked of each
+            processor, -1 if there is not.
+        sharers: array.
+            Directory, processors of each memory block as bits.
+        counters: array.
+            Counters of each processor.
+        remote_read: array.
+            New state of a remote copy when another processor reads
+            it, indexed by its current state.
+        n_blocks: int.
+            Number of blocks of each cache.
+        ways: int.
+            Number of blocks of each set.
+        fill_alone: int.
+            State of a block read without sharers.
+        fill_shared: int.
+            State of a block read with sharers.
+    """
+    n_cores = len(states) // n_blocks
+    n_counters = len(counters) // n_cores
+    n_sets = n_blocks // ways
+    # State of a clean block that no other cache has
+    exclusive = M if fill_alone == S else fill_alone
+
+    for i in range(len(kinds)):
+        core = cores[i]
+        kind = kinds[i]
+        addr = addresses[i]
+        first = (addr % n_sets) * ways
+        base = core * n_blocks + first
+        stats = core * n_counters
+
+        # A store conditional fails without accessing the cache if
+        # the block was lost since its load linked
+        if kind == SC:
+            if links[core] != addr:
+                continue
+
+            links[core] = -1
+
+        # Search for the cache block in its set
+        slot = -1
+
+        for j in range(ways):
+            if tags[base + j] == addr:
+                slot = j
+                break
+
+        hit = slot >= 0 and states[base + slot] != I
+        state = states[base + slot] if hit else I
+
+        if kind == READ or kind == LL:
+            if kind == LL:
+                links[core] = addr
+
+            if hit:
+                counters[stats + HITS] += 1
+                continue
+
+            counters[stats + READ_MISSES] += 1
+            value = memory[addr]
+            found = False
+            supplied = False
+
+            # Search in each cache
+            for other in range(n_cores):
+                if other != core:
+                    start = other * n_blocks + first
+
+                    for j in range(start, start + ways):
+                        if tags[j] == addr and states[j] != I:
+                            new = remote_read[states[j]]
+
+                            # The owner supplies the data
+                            if states[j] == E or states[j] == O or \
+                                states[j] == M or states[j] == F:
+                                value = data[j]
+                                supplied = True
+
+                            # and updates the memory if it is dirty
+                            # and it is not the owner anymore
+                            if (states[j] == M or states[j] == O) and \
+                                new != M and new != O:
+                                memory[addr] = value
+
+                            states[j] = new
+                            found = True
+
+            if supplied:
+                counters[stats + CACHE_FILLS] += 1
+            else:
+                counters[stats + MEMORY_FILLS] += 1
+
+            new_state = fill_shared if found else fill_alone
+        else:
+            value = values[i]
+            old = value
+
+            if kind != WRITE:
+                old = data[base + slot] if hit else memory[addr]
+
+                # Value written by the atomic instruction, -1 if a
+                # compare and swap fails
+                if kind == TAS:
+                    value = 1
+                elif kind == FAA:
+                    value = (old + value) & 0xffff
+                elif kind == CAS:
+                    value = value & 0xffff if old == value >> 16 else -1
+
+            # Exclusive copies are written silently
+            if state == M or state == E:
+                counters[stats + HITS] += 1
+
+                if value >= 0:
+                    states[base + slot] = M
+                    data[base + slot] = value
+
+                continue
+
+            if hit:
+                counters[stats + UPGRADES] += 1
+            else:
+                counters[stats + WRITE_MISSES] += 1
+
+            if kind == WRITE:
+                memory[addr] = value
+
+            # Invalidate every other copy
+            for other in range(n_cores):
+                if other != core:
+                    start = other * n_blocks + first
+
+                    for j in range(start, start + ways):
+                        if tags[j] == addr:
+                            if links[other] == addr:
+                                links[other] = -1
+
+                            if states[j] != I:
+                                counters[stats + INVALIDATIONS] += 1
+
+                                # The owner updates the memory if it
+                                # is dirty and supplies the data of a
+                                # read for ownership that misses
+                                if kind != WRITE and \
+                                    (states[j] == M or states[j] == O):
+                                    memory[addr] = data[j]
+
+                                if kind != WRITE and not hit and \
+                                    (states[j] == E or states[j] == O or
+                                     states[j] == M or states[j] == F):
+                                    old = data[j]
+
+                                    if kind == FAA:
+                                        value = (old + values[i]) & 0xffff
+                                    elif kind == CAS:
+                                        value = values[i] & 0xffff \
+                                            if old == values[i] >> 16 else -1
+
+                            states[j] = I
+                            sharers[addr] &= ~(1 << other)
+
+            new_state = M
+
+            # A failed compare and swap keeps an exclusive copy, which
+            # stays dirty if it was owned
+            if value < 0:
+                new_state = M if state == O else exclusive
+                value = old
+
+        # Search for an invalid block or replace the victim
+        if slot < 0:
+            for j in range(ways):
+                if states[base + j] == I:
+                    slot = j
+                    break
+
+            if slot < 0:
+                slot = victims[i]
+                evicted = tags[base + slot]
+
+                # Dirty blocks must be written back
+                if states[base + slot] == M or states[base + slot] == O:
+                    memory[evicted] = data[base + slot]
+                    counters[stats + WRITEBACKS] += 1
+
+                if links[core] == evicted:
+                    links[core] = -1
+
+                sharers[evicted] &= ~(1 << core)
+
+        tags[base + slot] = addr
+        data[base + slot] = value
+        states[base + slot] = new_state
+        sharers[addr] |= 1 << core
+
+
+# Compiled kernel, only built if numba is selected
+__compiled = None
+__backend: str = 'python'
+
+
+def get_backend() -> str:
+    """This function returns the selected backend.
+
+    Returns
+    ------------------------------------------------------------------
+        The backend name.
+    """
+    return __backend
+
+
+def select_backend(name: str) -> str:
+    """This function selects the backend used to process batches. If
+    numba is requested but it is not installed, the pure Python
+    backend is used. The compiled kernel is verified against the pure
+    Python one before it is selected.
+
+    Params
+    ------------------------------------------------------------------
+        name: str.
+            Backend name, 'python' or 'numba'.
+
+    Returns
+    ------------------------------------------------------------------
+        The selected backend name.
+    """
+    global __backend, __compiled
+
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown kernel backend {name}!')
+
+    if name == 'numba':
+        if njit is None:
+            name = 'python'
+        elif __compiled is None:
+            __compiled = njit(cache=True)(_process_batch)
+
+            if not verify_backend('numba'):
+                __compiled = None
+                raise RuntimeError('The numba kernel does not match the '
+                                   'Python kernel!')
+
+    __backend = name
+
+    return __backend
+
+
+def process_batch(accesses: list, states: list, tags: list, data: list,
+                  memory: list, n_blocks: int, ways: int = None,
+                  protocol: tuple = (REMOTE_READ, FILL_ALONE, FILL_SHARED),
+                  backend: str = None, links: list = None,
+                  sharers: list = None) -> list:
+    """This function processes a batch of memory accesses. The state
+    lists are updated in place.
+
+    Params
+    ------------------------------------------------------------------
+        accesses: list.
+            Tuples (processor, type, address, value, victim).
+        states: list.
+            State of each cache block.
+        tags: list.
+            Address of each cache block.
+        data: list.
+            Data of each cache block.
+        memory: list.
+            Shared memory.
+        n_blocks: int.
+            Number of blocks of each cache.
+        ways: int.
+            Number of blocks of each set. Fully associative by
+            default.
+        protocol: tuple.
+            New state of a remote copy when another processor reads
+            it and state of a block read without and with sharers.
+            MOESI by default.
+        backend: str.
+            Backend to be used. The selected one by default.
+        links: list.
+            Address reserved by each processor, -1 if there is not.
+            None if there are no reservations.
+        sharers: list.
+            Processors of each memory block as bits. Taken from the
+            caches by default.
+
+    Returns
+    ------------------------------------------------------------------
+        A flat list with the counters of each processor.
+    """
+    backend = backend or __backend
+    ways = ways or n_blocks
+    remote_read, fill_alone, fill_shared = protocol
+    n_cores = len(states) // n_blocks
+    columns = [list(column) for column in zip(*accesses)] or [[]] * 5
+    counters = [0] * (n_cores * len(COUNTERS))
+
+    if links is None:
+        links = [-1] * n_cores
+
+    if sharers is None:
+        sharers = [0] * len(memory)
+
+        for i, (state, tag) in enumerate(zip(states, tags)):
+            if state != I:
+                sharers[tag] |= 1 << i // n_blocks
+
+    if backend == 'python':
+        _process_batch(*columns, states, tags, data, memory, links, sharers,
+                       counters, list(remote_read), n_blocks, ways,
+                       fill_alone, fill_shared)
+
+        return counters
+
+    if __compiled is None:
+        raise RuntimeError(f'The {backend} kernel is not available!')
+
+    from numpy import array, int64
+
+    arrays = [array(values, dtype=int64)
+              for values in (*columns, states, tags, data, memory, links,
+                             sharers, counters, remote_read)]
+    __compiled(*arrays, n_blocks, ways, fill_alone, fill_shared)
+
+    # Copy the results back
+    for values, result in zip((states, tags, data, memory, links, sharers),
+                              arrays[5:11]):
+        values[:] = result.tolist()
+
+    return arrays[11].tolist()
+
+
+def random_batch(n_cores: int, ways: int, mem_size: int,
+                 length: int) -> list:
+    """This function generates a random batch of memory accesses of
+    every type. The values are small, so compare and swaps succeed
+    often.
+
+    Params
+    ------------------------------------------------------------------
+        n_cores: int.
+            Number of processors.
+        ways: int.
+            Number of blocks of each set.
+        mem_size: int.
+            Shared memory size.
+        length: int.
+            Number of accesses.
+
+    Returns
+    ------------------------------------------------------------------
+        A list of tuples (processor, type, address, value, victim).
+    """
+    accesses = []
+
+    for _ in range(length):
+        kind = randint(0, len(KINDS) - 1)
+        value = randint(0, 3)
+
+        if kind == CAS:
+            value |= randint(0, 3) << 16
+
+        accesses.append((randint(0, n_cores - 1), kind,
+                         randint(0, mem_size - 1), value,
+                         randint(0, ways - 1)))
+
+    return accesses
+
+
+def verify_backend(backend: str, n_cores: int = 4, n_blocks: int = 4,
+                   ways: int = 2, mem_size: int = 16,
+                   length: int = 10000) -> bool:
+    """This function checks that a backend produces exactly the same
+    states, reservations, directory and counters as the pure Python
+    kernel.
+
+    Params
+    ------------------------------------------------------------------
+        backend: str.
+            Backend to be verified.
+        n_cores: int.
+            Number of processors.
+        n_blocks: int.
+            Number of blocks of each cache.
+        ways: int.
+            Number of blocks of each set.
+        mem_size: int.
+            Shared memory size.
+        length: int.
+            Number of accesses.
+
+    Returns
+    ------------------------------------------------------------------
+        True if both backends match, False otherwise.
+    """
+    accesses = random_batch(n_cores, ways, mem_size, length)
+    results = []
+
+    for name in ('python', backend):
+        states = [I] * (n_cores * n_blocks)
+        tags = list(range(n_blocks)) * n_cores
+        data = [0] * (n_cores * n_blocks)
+        memory = [0] * mem_size
+        links = [-1] * n_cores
+        sharers = [0] * mem_size
+        counters = process_batch(accesses, states, tags, data, memory,
+                                 n_blocks, ways, backend=name, links=links,
+                                 sharers=sharers)
+        results.append((states, tags, data, memory, links, sharers,
+                        counters))
+
+    return results[0] == results[1]
+
+
+def verify_system(protocol: str = 'MOESI', directory: bool = False,
+                  n_cores: int = 4, n_blocks: int = 4, ways: int = 2,
+                  mem_size: int = 16, length: int = 2000) -> bool:
+    """This function checks that System.run_batch produces exactly the
+    same caches, reservations, directory, memory and counters as a
+    system that steps the same accesses cycle by cycle. The stepped
+    system runs one access at a time in the batch order while the
+    other processors execute CALC instructions, and the way filled by
+    each access is the victim given to the kernel.
+
+    Params
+    ------------------------------------------------------------------
+        protocol: str.
+            Coherence protocol.
+        directory: bool.
+            Indicates if a directory is used instead of snooping.
+        n_cores: int.
+            Number of processors.
+        n_blocks: int.
+            Number of blocks of each cache.
+        ways: int.
+            Number of blocks of each set.
+        mem_size: int.
+            Shared memory size.
+        length: int.
+            Number of accesses.
+
+    Returns
+    ------------------------------------------------------------------
+        True if both paths match, False otherwise.
+    """
+    # The system imports this module
+    from hardware.system import System
+    from utils.formats import addr2string
+
+    instructions = []
+
+    for core, kind, address, value, _ in random_batch(n_cores, ways,
+                                                      mem_size, length):
+        instr = { 'processor': core + 1, 'type': KINDS[kind],
+                  'address': addr2string(address, mem_size) }
+
+        if kind == CAS:
+            instr['expected'] = format(value >> 16, '04x')
+
+        if kind in (WRITE, CAS, FAA, SC):
+            instr['data'] = format(value & 0xffff, '04x')
+
+        instructions.append(instr)
+
+    victims = []
+    n_sets = n_blocks // ways
+
+    def workload(_id: int):
+        while len(victims) < len(instructions):
+            instr = instructions[len(victims)]
+
+            if instr['processor'] != _id:
+                yield { 'type': 'CALC' }
+                continue
+
+            yield instr
+
+            # The access has finished, so its block is in the cache
+            # unless a store conditional failed
+            first = int(instr['address'], 2) % n_sets * ways
+            blocks = system.get_processor(_id - 1).get_cache_mem()
+            addresses = [block['address'] for block in
+                         blocks[first:first + ways]]
+            victims.append(addresses.index(instr['address'])
+                           if instr['address'] in addresses else 0)
+
+    results = []
+
+    for batch in (False, True):
+        system = System(n_cores, verbose=False, protocol=protocol,
+                        cache_size=n_blocks,
+                        associativity=ways, mem_size=mem_size,
+                        directory=directory,
+                        workloads=None if batch else
+                        [workload(i + 1) for i in range(n_cores)])
+
+        if batch:
+            counters = system.run_batch(instructions, victims)
+        else:
+            system.run()
+            counters = {_id: {name: stats[name] for name in COUNTERS}
+                        for _id, stats in system.get_statistics().items()}
+
+        cpus = [system.get_processor(i) for i in range(n_cores)]
+        sharers = None
+
+        if directory:
+            sharers = [system.get_directory().get_sharers(
+                addr2string(i, mem_size)) for i in range(mem_size)]
+
+        results.append(([[(block['address'], block['data'], block['state'])
+                          for block in cpu.get_cache_mem()] for cpu in cpus],
+                        [cpu.get_link() for cpu in cpus], sharers,
+                        system.get_shared_mem(), counters))
+
+    return results[0] == results[1]
@@ -1,11 +1,13 @@
 from random import randint
-from threading import Lock
+
+from utils.formats import addr2string
 
 
 class CacheL1:
     """This class model a L1 cache memory.
     """
-    def __init__(self, associativity: int, size: int) -> None:
+    def __init__(self, associativity: int, size: int,
+                 mem_size: int = 16, mshrs: int = 1) -> None:
         """Constructor.
 
         Params
@@ -14,23 +16,76 @@ class CacheL1:
                 Cache associativity.
             size: int.
                 Numbers of blocks.
+            mem_size: int.
+                Size of the memory to be cached.
+            mshrs: int.
+                Number of miss status holding registers, that is the
+                misses that can be outstanding at the same time.
         """
+        if associativity < 1 or size % associativity != 0:
+            raise ValueError('The cache size must be a multiple of its '
+                             'associativity!')
+
         self.__associativity = associativity
         self.__size = size
-        # Memory blocks
+        self.__sets = size // associativity
+        # Outstanding misses, address and cycle when it is completed
+        self.__mshrs: int = mshrs
+        self.__pending: dict = {}
+        self.__prefetcher = None
+        # Memory blocks, the set s has the blocks from
+        # s * associativity to (s + 1) * associativity - 1
         self.__mem = []
 
         for i in range(self.__size):
-            # Compute address
-            address: str = bin(i)[2:]
+            # Compute an address of the block set
+            address: int = (i % associativity) * self.__sets + \
+                i // associativity
 
             self.__mem.append({
-                'address': '0' * (4 - len(address)) + address,
-                'available': Lock(),
+                'address': addr2string(address, mem_size),
                 'data': '0000',
                 'state': 'I'
             })
 
+    def __get_set(self, address: str) -> list:
+        """This method returns the blocks of the set where an address
+        can be placed.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+
+        Returns
+        --------------------------------------------------------------
+            A list with the blocks of the set.
+        """
+        first = int(address, 2) % self.__sets * self.__associativity
+
+        return self.__mem[first:first + self.__associativity]
+
+    def allocate_mshr(self, address: str, done: int) -> None:
+        """This method keeps an outstanding miss in a MSHR.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+            done: int.
+                Cycle when the miss is completed.
+        """
+        self.__pending[address] = done
+
+    def get_associativity(self) -> int:
+        """This method returns the cache associativity.
+
+        Returns
+        --------------------------------------------------------------
+            Cache associativity.
+        """
+        return self.__associativity
+
     def get_mem(self) -> list:
         """This method returns all cache blocks.
 
@@ -40,6 +95,48 @@ class CacheL1:
         """
         return self.__mem
 
+    def get_outstanding(self, cycle: int) -> int:
+        """This method returns the number of MSHRs in use.
+
+        Params
+        --------------------------------------------------------------
+            cycle: int.
+                Current cycle.
+
+        Returns
+        --------------------------------------------------------------
+            The number of misses not completed yet.
+        """
+        return sum(done > cycle for done in self.__pending.values())
+
+    def get_pending(self, address: str, cycle: int) -> int:
+        """This method returns when an outstanding miss is completed.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+            cycle: int.
+                Current cycle.
+
+        Returns
+        --------------------------------------------------------------
+            The cycle when the miss is completed, or None if there is
+            not an outstanding miss for the address.
+        """
+        done = self.__pending.get(address)
+
+        return done if done is not None and done > cycle else None
+
+    def get_prefetcher(self):
+        """This method returns the prefetcher attached to the cache.
+
+        Returns
+        --------------------------------------------------------------
+            The prefetcher, or None if the cache does not prefetch.
+        """
+        return self.__prefetcher
+
     def get_size(self) -> int:
         """This method returns the cache size.
 
@@ -49,6 +146,25 @@ class CacheL1:
         """
         return self.__size
 
+    def has_free_mshr(self, cycle: int) -> bool:
+        """This method returns True if another miss can be outstanding,
+        False otherwise. Completed misses free their MSHR.
+
+        Params
+        --------------------------------------------------------------
+            cycle: int.
+                Current cycle.
+
+        Returns
+        --------------------------------------------------------------
+            True if there is a free MSHR, False otherwise.
+        """
+        if len(self.__pending) >= self.__mshrs:
+            self.__pending = {address: done for address, done
+                              in self.__pending.items() if done > cycle}
+
+        return len(self.__pending) < self.__mshrs
+
     def is_in_cache(self, address: str) -> bool:
         """This method returns True if an address is in cache, False
         otherwise.
@@ -62,8 +178,8 @@ class CacheL1:
         --------------------------------------------------------------
             True if an address is in cache, False otherwise.
         """
-        for block in self.__mem:
-            if block['address'] == address:
+        for block in self.__get_set(address):
+            if block['address'] == address and block['state'] != 'I':
                 return True
 
         return False
@@ -81,13 +197,25 @@ class CacheL1:
         --------------------------------------------------------------
             The data and the state in the specified memory address.
         """
-        for block in self.__mem:
+        for block in self.__get_set(addr):
             if block['address'] == addr:
                 return block
 
         return {}
 
-    def write(self, addr: str, data: str, state: str = 'E') -> None:
+    def set_prefetcher(self, prefetcher) -> None:
+        """This method attaches a prefetcher to the cache.
+
+        Params
+        --------------------------------------------------------------
+            prefetcher: Prefetcher.
+                Prefetcher trained by the accesses to the cache, or
+                None to disable prefetching.
+        """
+        self.__prefetcher = prefetcher
+
+    def write(self, addr: str, data: str, state: str = 'E',
+              victim: int = None) -> dict:
         """This method writes the data in a memory address and change
         the block state.
 
@@ -100,11 +228,21 @@ class CacheL1:
             state: str.
                 New state for the cache block. Exclusive (E) by
                 default.
+            victim: int.
+                Way of the set to be replaced if the address is not in
+                cache and there is not an invalid block. Random by
+                default.
+
+        Returns
+        --------------------------------------------------------------
+            The replaced block if a valid block was evicted, an empty
+            dictionary otherwise.
         """
         found = False
+        blocks: list = self.__get_set(addr)
 
         # Searching for the cache block
-        for block in self.__mem:
+        for block in blocks:
             # Check if the block is valid and the memory address is
             # the correct
             if block['address'] == addr:
@@ -118,7 +256,7 @@ class CacheL1:
             invalid = False
 
             # Searching for an invalid block
-            for block in self.__mem:
+            for block in blocks:
                 if block['state'] == 'I':
                     # Set the data in the invalid block
                     block['address'] = addr
@@ -131,13 +269,19 @@ class CacheL1:
             # If an invalid block does not exist
             if not invalid:
                 # Get a random block
-                block = randint(0, self.__size - 1)
+                if victim is None:
+                    victim = randint(0, self.__associativity - 1)
+
+                victim += int(addr, 2) % self.__sets * self.__associativity
+                evicted: dict = self.__mem[victim]
 
                 # Set the new information
-                self.__mem[block] = {
+                self.__mem[victim] = {
                     'address': addr,
-                    'available': Lock(),
                     'data': data,
                     'state': state
                 }
 
+                return evicted
+
+        return {}
@@ -0,0 +1,200 @@
+# Page placement policies. Interleave spreads the pages over the nodes
+# in order, first-touch places each page in the node of the first core
+# that uses it and explicit takes the node of each page from a table
+POLICIES: tuple = ('interleave', 'first-touch', 'explicit')
+# Counters kept for each memory node
+NODE_STATISTICS: tuple = ('pages', 'requests', 'reads', 'writes', 'local',
+                          'remote', 'bytes')
+
+
+class AddressMap:
+    """This class maps the memory blocks to the memory controllers of
+    a NUMA system. Cores are split in consecutive sockets, one for each
+    node, and accessing the memory of another socket costs the remote
+    latency.
+    """
+    def __init__(self, cores: int, nodes: int = 1, page_size: int = 4,
+                 policy: str = 'interleave', placement: dict = None,
+                 remote_latency: int = 16) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            cores: int.
+                Number of processors.
+            nodes: int.
+                Number of memory nodes.
+            page_size: int.
+                Blocks of each page, the placement unit.
+            policy: str.
+                Placement policy, 'interleave', 'first-touch' or
+                'explicit'.
+            placement: dict.
+                Node of each page for the explicit policy, the other
+                pages are interleaved.
+            remote_latency: int.
+                Cycles needed to access the memory of another node.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f'Unknown placement policy {policy}!')
+
+        if nodes < 1 or page_size < 1:
+            raise ValueError('At least one node is required and the pages '
+                             'need at least one block!')
+
+        self.__cores: int = cores
+        self.__nodes: int = nodes
+        self.__page_size: int = page_size
+        self.__policy: str = policy
+        self.__remote_latency: int = remote_latency
+        # Node of each page placed so far
+        self.__pages: dict = {}
+        self.__stats: list = [dict.fromkeys(NODE_STATISTICS, 0)
+                              for _ in range(nodes)]
+
+        for page, node in (placement or {}).items():
+            if not 0 <= node < nodes:
+                raise ValueError(f'Page {page} is placed in an unknown '
+                                 f'node {node}!')
+
+            if policy == 'explicit':
+                self.__place(int(page), node)
+
+    def __place(self, page: int, node: int) -> int:
+        """This method places a page in a node.
+
+        Params
+        --------------------------------------------------------------
+            page: int.
+                Page number.
+            node: int.
+                Memory node.
+
+        Returns
+        --------------------------------------------------------------
+            The node.
+        """
+        self.__pages[page] = node
+        self.__stats[node]['pages'] += 1
+
+        return node
+
+    def access(self, _id: int, address: str, write: bool,
+               size: int) -> None:
+        """This method counts a read or a write of a memory node.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor index of the requester.
+            address: str.
+                Memory address.
+            write: bool.
+                Indicates if the block is written.
+            size: int.
+                Bytes transferred.
+        """
+        node = self.get_node(_id, address)
+        stats = self.__stats[node]
+
+        stats['writes' if write else 'reads'] += 1
+        stats['local' if node == self.get_socket(_id) else 'remote'] += 1
+        stats['bytes'] += size
+
+    def get_latency(self, _id: int, node: int, local: int) -> int:
+        """This method returns the cycles needed by a processor to
+        access a memory node.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor index.
+            node: int.
+                Memory node.
+            local: int.
+                Latency of the local memory.
+
+        Returns
+        --------------------------------------------------------------
+            Number of cycles.
+        """
+        return local if node == self.get_socket(_id) else \
+            self.__remote_latency
+
+    def get_node(self, _id: int, address: str) -> int:
+        """This method returns the memory node of a block, placing its
+        page the first time that it is used.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor index of the requester.
+            address: str.
+                Memory address.
+
+        Returns
+        --------------------------------------------------------------
+            The memory node.
+        """
+        page = int(address, 2) // self.__page_size
+        node = self.__pages.get(page)
+
+        if node is not None:
+            return node
+
+        if self.__policy == 'first-touch':
+            return self.__place(page, self.get_socket(_id))
+
+        return self.__place(page, page % self.__nodes)
+
+    def get_nodes(self) -> int:
+        """This method returns the number of memory nodes.
+
+        Returns
+        --------------------------------------------------------------
+            The number of nodes.
+        """
+        return self.__nodes
+
+    def get_socket(self, _id: int) -> int:
+        """This method returns the node local to a processor.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor index.
+
+        Returns
+        --------------------------------------------------------------
+            The memory node.
+        """
+        return _id * self.__nodes // self.__cores
+
+    def get_statistics(self) -> list:
+        """This method returns the counters of each memory node.
+
+        Returns
+        --------------------------------------------------------------
+            A list with the counters of each node.
+        """
+        return [dict(stats) for stats in self.__stats]
+
+    def request(self, _id: int, address: str) -> int:
+        """This method counts a request that reaches the home node of
+        a block.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor index of the requester.
+            address: str.
+                Memory address.
+
+        Returns
+        --------------------------------------------------------------
+            The home node.
+        """
+        node = self.get_node(_id, address)
+        self.__stats[node]['requests'] += 1
+
+        return node
@@ -0,0 +1,252 @@
+class Prefetcher:
+    """This class is the base of the prefetchers attached to a cache.
+    It keeps the prefetched blocks that have not been used yet, so the
+    system can measure accuracy, coverage and timeliness.
+    """
+    def __init__(self, degree: int = 1, mem_size: int = 16) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            degree: int.
+                Number of blocks prefetched each time.
+            mem_size: int.
+                Memory size, blocks beyond it are not prefetched.
+        """
+        self._degree: int = degree
+        self._mem_size: int = mem_size
+        self.__unused: set = set()
+
+    def _predict(self, address: int, pc: int, miss: bool) -> list:
+        """This method trains the prefetcher with a demand access and
+        returns the blocks that should be prefetched.
+
+        Params
+        --------------------------------------------------------------
+            address: int.
+                Memory address.
+            pc: int.
+                Instruction address, None if it is not known.
+            miss: bool.
+                Indicates if the access missed.
+
+        Returns
+        --------------------------------------------------------------
+            A list with the addresses to be prefetched.
+        """
+        raise NotImplementedError
+
+    def add(self, address: str) -> None:
+        """This method marks a block as prefetched and unused.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+        """
+        self.__unused.add(address)
+
+    def discard(self, address: str) -> bool:
+        """This method forgets a prefetched block, e.g. because it was
+        evicted or invalidated.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Memory address.
+
+        Returns
+        --------------------------------------------------------------
+            True if the block was prefetched and unused, False
+            otherwise.
+        """
+        if address in self.__unused:
+            self.__unused.remove(address)
+            return True
+
+        return False
+
+    def get_name(self) -> str:
+        """This method returns the prefetcher name.
+
+        Returns
+        --------------------------------------------------------------
+            The prefetcher name.
+        """
+        return PREFETCHERS_NAMES[type(self)]
+
+    def observe(self, address: int, pc: int, miss: bool) -> list:
+        """This method trains the prefetcher with a demand access.
+
+        Params
+        --------------------------------------------------------------
+            address: int.
+                Memory address.
+            pc: int.
+                Instruction address, None if it is not known.
+            miss: bool.
+                Indicates if the access missed.
+
+        Returns
+        --------------------------------------------------------------
+            A list with the valid addresses to be prefetched.
+        """
+        return [candidate for candidate in self._predict(address, pc, miss)
+                if 0 <= candidate < self._mem_size and candidate != address]
+
+
+class NextLinePrefetcher(Prefetcher):
+    """This class prefetches the next blocks after each miss.
+    """
+    def _predict(self, address: int, pc: int, miss: bool) -> list:
+        """This method returns the blocks after a missed one.
+        """
+        if not miss:
+            return []
+
+        return [address + i for i in range(1, self._degree + 1)]
+
+
+class StridePrefetcher(Prefetcher):
+    """This class detects constant strides in the accesses of each
+    instruction. Accesses without a known instruction address share
+    one entry of the table.
+    """
+    def __init__(self, degree: int = 1, mem_size: int = 16,
+                 entries: int = 16) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            degree: int.
+                Number of blocks prefetched each time.
+            mem_size: int.
+                Memory size, blocks beyond it are not prefetched.
+            entries: int.
+                Size of the table indexed by instruction address.
+        """
+        super(StridePrefetcher, self).__init__(degree, mem_size)
+        self.__entries: int = entries
+        self.__table: dict = {}
+
+    def _predict(self, address: int, pc: int, miss: bool) -> list:
+        """This method prefetches along the stride once it has been
+        seen twice in a row.
+        """
+        entry = self.__table.pop(pc, None)
+
+        if entry is None:
+            # Replace the least recently used entry
+            if len(self.__table) >= self.__entries:
+                del self.__table[next(iter(self.__table))]
+
+            entry = { 'last': address, 'stride': 0, 'confidence': 0 }
+        else:
+            stride = address - entry['last']
+
+            if stride != 0 and stride == entry['stride']:
+                entry['confidence'] = min(entry['confidence'] + 1, 3)
+            else:
+                entry['stride'] = stride
+                entry['confidence'] = 0
+
+            entry['last'] = address
+
+        self.__table[pc] = entry
+
+        if entry['confidence'] < 1:
+            return []
+
+        return [address + entry['stride'] * i
+                for i in range(1, self._degree + 1)]
+
+
+class StreamPrefetcher(Prefetcher):
+    """This class detects sequential streams of misses, in any
+    direction, and runs ahead of them.
+    """
+    def __init__(self, degree: int = 1, mem_size: int = 16,
+                 streams: int = 4, window: int = 2) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            degree: int.
+                Number of blocks prefetched each time.
+            mem_size: int.
+                Memory size, blocks beyond it are not prefetched.
+            streams: int.
+                Number of streams tracked.
+            window: int.
+                Maximum distance of a miss to continue a stream.
+        """
+        super(StreamPrefetcher, self).__init__(degree, mem_size)
+        self.__window: int = window
+        self.__size: int = streams
+        self.__streams: list = []
+
+    def _predict(self, address: int, pc: int, miss: bool) -> list:
+        """This method prefetches ahead of a confirmed stream.
+        """
+        if not miss:
+            return []
+
+        for stream in self.__streams:
+            distance = address - stream['last']
+
+            if distance == 0 or abs(distance) > self.__window:
+                continue
+
+            direction = 1 if distance > 0 else -1
+
+            if stream['direction'] in (0, direction):
+                stream['direction'] = direction
+                stream['last'] = address
+
+                # The most recently used stream goes last
+                self.__streams.remove(stream)
+                self.__streams.append(stream)
+
+                return [address + direction * i
+                        for i in range(1, self._degree + 1)]
+
+        # Start a new stream replacing the oldest one
+        if len(self.__streams) >= self.__size:
+            self.__streams.pop(0)
+
+        self.__streams.append({ 'last': address, 'direction': 0 })
+
+        return []
+
+
+# Available prefetchers
+PREFETCHERS: dict = { 'next-line': NextLinePrefetcher,
+                      'stride': StridePrefetcher,
+                      'stream': StreamPrefetcher }
+PREFETCHERS_NAMES: dict = {value: key for key, value in PREFETCHERS.items()}
+# Prefetched blocks are requested as shared copies, as exclusive ones
+# or exclusive only when a write triggered them
+MODES: tuple = ('shared', 'exclusive', 'adaptive')
+
+
+def create_prefetcher(name: str, degree: int = 1,
+                      mem_size: int = 16) -> Prefetcher:
+    """This function creates a prefetcher.
+
+    Params
+    ------------------------------------------------------------------
+        name: str.
+            Prefetcher name, 'next-line', 'stride' or 'stream'.
+        degree: int.
+            Number of blocks prefetched each time.
+        mem_size: int.
+            Memory size.
+
+    Returns
+    ------------------------------------------------------------------
+        The new prefetcher.
+    """
+    if name not in PREFETCHERS:
+        raise ValueError(f'Unknown prefetcher {name}!')
+
+    return PREFETCHERS[name](degree, mem_size)
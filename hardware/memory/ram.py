@@ -1,6 +1,3 @@
-from threading import Lock
-
-
 class RAM:
     """This class models a Memory RAM of 16 blocks.
     """
@@ -35,23 +32,27 @@ class RAM:
             RAM.__instance = self
             self.__size: int = size
             self.__mem: list = ['0000'] * self.__size
-            self.__bus: Lock = Lock()
-
-    def block_bus(self) -> None:
-        """This method asks for the bus and block it.
-        """
-        self.__bus.acquire(True)
 
-    def clear(self) -> None:
+    def clear(self, size: int = None) -> None:
         """This method clears the memory and puts '0000' in all
         blocks.
+
+        Params
+        --------------------------------------------------------------
+            size: int.
+                New numbers of blocks. The current size by default.
         """
+        self.__size = size or self.__size
         self.__mem: list = ['0000'] * self.__size
 
-    def free_bus(self) -> None:
-        """This method releases the bus.
+    def get_mem(self) -> list:
+        """This method returns all memory blocks.
+
+        Returns
+        --------------------------------------------------------------
+            A list with the data in each memory address.
         """
-        self.__bus.release()
+        return self.__mem
 
     def get_size(self) -> int:
         """This method returns the memory size.
@@ -62,15 +63,6 @@ class RAM:
         """
         return self.__size
 
-    def is_busy(self) -> bool:
-        """This method indicates if the bus is busy.
-
-        Returns
-        --------------------------------------------------------------
-            True if the bus is busy, False otherwise.
-        """
-        return self.__bus.locked()
-
     def read(self, addr: str) -> str:
         """This method reads the data in a memory address.
 
@@ -0,0 +1,224 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Available backends
+BACKENDS: tuple = ('python', 'numpy')
+
+
+def _python_histograms(addresses: list, groups: dict) -> dict:
+    """This function computes the LRU stack distances of an address
+    stream with a stack for each set, in a single pass.
+
+    Params
+    ------------------------------------------------------------------
+        addresses: list.
+            Block addresses as integers.
+        groups: dict.
+            Deepest distance needed for each number of sets.
+
+    Returns
+    ------------------------------------------------------------------
+        A dictionary with the histogram of each number of sets, the
+        last bucket counts the cold and deeper accesses.
+    """
+    histograms = {sets: [0] * (depth + 1) for sets, depth in groups.items()}
+    # Blocks of each set from the most to the least recently used,
+    # only the ones that some associativity can hold are kept
+    stacks = {sets: {} for sets in groups}
+
+    for address in addresses:
+        for sets, depth in groups.items():
+            stack = stacks[sets].setdefault(address % sets, [])
+
+            if address in stack:
+                distance = stack.index(address)
+                del stack[distance]
+            else:
+                distance = depth
+
+                if len(stack) == depth:
+                    stack.pop()
+
+            stack.insert(0, address)
+            histograms[sets][distance] += 1
+
+    return histograms
+
+
+def _numpy_histograms(addresses: list, groups: dict, chunk: int) -> dict:
+    """This function computes the LRU stack distances of an address
+    stream processing a chunk of accesses at a time with arrays.
+
+    The distance of an access is the number of other blocks of its
+    set used since the last access to its block. Inside a chunk, they
+    are the accesses after that one and before this one that are the
+    last of their block before this one. Before the chunk, they are
+    the blocks last used after that one, which are counted in their
+    sets sorted by that time, without the ones used again in the
+    chunk before this one.
+
+    Params
+    ------------------------------------------------------------------
+        addresses: list.
+            Block addresses as integers.
+        groups: dict.
+            Deepest distance needed for each number of sets.
+        chunk: int.
+            Accesses processed together.
+
+    Returns
+    ------------------------------------------------------------------
+        A dictionary with the histogram of each number of sets, the
+        last bucket counts the cold and deeper accesses.
+    """
+    histograms = {sets: numpy.zeros(depth + 1, dtype=numpy.int64)
+                  for sets, depth in groups.items()}
+    blocks, stream = numpy.unique(numpy.asarray(addresses, dtype=numpy.int64),
+                                  return_inverse=True)
+    never = len(stream)
+    # Time of the last access to each block, -1 if it was not used
+    last = numpy.full(len(blocks), -1, dtype=numpy.int64)
+
+    for start in range(0, len(stream), chunk):
+        ids = stream[start:start + chunk]
+        times = numpy.arange(start, start + len(ids))
+        sets_of = blocks[ids]
+
+        # Previous and next access to the same block
+        order = numpy.argsort(ids, kind='stable')
+        repeated = ids[order][1:] == ids[order][:-1]
+        prev = last[ids]
+        prev[order[1:][repeated]] = times[order[:-1][repeated]]
+        nxt = numpy.full(len(ids), never)
+        nxt[order[:-1][repeated]] = times[order[1:][repeated]]
+
+        # First access of each block in the chunk
+        first = numpy.full(len(blocks), never)
+        firsts = order[numpy.concatenate(([True], ~repeated))]
+        first[ids[firsts]] = times[firsts]
+
+        inside = (times[None, :] < times[:, None]) & \
+            (times[None, :] > prev[:, None]) & (nxt[None, :] > times[:, None])
+        # Blocks used before the chunk and again before this access
+        used = numpy.flatnonzero(last >= 0)
+        again = ids[firsts][last[ids[firsts]] >= 0]
+        counted = (first[again][None, :] < times[:, None]) & \
+            (last[again][None, :] > prev[:, None])
+
+        for sets, depth in groups.items():
+            same = sets_of % sets
+            keys = numpy.sort(blocks[used] % sets * never + last[used])
+            distances = (inside & (same[None, :] == same[:, None])).sum(1)
+            distances += numpy.searchsorted(keys, (same + 1) * never) - \
+                numpy.searchsorted(keys, same * never + prev, 'right')
+            distances -= (counted & (blocks[again][None, :] % sets ==
+                                     same[:, None])).sum(1)
+            distances = numpy.where(prev < 0, depth,
+                                    numpy.minimum(distances, depth))
+            histograms[sets] += numpy.bincount(distances,
+                                               minlength=depth + 1)
+
+        # The last access of each block in the chunk
+        final = nxt == never
+        last[ids[final]] = times[final]
+
+    return {sets: histogram.tolist()
+            for sets, histogram in histograms.items()}
+
+
+def stack_histograms(addresses: list, groups: dict, backend: str = None,
+                     chunk: int = 256) -> dict:
+    """This function computes the LRU stack distances of an address
+    stream for several numbers of sets in a single pass. A cache with
+    those sets hits an access if its associativity is greater than
+    the distance.
+
+    Params
+    ------------------------------------------------------------------
+        addresses: list.
+            Block addresses as integers.
+        groups: dict.
+            Deepest distance needed for each number of sets, that is
+            the greatest associativity simulated with them.
+        backend: str.
+            Backend, 'python' or 'numpy'. NumPy is used if it is
+            installed by default, and Python if it is not.
+        chunk: int.
+            Accesses processed together by NumPy.
+
+    Returns
+    ------------------------------------------------------------------
+        A dictionary with the histogram of each number of sets, the
+        last bucket counts the cold and deeper accesses.
+    """
+    backend = backend or ('python' if numpy is None else 'numpy')
+
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown stack backend {backend}!')
+
+    if chunk < 1:
+        raise ValueError('The chunks need at least one access!')
+
+    if backend == 'python' or numpy is None or not addresses:
+        return _python_histograms(addresses, groups)
+
+    return _numpy_histograms(addresses, groups, chunk)
+
+
+def sweep_caches(streams: list, configs: list, backend: str = None,
+                 chunk: int = 256) -> list:
+    """This function simulates several LRU caches with the same pass
+    over the address stream of each processor. Every processor has
+    its own private cache of each configuration.
+
+    Params
+    ------------------------------------------------------------------
+        streams: list.
+            Block addresses, as integers, accessed by each processor.
+        configs: list.
+            Tuples with the size and associativity of each cache.
+        backend: str.
+            Backend, 'python' or 'numpy'. NumPy is used if it is
+            installed by default, and Python if it is not.
+        chunk: int.
+            Accesses processed together by NumPy.
+
+    Returns
+    ------------------------------------------------------------------
+        A list with the accesses, hits, misses and miss rate of each
+        configuration.
+    """
+    groups = {}
+
+    for size, associativity in configs:
+        if associativity < 1 or size % associativity != 0:
+            raise ValueError('The cache size must be a multiple of its '
+                             'associativity!')
+
+        sets = size // associativity
+        groups[sets] = max(groups.get(sets, 0), associativity)
+
+    totals = {sets: [0] * (depth + 1) for sets, depth in groups.items()}
+
+    for addresses in streams:
+        histograms = stack_histograms(addresses, groups, backend, chunk)
+
+        for sets, histogram in histograms.items():
+            totals[sets] = [a + b for a, b in zip(totals[sets], histogram)]
+
+    results = []
+
+    for size, associativity in configs:
+        histogram = totals[size // associativity]
+        accesses = sum(histogram)
+        hits = sum(histogram[:associativity])
+        results.append({ 'size': size, 'associativity': associativity,
+                         'sets': size // associativity, 'accesses': accesses,
+                         'hits': hits, 'misses': accesses - hits,
+                         'miss_rate': (accesses - hits) / accesses
+                         if accesses else 0 })
+
+    return results
@@ -0,0 +1,499 @@
+from bisect import bisect_right
+from math import ceil, sqrt
+
+
+# Message sizes in bytes
+CONTROL_SIZE: int = 8
+DATA_SIZE: int = 16
+
+
+class Interconnect:
+    """This class models the network that connects the processors and
+    the memory controllers, which are the last nodes. Each link can
+    send a message at a time, so messages wait until the links in
+    their route are free. Messages can be booked for a later cycle,
+    and an earlier one still takes the free cycles before it.
+    """
+    def __init__(self, nodes: int, latency: int = 1,
+                 bandwidth: int = 8, memories: int = 1) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            nodes: int.
+                Number of nodes, the processors and the memory
+                controllers.
+            latency: int.
+                Cycles needed to cross a link.
+            bandwidth: int.
+                Bytes sent by a link each cycle.
+            memories: int.
+                Number of memory controllers.
+        """
+        self._nodes: int = nodes
+        self._memories: int = memories
+        self.__latency: int = latency
+        self.__bandwidth: int = bandwidth
+        self.__links: dict = {}
+        # Cycles reserved in each link, sorted and disjoint intervals
+        self.__reserved: dict = {}
+        # Messages are not sent before this cycle, so the intervals
+        # that end before it are forgotten
+        self.__horizon: int = 0
+        self.__stats: dict = { 'messages': 0, 'bytes': 0, 'hops': 0,
+                               'byte_hops': 0, 'contention_cycles': 0 }
+        # Messages and bytes delivered between each pair of nodes
+        self.__flows: dict = {}
+        # Timeline where the links held are written
+        self.__timeline = None
+
+    def _route(self, src: int, dst: int) -> list:
+        """This method returns the links used to send a message.
+
+        Params
+        --------------------------------------------------------------
+            src: int.
+                Source node.
+            dst: int.
+                Destination node.
+
+        Returns
+        --------------------------------------------------------------
+            A list with the links from the source to the destination.
+        """
+        raise NotImplementedError
+
+    def _deliver(self, src: int, targets, size: int) -> None:
+        """This method counts a message delivered to some nodes. A
+        message that reaches several nodes in a single transfer is
+        counted for each one.
+
+        Params
+        --------------------------------------------------------------
+            src: int.
+                Source node.
+            targets: iterable.
+                Destination nodes.
+            size: int.
+                Message size in bytes.
+        """
+        for dst in targets:
+            flow = self.__flows.get((src, dst))
+
+            if flow is None:
+                flow = self.__flows[(src, dst)] = [0, 0]
+
+            flow[0] += 1
+            flow[1] += size
+
+    def __get_link(self, link) -> dict:
+        """This method returns the information of a link, creating it
+        the first time it is used.
+
+        Params
+        --------------------------------------------------------------
+            link: hashable.
+                Link identifier.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the cycle when the link is free and its
+            counters.
+        """
+        if link not in self.__links:
+            self.__links[link] = { 'free': 0, 'messages': 0, 'busy': 0,
+                                   'contention': 0 }
+            self.__reserved[link] = []
+
+        return self.__links[link]
+
+    def __reserve(self, link, cycle: int, occupancy: int) -> int:
+        """This method reserves a link for the first free interval
+        long enough at or after a cycle.
+
+        Params
+        --------------------------------------------------------------
+            link: hashable.
+                Link identifier.
+            cycle: int.
+                First cycle that can be used.
+            occupancy: int.
+                Cycles needed.
+
+        Returns
+        --------------------------------------------------------------
+            The first cycle reserved.
+        """
+        intervals = self.__reserved[link]
+        old = 0
+
+        while old < len(intervals) and intervals[old][1] <= self.__horizon:
+            old += 1
+
+        del intervals[:old]
+
+        # The intervals before i end before the message can start
+        start = cycle
+        i = bisect_right(intervals, cycle, key=lambda interval: interval[1])
+
+        while i < len(intervals) and intervals[i][0] < start + occupancy:
+            start = intervals[i][1]
+            i += 1
+
+        end = start + occupancy
+
+        # Adjacent intervals are merged to keep the list short
+        if i > 0 and intervals[i - 1][1] == start:
+            i -= 1
+            intervals[i][1] = end
+        else:
+            intervals.insert(i, [start, end])
+
+        if i + 1 < len(intervals) and intervals[i + 1][0] == end:
+            intervals[i][1] = intervals.pop(i + 1)[1]
+
+        return start
+
+    def _transfer(self, route: list, size: int, cycle: int) -> int:
+        """This method sends a message through a route.
+
+        Params
+        --------------------------------------------------------------
+            route: list.
+                Links to be used.
+            size: int.
+                Message size in bytes.
+            cycle: int.
+                Cycle when the message is sent.
+
+        Returns
+        --------------------------------------------------------------
+            The cycle when the message arrives.
+        """
+        occupancy = ceil(size / self.__bandwidth)
+
+        self.__stats['messages'] += 1
+        self.__stats['bytes'] += size
+        self.__stats['hops'] += len(route)
+        self.__stats['byte_hops'] += size * len(route)
+
+        for name in route:
+            link = self.__get_link(name)
+            start = self.__reserve(name, cycle, occupancy)
+
+            link['free'] = max(link['free'], start + occupancy)
+            link['messages'] += 1
+            link['busy'] += occupancy
+            link['contention'] += start - cycle
+            self.__stats['contention_cycles'] += start - cycle
+
+            if self.__timeline is not None:
+                self.__timeline.hold(name, start, start + occupancy, size)
+
+            cycle = start + self.__latency + occupancy - 1
+
+        return cycle
+
+    def broadcast(self, src: int, size: int, cycle: int) -> int:
+        """This method sends a message to all the processors.
+
+        Params
+        --------------------------------------------------------------
+            src: int.
+                Source node.
+            size: int.
+                Message size in bytes.
+            cycle: int.
+                Cycle when the message is sent.
+
+        Returns
+        --------------------------------------------------------------
+            The cycle when the message has arrived everywhere.
+        """
+        return self.multicast(src, [dst for dst in
+                                    range(self._nodes - self._memories)
+                                    if dst != src], size, cycle)
+
+    def get_flows(self) -> dict:
+        """This method returns the traffic delivered between each pair
+        of nodes.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the messages and bytes of each source
+            and destination.
+        """
+        return {pair: { 'messages': flow[0], 'bytes': flow[1] }
+                for pair, flow in self.__flows.items()}
+
+    def get_hops(self, src: int, dst: int) -> int:
+        """This method returns the number of links between two nodes.
+
+        Params
+        --------------------------------------------------------------
+            src: int.
+                Source node.
+            dst: int.
+                Destination node.
+
+        Returns
+        --------------------------------------------------------------
+            The hop count.
+        """
+        return len(self._route(src, dst))
+
+    def get_links(self) -> dict:
+        """This method returns the counters of each link used.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the cycle when each link is free, its
+            messages, busy cycles and contention cycles.
+        """
+        return {link: dict(counters) for link, counters
+                in self.__links.items()}
+
+    def get_statistics(self) -> dict:
+        """This method returns the traffic counters.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the total counters and the use of the
+            busiest link.
+        """
+        stats = dict(self.__stats, topology=self.get_topology(),
+                     links=len(self.__links))
+        busiest = max(self.__links.values(), key=lambda link: link['busy'],
+                      default={ 'busy': 0, 'contention': 0 })
+        stats['max_link_busy_cycles'] = busiest['busy']
+        stats['max_link_contention_cycles'] = busiest['contention']
+
+        return stats
+
+    def get_traffic(self) -> tuple:
+        """This method returns the traffic sent so far, without the
+        cost of computing the link counters.
+
+        Returns
+        --------------------------------------------------------------
+            A tuple with the number of messages, bytes and bytes
+            multiplied by the links that they crossed.
+        """
+        return self.__stats['messages'], self.__stats['bytes'], \
+            self.__stats['byte_hops']
+
+    def get_topology(self) -> str:
+        """This method returns the topology name.
+
+        Returns
+        --------------------------------------------------------------
+            The topology name.
+        """
+        return type(self).__name__.lower()
+
+    def multicast(self, src: int, targets: list, size: int,
+                  cycle: int) -> int:
+        """This method sends a message to some processors.
+
+        Params
+        --------------------------------------------------------------
+            src: int.
+                Source node.
+            targets: list.
+                Destination nodes.
+            size: int.
+                Message size in bytes.
+            cycle: int.
+                Cycle when the message is sent.
+
+        Returns
+        --------------------------------------------------------------
+            The cycle when the message has arrived everywhere.
+        """
+        return max([self.send(src, dst, size, cycle) for dst in targets] +
+                   [cycle])
+
+    def release(self, cycle: int) -> None:
+        """This method indicates that no message will be sent before
+        a cycle, so the links forget the cycles reserved before it.
+
+        Params
+        --------------------------------------------------------------
+            cycle: int.
+                Current cycle.
+        """
+        self.__horizon = cycle
+
+    def set_timeline(self, timeline) -> None:
+        """This method sets the timeline where the cycles that each
+        link is held are written.
+
+        Params
+        --------------------------------------------------------------
+            timeline: Timeline.
+                Timeline, or None to stop writing.
+        """
+        self.__timeline = timeline
+
+    def send(self, src: int, dst: int, size: int, cycle: int) -> int:
+        """This method sends a message between two nodes.
+
+        Params
+        --------------------------------------------------------------
+            src: int.
+                Source node.
+            dst: int.
+                Destination node.
+            size: int.
+                Message size in bytes.
+            cycle: int.
+                Cycle when the message is sent.
+
+        Returns
+        --------------------------------------------------------------
+            The cycle when the message arrives.
+        """
+        if src == dst:
+            return cycle
+
+        self._deliver(src, (dst,), size)
+
+        return self._transfer(self._route(src, dst), size, cycle)
+
+
+class Bus(Interconnect):
+    """This class models a shared bus, every message uses it and it
+    reaches all nodes at once.
+    """
+    def _route(self, src: int, dst: int) -> list:
+        """This method returns the links used to send a message.
+        """
+        return ['bus']
+
+    def broadcast(self, src: int, size: int, cycle: int) -> int:
+        """This method sends a message to all the processors in a
+        single transfer.
+        """
+        self._deliver(src, (dst for dst in range(self._nodes -
+                                                 self._memories)
+                            if dst != src), size)
+
+        return self._transfer(['bus'], size, cycle)
+
+    def multicast(self, src: int, targets: list, size: int,
+                  cycle: int) -> int:
+        """This method sends a message to some processors. Every node
+        sees it anyway, so it is a single transfer.
+        """
+        self._deliver(src, targets, size)
+
+        return self._transfer(['bus'], size, cycle)
+
+
+class Crossbar(Interconnect):
+    """This class models a crossbar, messages only compete for the
+    output port of their destination.
+    """
+    def _route(self, src: int, dst: int) -> list:
+        """This method returns the links used to send a message.
+        """
+        return [dst]
+
+
+class Ring(Interconnect):
+    """This class models a bidirectional ring, messages take the
+    shortest direction.
+    """
+    def _route(self, src: int, dst: int) -> list:
+        """This method returns the links used to send a message.
+        """
+        forward = (dst - src) % self._nodes
+        step = 1 if forward <= self._nodes - forward else -1
+        route = []
+
+        while src != dst:
+            route.append((src, step))
+            src = (src + step) % self._nodes
+
+        return route
+
+    def broadcast(self, src: int, size: int, cycle: int) -> int:
+        """This method sends a message to all the processors. It goes
+        around the ring in both directions and each node forwards it.
+        """
+        self._deliver(src, (dst for dst in range(self._nodes -
+                                                 self._memories)
+                            if dst != src), size)
+        half = (self._nodes - 1) // 2
+        right = [((src + i) % self._nodes, 1)
+                 for i in range(self._nodes - 1 - half)]
+        left = [((src - i) % self._nodes, -1) for i in range(half)]
+
+        return max(self._transfer(right, size, cycle),
+                   self._transfer(left, size, cycle) if left else cycle)
+
+
+class Mesh(Interconnect):
+    """This class models a 2D mesh with XY routing. Nodes are placed
+    by rows in the smallest square grid that fits them.
+    """
+    def __init__(self, nodes: int, latency: int = 1,
+                 bandwidth: int = 8, memories: int = 1) -> None:
+        """Constructor.
+        """
+        super(Mesh, self).__init__(nodes, latency, bandwidth, memories)
+        self.__width: int = ceil(sqrt(nodes))
+
+    def _route(self, src: int, dst: int) -> list:
+        """This method returns the links used to send a message.
+        """
+        x, y = src % self.__width, src // self.__width
+        dst_x, dst_y = dst % self.__width, dst // self.__width
+        route = []
+
+        # First along X, then along Y
+        while x != dst_x:
+            step = 1 if dst_x > x else -1
+            route.append(((x, y), (x + step, y)))
+            x += step
+
+        while y != dst_y:
+            step = 1 if dst_y > y else -1
+            route.append(((x, y), (x, y + step)))
+            y += step
+
+        return route
+
+
+# Available topologies
+TOPOLOGIES: dict = { 'bus': Bus, 'crossbar': Crossbar, 'ring': Ring,
+                     'mesh': Mesh }
+
+
+def create_interconnect(topology: str, nodes: int, latency: int = 1,
+                        bandwidth: int = 8,
+                        memories: int = 1) -> Interconnect:
+    """This function creates an interconnect.
+
+    Params
+    ------------------------------------------------------------------
+        topology: str.
+            Topology name, 'bus', 'crossbar', 'ring' or 'mesh'.
+        nodes: int.
+            Number of nodes, the processors and the memory
+            controllers.
+        latency: int.
+            Cycles needed to cross a link.
+        bandwidth: int.
+            Bytes sent by a link each cycle.
+        memories: int.
+            Number of memory controllers, the last nodes.
+
+    Returns
+    ------------------------------------------------------------------
+        The new interconnect.
+    """
+    if topology not in TOPOLOGIES:
+        raise ValueError(f'Unknown topology {topology}!')
+
+    return TOPOLOGIES[topology](nodes, latency, bandwidth, memories)
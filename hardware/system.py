@@ -1,34 +1,193 @@
-from random import shuffle
+from random import randint
 from threading import Thread
 from time import sleep
 
-from hardware.cpu.processor import Processor
+from hardware import kernel
+from hardware.control.checker import InvariantChecker, written_value
+from hardware.control.controller import FSMController
+from hardware.control.directory import Directory
+from hardware.control.filter import create_filter
+from hardware.cpu.processor import ATOMICS, OPERATIONS, Processor
+from hardware.memory.numa import AddressMap
+from hardware.memory.prefetcher import MODES, create_prefetcher
 from hardware.memory.ram import RAM
+from hardware.network.interconnect import CONTROL_SIZE, DATA_SIZE
+from hardware.network.interconnect import Bus, Interconnect
+from utils.formats import addr2string, instr2string
+
+
+# Counters kept for each processor
+STATISTICS: tuple = ('instructions',) + kernel.COUNTERS + \
+    ('miss_cycles', 'mshr_merges', 'mshr_stalls', 'window_stalls',
+     'prefetches', 'prefetch_hits', 'prefetch_late', 'prefetch_invalidated',
+     'atomics', 'sc_failures', 'cache_accesses', 'snoops', 'directory_lookups',
+     'cache_transfers', 'memory_reads', 'memory_writes', 'messages', 'bytes',
+     'byte_hops', 'filter_lookups', 'snoops_filtered', 'snoop_false_positives')
+# Counters kept for each lock of a synchronization workload
+LOCK_STATISTICS: tuple = ('acquisitions', 'wait_cycles', 'handoffs',
+                          'handoff_cycles', 'messages', 'bytes')
 
 
 class System:
     """This class represents a multicore system.
     """
-    def __init__(self, size: int, frequency: float = 1) -> None:
+    def __init__(self, size: int, frequency: float = 1,
+                 verbose: bool = True, protocol: str = 'MOESI',
+                 cache_size: int = 4, associativity: int = 2,
+                 mem_size: int = 16, workloads: list = None,
+                 interconnect: Interconnect = None,
+                 directory: bool = False, window: int = 0,
+                 mshrs: int = 1, prefetcher: str = None, degree: int = 1,
+                 prefetch_mode: str = 'shared', check: bool = False,
+                 timeline=None, numa: AddressMap = None,
+                 snoop_filter: str = None, cluster: int = 1,
+                 entries: int = 8, hashes: int = 2,
+                 specs: list = None, events: list = None) -> None:
         """Constructor.
 
         Params
         --------------------------------------------------------------
             size: tuple.
                 System size.
+            frequency: float.
+                System clock frequency.
+            verbose: bool.
+                Indicates if the bus activity is printed.
+            protocol: str.
+                Coherence protocol. MOESI by default.
+            cache_size: int.
+                Number of blocks of each L1 cache.
+            associativity: int.
+                Associativity of each L1 cache.
+            mem_size: int.
+                Shared memory size.
+            workloads: list.
+                Instructions to be executed by each processor. They
+                are generated randomly by default.
+            interconnect: Interconnect.
+                Network between the processors and the memory
+                controllers, which are its last nodes. A shared bus by
+                default.
+            directory: bool.
+                Indicates if a directory in the memory node is used
+                instead of snooping all the caches.
+            window: int.
+                Instruction window of out-of-order cores. Cores block
+                on each instruction if it is 0.
+            mshrs: int.
+                Outstanding misses allowed by each L1 cache.
+            prefetcher: str.
+                Prefetcher of each L1 cache, 'next-line', 'stride' or
+                'stream'. Caches do not prefetch by default.
+            degree: int.
+                Number of blocks prefetched each time.
+            prefetch_mode: str.
+                Coherence permission requested by the prefetches,
+                'shared', 'exclusive' or 'adaptive' (exclusive when a
+                write triggers them).
+            check: bool.
+                Indicates if the coherence invariants are checked
+                after each transition.
+            timeline: Timeline.
+                Sink where the activity is written, e.g. a Timeline,
+                if it is given.
+            numa: AddressMap.
+                Memory node of each block. A single node by default.
+            snoop_filter: str.
+                Snoop filter of each cluster of caches, 'inclusive' or
+                'bloom'. Only used by snooping, every cache is snooped
+                by default.
+            cluster: int.
+                Caches that share a snoop filter.
+            entries: int.
+                Number of counters of a Bloom filter.
+            hashes: int.
+                Number of hash functions of a Bloom filter.
+            specs: list.
+                Specification of each processor, a dictionary that
+                may override its 'class', 'cache_size',
+                'associativity', 'window', 'mshrs', 'latency' and
+                'clock_ratio'. The system cycle is the common time
+                base and each core only runs every clock ratio
+                cycles. Every processor uses the arguments above by
+                default.
+            events: list.
+                Listeners of the memory accesses, e.g. an EventLog or
+                a SharingAnalyzer.
         """
-        self.__default_time: float = 0.5
+        if prefetch_mode not in MODES:
+            raise ValueError(f'Unknown prefetch mode {prefetch_mode}!')
+
+        if snoop_filter is not None and directory:
+            raise ValueError('Snoop filters are only used by snooping!')
+
+        workloads = workloads or [None] * size
+        specs = [dict({ 'class': 'core', 'cache_size': cache_size,
+                        'associativity': associativity, 'window': window,
+                        'mshrs': mshrs, 'latency': None,
+                        'clock_ratio': 1 }, **spec)
+                 for spec in specs or [{}] * size]
+
+        if len(specs) != size:
+            raise ValueError('A specification is required for each '
+                             'processor!')
+
         self.__frequency: float = frequency
+        self.__verbose: bool = verbose
         self.__size: int = size
-        self.__cpus: list = [Processor(i + 1) for i in range(self.__size)]
-        self.__memory: RAM = RAM.get_instance(16)
-        self.__memory.clear()
+        self.__controller: FSMController = FSMController(protocol)
+        self.__cpus: list = [Processor(i + 1, spec['cache_size'],
+                                       spec['associativity'], mem_size,
+                                       workloads[i], spec['window'],
+                                       spec['mshrs'], spec['latency'],
+                                       spec['clock_ratio'], spec['class'])
+                             for i, spec in enumerate(specs)]
+
+        if prefetcher is not None:
+            for cpu in self.__cpus:
+                cpu.get_cache_l1().set_prefetcher(
+                    create_prefetcher(prefetcher, degree, mem_size))
+
+        self.__prefetch_mode: str = prefetch_mode
+        self.__memory: RAM = RAM.get_instance(mem_size)
+        self.__memory.clear(mem_size)
         self.__running: bool = False
         self.__instructions: list = [{}] * self.__size
         self.__old_instructions: list = [{}] * self.__size
+        self.__numa: AddressMap = numa or AddressMap(size)
+        self.__network: Interconnect = interconnect or \
+            Bus(size + self.__numa.get_nodes(),
+                memories=self.__numa.get_nodes())
+        self.__directory: Directory = Directory() if directory else None
+        self.__timeline = timeline
+        self.__events: list = events or []
+        self.__cluster: int = cluster
+        self.__filters: list = [] if snoop_filter is None else \
+            [create_filter(snoop_filter, entries, hashes)
+             for _ in range(0, size, cluster)]
+        # Caches snooped by the last miss
+        self.__targets: list = []
+
+        if timeline is not None:
+            self.__network.set_timeline(timeline)
+
+        self.__checker: InvariantChecker = InvariantChecker(self.__cpus,
+            self.__memory, self.__directory) if check else None
+        # Current cycle and cycles until each processor is free
+        self.__cycle: int = 0
+        self.__busy: list = [0] * self.__size
+        # First processor sending a request in the next cycle
+        self.__priority: int = 0
+        self.__stats: list = [dict.fromkeys(STATISTICS, 0)
+                              for _ in range(self.__size)]
+        # Counters of each lock, cycle when each processor started to
+        # acquire it and cycle when it was released for the last time
+        self.__locks: dict = {}
+        self.__waiting: dict = {}
+        self.__released: dict = {}
 
     def __change_state_miss(self, _id: int, state: str, action: str,
-                            address: str) -> None:
+                            address: str) -> tuple:
         """This method changes to the next state for a cache block.
 
         Params
@@ -38,163 +197,909 @@ class System:
             state: str.
                 Current cache block state.
             action: str.
-                Action to be executed.
+                Action to be executed. OWN reads the block for
+                ownership, invalidating the other copies.
             address: str.
                 Memory address.
 
         Returns
         --------------------------------------------------------------
-            The new state for the cache block.
+            The new state for the cache block, the data supplied by
+            its owner (None if there is not an owner), the processors
+            that had a valid copy and the owner that supplied the data
+            (None if there is not).
         """
         new_state = state
+        data = None
+        holders = []
+        owner = None
 
         if state == 'I':
             if action == 'READ':
-                found = False
-
                 # Search in each cache
-                for cpu in self.__cpus:
-                    if cpu.get_id() != _id:
-                        for block in cpu.get_cache_mem():
-                            # Check if the block is valid and the
-                            # address is the same
-                            if block['address'] == address and \
-                                block['state'] != 'I':
-                                # If the cache block is Exclusive
-                                # it must change to Shared
-                                if block['state'] == 'E':
-                                    block['state'] = 'S'
-                                # If the cache block is Modified
-                                # it must change to Owned
-                                elif block['state'] == 'M':
-                                    block['state'] = 'O'
-
-                                found = True
+                for i in self.__snoop(_id, address):
+                    block = self.__cpus[i].read_cache(address)
+
+                    # Check if the block is valid
+                    if block and block['state'] != 'I':
+                        new = self.__controller.change_state(
+                            block['state'], 'BUS READ')
+
+                        # The owner supplies the data and updates
+                        # the memory if it is dirty and it stops
+                        # owning it
+                        if block['state'] in FSMController.SUPPLIERS:
+                            owner = i
+                            data = block['data']
+
+                        if block['state'] in ('M', 'O') and \
+                            new not in ('M', 'O'):
+                            self.__write_memory(_id, address, block['data'])
+
+                        block['state'] = new
+                        holders.append(i)
 
                 # If a cache block was found, the new state must be
-                # Shared, otherwise Exclusive
-                new_state = 'S' if found else 'E'
+                # Shared, otherwise it depends on the protocol
+                new_state = self.__controller.change_state('I', 'READ',
+                                                           bool(holders))
             else:
                 # Search in each cache
-                for cpu in self.__cpus:
-                    if cpu.get_id() != _id:
-                        for block in cpu.get_cache_mem():
-                            # Check if the address is the same
-                            if block['address'] == address:
-                                # Then invalid the block
-                                block['state'] = 'I'
+                for i in self.__snoop(_id, address):
+                    block = self.__cpus[i].read_cache(address)
+
+                    # Check if the address is the same
+                    if block:
+                        self.__cpus[i].clear_link(address)
+
+                        if block['state'] != 'I':
+                            self.__stats[_id]['invalidations'] += 1
+                            self.__update_filter(i, address, False)
+                            holders.append(i)
+
+                            # The owner supplies the data of a read for
+                            # ownership and updates the memory if it is
+                            # dirty
+                            if action == 'OWN' and \
+                                block['state'] in FSMController.SUPPLIERS:
+                                owner = i
+                                data = block['data']
+
+                                if block['state'] in ('M', 'O'):
+                                    self.__write_memory(_id, address, data)
+
+                            # A prefetched block was useless
+                            if self.__discard_prefetch(i, address):
+                                self.__stats[i]['prefetch_invalidated'] += 1
+
+                        # Then invalid the block
+                        block['state'] = self.__controller.change_state(
+                            block['state'], 'BUS WRITE')
+
+                        if self.__directory is not None:
+                            self.__directory.remove(address, i)
+
+                new_state = self.__controller.change_state('I', 'WRITE')
+
+                if holders and self.__timeline is not None:
+                    self.__timeline.invalidation(_id + 1, address,
+                                                 self.__cycle,
+                                                 [i + 1 for i in holders])
+
+        return new_state, data, holders, owner
+
+    def __discard_prefetch(self, _id: int, address: str) -> bool:
+        """This method forgets a block prefetched by a processor.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            address: str.
+                Memory address.
+
+        Returns
+        --------------------------------------------------------------
+            True if the block was prefetched and not used yet, False
+            otherwise.
+        """
+        prefetcher = self.__cpus[_id].get_cache_l1().get_prefetcher()
+
+        return prefetcher is not None and prefetcher.discard(address)
+
+    def __evict(self, _id: int, evicted: dict) -> None:
+        """This method handles a block replaced in a cache. Dirty
+        blocks are written back to the memory.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            evicted: dict.
+                Evicted cache block, empty if there is not.
+        """
+        if not evicted or evicted['state'] == 'I':
+            return
+
+        if evicted['state'] in ('M', 'O'):
+            self.__stats[_id]['writebacks'] += 1
+            self.__network.send(_id, self.__size + self.__numa.get_node(
+                _id, evicted['address']), DATA_SIZE, self.__cycle)
+            self.__write_memory(_id, evicted['address'], evicted['data'])
+
+        self.__discard_prefetch(_id, evicted['address'])
+        self.__cpus[_id].clear_link(evicted['address'])
+        self.__update_filter(_id, evicted['address'], False)
+
+        # Keep the directory updated
+        if self.__directory is not None:
+            self.__directory.remove(evicted['address'], _id)
+
+    def __snoop(self, _id: int, address: str) -> list:
+        """This method returns the processors whose caches must be
+        checked on a miss. The directory knows them, otherwise every
+        other cache is snooped unless the filter of its cluster knows
+        that it does not have the block.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            address: str.
+                Memory address.
+
+        Returns
+        --------------------------------------------------------------
+            A list with the processor indexes.
+        """
+        stats = self.__stats[_id]
+
+        if self.__directory is not None:
+            stats['directory_lookups'] += 1
+            snooped = sorted(self.__directory.get_sharers(address) - {_id})
+        elif self.__filters:
+            snooped = []
+
+            for first, snoop_filter in zip(range(0, self.__size,
+                                                 self.__cluster),
+                                           self.__filters):
+                cores = [i for i in range(first, min(first + self.__cluster,
+                                                     self.__size))
+                         if i != _id]
+
+                if not cores:
+                    continue
+
+                stats['filter_lookups'] += 1
+
+                if not snoop_filter.query(address):
+                    stats['snoops_filtered'] += len(cores)
+                    continue
+
+                # Snoops to caches without a valid copy were not needed
+                stats['snoop_false_positives'] += sum(
+                    self.__cpus[i].read_cache(address).get('state', 'I') ==
+                    'I' for i in cores)
+                snooped.extend(cores)
+        else:
+            snooped = [i for i in range(self.__size) if i != _id]
+
+        stats['snoops'] += len(snooped)
+        self.__targets = snooped
+
+        return snooped
+
+    def __supply_latency(self, owner: int) -> int:
+        """This method returns the cycles needed by a cache to supply
+        a block to another processor.
+
+        Params
+        --------------------------------------------------------------
+            owner: int.
+                Processor that supplies the data.
+
+        Returns
+        --------------------------------------------------------------
+            Number of cycles.
+        """
+        return self.__cpus[owner].get_latency()['cache']
+
+    def __transaction(self, _id: int, action: str, address: str,
+                      holders: list, owner: int, supplied: bool) -> int:
+        """This method sends the messages of a miss through the
+        interconnect. The memory controller of the block is its home.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            action: str.
+                Action executed, READ or WRITE. OWN reads a block
+                invalidating the other copies and UPGRADE only
+                invalidates them.
+            address: str.
+                Memory address.
+            holders: list.
+                Processors that had a valid copy.
+            owner: int.
+                Processor that supplies the data, or None.
+            supplied: bool.
+                Indicates if the owner supplies the data.
+
+        Returns
+        --------------------------------------------------------------
+            The cycle when the miss is completed.
+        """
+        net = self.__network
+        node = self.__numa.request(_id, address)
+        home = self.__size + node
+        memory = self.__numa.get_latency(
+            _id, node, self.__cpus[_id].get_latency()['memory'])
+        cycle = self.__cycle
+
+        if supplied and action in ('READ', 'OWN'):
+            self.__stats[_id]['cache_transfers'] += 1
+
+        if self.__directory is None:
+            # The request is snooped by every cache, or by the ones
+            # that their filters let through
+            if self.__filters:
+                cycle = net.multicast(_id, self.__targets, CONTROL_SIZE,
+                                      cycle)
+            else:
+                cycle = net.broadcast(_id, CONTROL_SIZE, cycle)
+
+            if action in ('READ', 'OWN'):
+                # The owner answers instead of the memory
+                if supplied:
+                    return net.send(owner, _id, DATA_SIZE,
+                                    cycle + self.__supply_latency(owner))
+
+                return net.send(home, _id, DATA_SIZE, cycle + memory)
+
+            # The data is written in memory in background
+            if action == 'WRITE':
+                net.send(_id, home, DATA_SIZE, cycle)
+
+            return cycle
+
+        # The request goes to the directory
+        size = DATA_SIZE if action == 'WRITE' else CONTROL_SIZE
+        cycle = net.send(_id, home, size, cycle)
+
+        if action in ('READ', 'OWN'):
+            # The owner is asked to forward the data
+            if supplied:
+                forward = net.send(home, owner, CONTROL_SIZE, cycle)
+                data = net.send(owner, _id, DATA_SIZE,
+                                forward + self.__supply_latency(owner))
+            else:
+                data = net.send(home, _id, DATA_SIZE, cycle + memory)
+
+            if action == 'READ':
+                return data
+
+        # Every sharer is invalidated and acknowledges the requester
+        acks = [net.send(i, _id, CONTROL_SIZE,
+                         net.send(home, i, CONTROL_SIZE, cycle))
+                for i in holders]
+
+        # The data of an exclusive read also grants the ownership
+        if action == 'OWN':
+            return max(acks + [data])
+
+        return max(acks + [net.send(home, _id, CONTROL_SIZE, cycle)])
+
+    def __read_memory(self, _id: int, address: str) -> str:
+        """This method reads a block from the memory on behalf of a
+        processor.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            address: str.
+                Memory address.
+
+        Returns
+        --------------------------------------------------------------
+            The data of the block.
+        """
+        self.__stats[_id]['memory_reads'] += 1
+        self.__numa.access(_id, address, False, DATA_SIZE)
+
+        return self.__memory.read(address)
+
+    def __update_filter(self, _id: int, address: str, add: bool) -> None:
+        """This method updates the snoop filter of a processor when a
+        block becomes valid or invalid in its cache.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            address: str.
+                Memory address.
+            add: bool.
+                Indicates if the block was filled or removed.
+        """
+        if not self.__filters:
+            return
+
+        snoop_filter = self.__filters[_id // self.__cluster]
+
+        if add:
+            snoop_filter.add(address)
+        else:
+            snoop_filter.remove(address)
+
+    def __write_memory(self, _id: int, address: str, data: str) -> None:
+        """This method writes a block in the memory on behalf of a
+        processor.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            address: str.
+                Memory address.
+            data: str.
+                Data to be written.
+        """
+        self.__stats[_id]['memory_writes'] += 1
+        self.__numa.access(_id, address, True, DATA_SIZE)
+        self.__memory.write(address, data)
+
+    def __miss(self, _id: int) -> int:
+        """This method serves a cache miss through the interconnect.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+
+        Returns
+        --------------------------------------------------------------
+            The cycle when the miss is completed.
+        """
+        # Get current instruction
+        instr = self.__instructions[_id]
+        stats = self.__stats[_id]
+        cpu: Processor = self.__cpus[_id]
+        reads = instr['type'] in ('READ', 'LL')
+        traffic = self.__traffic()
+        # The lookup and the fill
+        stats['cache_accesses'] += 2
+
+        state = cpu.read_cache(instr['address']).get('state', 'I')
+
+        # Shared copies that are written are upgraded
+        if state in ('S', 'O', 'F') and not reads:
+            stats['upgrades'] += 1
+        else:
+            stats['read_misses' if reads else 'write_misses'] += 1
+
+        if reads:
+            # Get the new state
+            s, owned, holders, owner = self.__change_state_miss(_id, 'I',
+                                                'READ', instr['address'])
+
+            # Read the data from the memory if no cache supplied it
+            if owned is None:
+                self.__log(f'P{_id} is reading memory')
+                self.__cpus[_id].set_state('READING MEMORY')
+                stats['memory_fills'] += 1
+                owned = self.__read_memory(_id, instr['address'])
+                supplied = False
+            else:
+                self.__log(f'P{_id} is reading from P{owner}')
+                self.__cpus[_id].set_state(f'READING FROM P{owner}')
+                stats['cache_fills'] += 1
+                supplied = True
+
+            # Write the date in cache
+            evicted = self.__cpus[_id].write(instr['address'], owned, s)
+            cpu.modify(owned)
+        elif instr['type'] in ATOMICS:
+            self.__log(f'P{_id} is reading {instr["address"]} for ownership')
+            self.__cpus[_id].set_state('READING FOR OWNERSHIP')
+            block = cpu.read_cache(instr['address'])
+            _, owned, holders, owner = self.__change_state_miss(_id, 'I',
+                                                'OWN', instr['address'])
+
+            # A valid copy is only upgraded, otherwise the data comes
+            # from its owner or the memory
+            if state != 'I':
+                owned, owner, supplied = block['data'], None, False
+                action = 'UPGRADE'
+            else:
+                supplied = owned is not None
+                action = 'OWN'
+
+                if not supplied:
+                    owned = self.__read_memory(_id, instr['address'])
+
+            data = cpu.modify(owned)
+
+            # A failed compare and swap keeps an exclusive copy, which
+            # stays dirty if it was owned
+            if data is None:
+                s = 'M' if state == 'O' else \
+                    self.__controller.get_exclusive_state()
+                data = owned
+            else:
+                s = 'M'
+
+            evicted = cpu.write(instr['address'], data, s)
+        else:
+            self.__log(f'P{_id} is writing in memory')
+            self.__cpus[_id].set_state('WRITING IN MEMORY')
+
+            # Write the date in memory
+            self.__write_memory(_id, instr['address'], instr['data'])
+            # Get the new state
+            s, _, holders, owner = self.__change_state_miss(_id, 'I',
+                                                'WRITE', instr['address'])
+            supplied = False
+            # Write the date in cache
+            evicted = self.__cpus[_id].write(instr['address'],
+                                             instr['data'], s)
+
+        self.__evict(_id, evicted)
+
+        if self.__directory is not None:
+            self.__directory.add(instr['address'], _id)
+
+        # Only blocks that were not valid are new for the filter
+        if state == 'I':
+            self.__update_filter(_id, instr['address'], True)
+
+        done = self.__transaction(_id, action if instr['type'] in ATOMICS
+                                  else 'READ' if reads else 'WRITE',
+                                  instr['address'], holders, owner, supplied)
+        stats['miss_cycles'] += done - self.__cycle
+        self.__count_traffic(_id, traffic)
+
+        return done
+
+    def __prefetch(self, _id: int, address: str, write: bool) -> None:
+        """This method brings a block to a cache before it is used.
+        The block is requested as a shared copy, or as an exclusive
+        one invalidating the other copies, and it uses a free MSHR
+        until it arrives.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            address: str.
+                Memory address.
+            write: bool.
+                Indicates if a write triggered the prefetch.
+        """
+        cpu: Processor = self.__cpus[_id]
+        cache = cpu.get_cache_l1()
+
+        # Prefetches are dropped instead of waiting for a MSHR
+        if cache.is_in_cache(address) or \
+            cache.get_pending(address, self.__cycle) is not None or \
+            not cache.has_free_mshr(self.__cycle):
+            return
+
+        self.__log(f'P{_id} is prefetching {address}')
+        traffic = self.__traffic()
+        action = 'OWN' if self.__prefetch_mode == 'exclusive' or \
+            (self.__prefetch_mode == 'adaptive' and write) else 'READ'
+        s, owned, holders, owner = self.__change_state_miss(_id, 'I', action,
+                                                            address)
+        supplied = owned is not None
+
+        if action == 'OWN':
+            s = self.__controller.get_exclusive_state()
+
+        if not supplied:
+            owned = self.__read_memory(_id, address)
+
+        done = self.__transaction(_id, action, address, holders, owner,
+                                  supplied)
+        self.__evict(_id, cpu.write(address, owned, s))
+
+        if self.__directory is not None:
+            self.__directory.add(address, _id)
+
+        self.__update_filter(_id, address, True)
+        cache.allocate_mshr(address, done)
+        cache.get_prefetcher().add(address)
+
+        if self.__checker is not None:
+            self.__checker.check(address, self.__cycle)
+        self.__stats[_id]['prefetches'] += 1
+        self.__stats[_id]['cache_accesses'] += 1
+        self.__count_traffic(_id, traffic)
+
+    def __train(self, _id: int, miss: bool) -> None:
+        """This method trains the prefetcher of a processor with its
+        current instruction and issues the prefetches it predicts.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            miss: bool.
+                Indicates if the instruction missed.
+        """
+        instr = self.__instructions[_id]
+        cache = self.__cpus[_id].get_cache_l1()
+        prefetcher = cache.get_prefetcher()
+
+        if prefetcher is None or instr['type'] == 'CALC':
+            return
+
+        # The block was prefetched, maybe it is still arriving
+        if self.__discard_prefetch(_id, instr['address']):
+            self.__stats[_id]['prefetch_hits'] += 1
+
+            if cache.get_pending(instr['address'], self.__cycle) is not None:
+                self.__stats[_id]['prefetch_late'] += 1
+
+        mem_size = self.__memory.get_size()
+
+        for address in prefetcher.observe(int(instr['address'], 2),
+                                          instr.get('pc'), miss):
+            self.__prefetch(_id, addr2string(address, mem_size),
+                            instr['type'] not in ('READ', 'LL'))
+
+    def __sync(self, _id: int, done: int, traffic: tuple) -> None:
+        """This method updates the counters of the lock accessed by
+        the current instruction. Workloads tag the instructions of a
+        lock with its name, the first one of an acquisition with the
+        'request' event and the ones that may acquire or release it
+        with the 'acquire' and 'release' events, which happen if the
+        instruction returns the 'expect' value when it is given.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            done: int.
+                Cycle when the instruction is completed.
+            traffic: tuple.
+                Messages and bytes sent before the instruction.
+        """
+        instr = self.__instructions[_id]
+        name = instr['lock']
+        stats = self.__locks.setdefault(name,
+                                        dict.fromkeys(LOCK_STATISTICS, 0))
+        network = self.__traffic()
+        event = instr.get('event')
+        key = (name, _id)
+
+        stats['messages'] += network[0] - traffic[0]
+        stats['bytes'] += network[1] - traffic[1]
+
+        if 'expect' in instr and \
+            self.__cpus[_id].get_result() != instr['expect']:
+            return
+
+        if event == 'request':
+            self.__waiting[key] = self.__cycle
+        # The last processor arriving at a barrier releases it without
+        # waiting
+        elif event == 'acquire' or \
+            (event == 'release' and key in self.__waiting):
+            start = self.__waiting.pop(key)
+            released = self.__released.get(name)
+            stats['acquisitions'] += 1
+            stats['wait_cycles'] += done - start
+
+            # The lock was handed off while the processor was waiting
+            if released is not None and released >= start:
+                stats['handoffs'] += 1
+                stats['handoff_cycles'] += done - released
+
+        if event == 'release':
+            self.__released[name] = done
+
+    def __tick(self, _id: int) -> None:
+        """This method runs a cycle of a single processor.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+        """
+        cpu: Processor = self.__cpus[_id]
+
+        # The processor is still busy with the last instruction, or
+        # its clock has no edge in this cycle
+        if self.__busy[_id] > self.__cycle or cpu.is_finished() or \
+            self.__cycle % cpu.get_clock_ratio():
+            return
+
+        # The window of an out-of-order core is full
+        if cpu.is_out_of_order() and not cpu.is_executing() and \
+            not cpu.can_issue(self.__cycle):
+            self.__stats[_id]['window_stalls'] += 1
+            return
+
+        # Check if there's not instruction
+        if not cpu.is_executing():
+            # Set old instruction
+            self.__old_instructions[_id] = self.__instructions[_id]
+
+            # Get a new instruction
+            self.__instructions[_id] = cpu.generate_instruction()
+
+            # Check if the workload has finished
+            if cpu.is_finished():
+                return
+
+            self.__stats[_id]['instructions'] += 1
+
+        # Execute a new instruction
+        cpu.excute()
+
+        if cpu.is_out_of_order():
+            self.__issue(_id)
+            return
 
-                new_state = 'M'
+        # Wait until the instruction is completed
+        done = self.__cycle
+        instr = self.__instructions[_id]
+        traffic = self.__traffic() if 'lock' in instr else None
+        invalidations = self.__stats[_id]['invalidations']
 
-        return new_state
+        miss = cpu.is_executing() and 'MISS' in cpu.get_state()
 
-    def __control_processor(self, _id: int, wait: bool) -> None:
-        """This method is used to control a single processor.
+        # Check if found the memory address
+        if miss:
+            # The next request starts after this processor
+            self.__log(f'P{_id} is using the interconnect')
+            self.__priority = (_id + 1) % self.__size
+            done = self.__miss(_id)
+            cpu.finish()
+        elif cpu.get_state() == 'SC FAILED':
+            self.__stats[_id]['sc_failures'] += 1
+        elif instr['type'] != 'CALC':
+            self.__stats[_id]['hits'] += 1
+            self.__stats[_id]['cache_accesses'] += 1
+            # A prefetched block may still be arriving
+            pending = cpu.get_cache_l1().get_pending(instr['address'],
+                                                     self.__cycle)
+            done = done if pending is None else pending
+
+        if instr['type'] in ATOMICS:
+            self.__stats[_id]['atomics'] += 1
+
+        if traffic is not None:
+            self.__sync(_id, done, traffic)
+
+        if self.__checker is not None and instr['type'] != 'CALC':
+            self.__checker.check(instr['address'], self.__cycle,
+                                 written_value(instr, cpu.get_result()))
+
+        self.__notify(_id, miss, invalidations)
+        self.__train(_id, miss)
+        self.__busy[_id] = done + cpu.get_cycles()
+        self.__record(_id, done)
+
+    def __issue(self, _id: int) -> None:
+        """This method issues the current instruction of an
+        out-of-order core without waiting for it. Misses use a free
+        MSHR and accesses to a block with an outstanding miss are
+        merged with it.
 
         Params
         --------------------------------------------------------------
             _id: int.
                 Processor ID.
+        """
+        cpu: Processor = self.__cpus[_id]
+        cache = cpu.get_cache_l1()
+        instr = self.__instructions[_id]
+        done = self.__cycle
+        miss = cpu.is_executing()
+        traffic = self.__traffic() if 'lock' in instr else None
+        invalidations = self.__stats[_id]['invalidations']
+
+        if cpu.get_state() == 'SC FAILED':
+            self.__stats[_id]['sc_failures'] += 1
+        elif instr['type'] != 'CALC':
+            pending = cache.get_pending(instr['address'], self.__cycle)
+
+            if cpu.is_executing():
+                # Wait for a free MSHR or for the miss of the same
+                # block to be completed before a new request
+                if pending is not None or \
+                    not cache.has_free_mshr(self.__cycle):
+                    self.__stats[_id]['mshr_stalls'] += 1
+                    return
+
+                self.__log(f'P{_id} is using the interconnect')
+                self.__priority = (_id + 1) % self.__size
+                done = self.__miss(_id)
+                cache.allocate_mshr(instr['address'], done)
+                cpu.finish()
+            elif pending is not None:
+                # Secondary miss, the block is still arriving
+                self.__stats[_id]['mshr_merges'] += 1
+                self.__stats[_id]['cache_accesses'] += 1
+                done = pending
+            else:
+                self.__stats[_id]['hits'] += 1
+                self.__stats[_id]['cache_accesses'] += 1
+
+        if instr['type'] in ATOMICS:
+            self.__stats[_id]['atomics'] += 1
+
+        if traffic is not None:
+            self.__sync(_id, done, traffic)
+
+        if self.__checker is not None and instr['type'] != 'CALC':
+            self.__checker.check(instr['address'], self.__cycle,
+                                 written_value(instr, cpu.get_result()))
+
+        self.__notify(_id, miss, invalidations)
+        self.__train(_id, miss)
+        cpu.dispatch(done + cpu.get_cycles())
+        self.__record(_id, done)
+
+    def __traffic(self) -> tuple:
+        """This method returns the traffic sent through the
+        interconnect so far.
+
+        Returns
+        --------------------------------------------------------------
+            A tuple with the number of messages, bytes and bytes
+            multiplied by the links crossed.
+        """
+        return self.__network.get_traffic()
+
+    def __count_traffic(self, _id: int, traffic: tuple) -> None:
+        """This method attributes to a processor the traffic sent
+        since a previous snapshot.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            traffic: tuple.
+                Messages, bytes and bytes multiplied by the links
+                crossed before its requests.
+        """
+        stats = self.__stats[_id]
+
+        for name, before, after in zip(('messages', 'bytes', 'byte_hops'),
+                                       traffic, self.__traffic()):
+            stats[name] += after - before
+
+    def __notify(self, _id: int, miss: bool, invalidations: int) -> None:
+        """This method sends the memory access of the current
+        instruction of a processor to the listeners.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            miss: bool.
+                Indicates if it missed.
+            invalidations: int.
+                Invalidations counted by the processor before it.
+        """
+        instr = self.__instructions[_id]
+        cpu: Processor = self.__cpus[_id]
+
+        # Failed store conditionals do not access the cache
+        if not self.__events or instr['type'] == 'CALC' or \
+            cpu.get_state() == 'SC FAILED':
+            return
+
+        invalidations = self.__stats[_id]['invalidations'] - invalidations
+
+        for listener in self.__events:
+            listener.access(self.__cycle, cpu.get_id(),
+                            OPERATIONS[instr['type']], instr['address'],
+                            miss, invalidations)
+
+    def __record(self, _id: int, done: int) -> None:
+        """This method writes the current instruction of a processor
+        in the timeline.
+
+        Params
+        --------------------------------------------------------------
+            _id: int.
+                Processor ID.
+            done: int.
+                Cycle when its memory access is completed.
+        """
+        if self.__timeline is None:
+            return
+
+        cpu: Processor = self.__cpus[_id]
+        name = instr2string(cpu.get_id(), self.__instructions[_id])
+
+        # The access stalls the instruction until the block arrives
+        self.__timeline.instruction(cpu.get_id(), name.split(': ')[1].strip(),
+                                    self.__cycle, done + cpu.get_cycles(),
+                                    done if done > self.__cycle else None)
+
+    def __log(self, msg: str) -> None:
+        """This method prints a message if the system is verbose.
+
+        Params
+        --------------------------------------------------------------
+            msg: str.
+                Message to be printed.
+        """
+        if self.__verbose:
+            print(msg)
+
+    def __clock(self, wait: bool) -> None:
+        """This method is used to control the system clock.
+
+        Params
+        --------------------------------------------------------------
             wait: bool.
                 Indicates if the system has to wait each cycle.
         """
-        data = '0' * 4
-
         while (self.__running):
-            # Check if there's not instruction
-            if not self.__cpus[_id].is_executing():
-                # Set old instruction
-                self.__old_instructions[_id] = self.__instructions[_id]
-
-                # Get a new instruction
-                instruction = self.__cpus[_id].generate_instruction()
-                self.__instructions[_id] = instruction
-
-            # Execute a new instruction
-            self.__cpus[_id].excute()
-
-            # Check if found the memory address
-            if self.__cpus[_id].is_executing():
-                state: str = self.__cpus[_id].get_state()
-
-                if 'MISS' in state:
-                    # Check if the memory bus is busy
-                    if self.__memory.is_busy():
-                        print(f'P{_id} is waiting')
-                        self.__cpus[_id].set_state('WAITING BUS')
-
-                        # Wait a cycle
-                        if wait:
-                            sleep(1 / self.__frequency)
-                        else:
-                            sleep(self.__default_time)
-                            self.__running = False
-                    else:
-                        # Block the bus
-                        self.__memory.block_bus()
-                        print(f'P{_id} is using the bus')
-
-                        # Get current instruction
-                        instr = self.__instructions[_id]
-
-                        if self.__instructions[_id]['type'] == 'READ':
-                            print(f'P{_id} is reading memory')
-                            self.__cpus[_id].set_state('READING MEMORY')
-
-                            # Wait a cycle
-                            if wait:
-                                sleep(1 / self.__frequency)
-                            else:
-                                sleep(self.__default_time)
-                                self.__running = False
-
-                            # Read the data from the memory
-                            data = self.__memory.read(instr['address'])
-                            # Get the new state
-                            s = self.__change_state_miss(_id, 'I', 'READ',
-                                                    instr['address'])
-                            # Write the date in cache
-                            self.__cpus[_id].write(instr['address'], data, s)
-                        else:
-                            print(f'P{_id} is writing in memory')
-                            self.__cpus[_id].set_state('WRITING IN MEMORY')
-
-                            # Wait a cycle
-                            if wait:
-                                sleep(1 / self.__frequency)
-                            else:
-                                sleep(self.__default_time)
-                                self.__running = False
-
-                            # Write the date in memory
-                            self.__memory.write(instr['address'],
-                                                instr['data'])
-                            # Get the new state
-                            s = self.__change_state_miss(_id, 'I', 'WRITE',
-                                                    instr['address'])
-                            # Write the date in cache
-                            self.__cpus[_id].write(instr['address'],
-                                                    instr['data'], s)
-
-                        # Free the bus
-                        print(f'P{_id} released the bus')
-                        self.__memory.free_bus()
-                        self.__cpus[_id].finish()
-                else:
-                    # Wait a cycle
-                    if wait:
-                        sleep(1 / self.__frequency)
-                    else:
-                        sleep(self.__default_time)
-                        self.__running = False
+            self.step()
+
+            # Wait a cycle
+            if wait:
+                sleep(1 / self.__frequency)
             else:
-                # Wait a cycle
-                if wait:
-                    sleep(1 / self.__frequency)
-                else:
-                    sleep(self.__default_time)
-                    self.__running = False
-    
+                self.__running = False
+
+    def get_address_map(self) -> AddressMap:
+        """This method returns the memory node of each block.
+
+        Returns
+        --------------------------------------------------------------
+            The address map.
+        """
+        return self.__numa
+
+    def get_class_traffic(self) -> dict:
+        """This method returns the traffic delivered between the core
+        classes. The memory controllers are the 'memory' class.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the messages and bytes of each source
+            and destination class.
+        """
+        classes = [cpu.get_class() for cpu in self.__cpus]
+        traffic = {}
+
+        for (src, dst), flow in self.__network.get_flows().items():
+            pair = tuple(classes[node] if node < self.__size else 'memory'
+                         for node in (src, dst))
+            counters = traffic.setdefault(pair, { 'messages': 0,
+                                                  'bytes': 0 })
+            counters['messages'] += flow['messages']
+            counters['bytes'] += flow['bytes']
+
+        return traffic
+
+    def get_cycle(self) -> int:
+        """This method returns the current cycle.
+
+        Returns
+        --------------------------------------------------------------
+            The current cycle.
+        """
+        return self.__cycle
+
+    def get_directory(self) -> Directory:
+        """This method returns the directory.
+
+        Returns
+        --------------------------------------------------------------
+            The directory, or None if the caches are snooped.
+        """
+        return self.__directory
+
     def get_instructions(self) -> list:
         """This method returns all instructions in the processors.
 
@@ -204,6 +1109,25 @@ class System:
         """
         return self.__instructions
 
+    def get_interconnect(self) -> Interconnect:
+        """This method returns the interconnect.
+
+        Returns
+        --------------------------------------------------------------
+            The interconnect.
+        """
+        return self.__network
+
+    def get_locks(self) -> dict:
+        """This method returns the counters of each lock accessed by
+        the workloads.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the counters of each lock.
+        """
+        return {name: dict(stats) for name, stats in self.__locks.items()}
+
     def get_old_instructions(self) -> list:
         """This method returns all old instructions in the processors.
 
@@ -213,6 +1137,16 @@ class System:
         """
         return self.__old_instructions
 
+    def get_statistics(self) -> dict:
+        """This method returns the counters of each processor.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the counters of each processor.
+        """
+        return {cpu.get_id(): dict(stats)
+                for cpu, stats in zip(self.__cpus, self.__stats)}
+
     def get_size(self) -> int:
         """This method returns the system size.
 
@@ -222,6 +1156,15 @@ class System:
         """
         return self.__size
     
+    def get_shared_mem(self) -> list:
+        """This method returns the data of the whole shared memory.
+
+        Returns
+        --------------------------------------------------------------
+            A list with the data in each memory address.
+        """
+        return list(self.__memory.get_mem())
+
     def get_shared_mem_size(self) -> int:
         """This method returns the shared memory size.
 
@@ -245,6 +1188,28 @@ class System:
         """
         return self.__cpus[pos]
 
+    def get_protocol(self) -> str:
+        """This method returns the coherence protocol.
+
+        Returns
+        --------------------------------------------------------------
+            The protocol name.
+        """
+        return self.__controller.get_protocol()
+
+    def get_violations(self) -> list:
+        """This method returns the coherence invariant violations
+        found if they are checked.
+
+        Returns
+        --------------------------------------------------------------
+            A list with a message for each violation.
+        """
+        if self.__checker is None:
+            return []
+
+        return self.__checker.get_violations()
+
     def read_shared_memory(self, addr: str) -> str:
         """This method reads the data in a specific address of the
         shared memory.
@@ -260,6 +1225,127 @@ class System:
         """
         return self.__memory.read(addr)
 
+    def is_finished(self) -> bool:
+        """This method returns True if every processor has finished
+        its workload, False otherwise.
+
+        Returns
+        --------------------------------------------------------------
+            True if all workloads have finished, False otherwise.
+        """
+        return all(cpu.is_finished() for cpu in self.__cpus)
+
+    def run(self, cycles: int = 0) -> None:
+        """This method runs the system without waiting between cycles.
+
+        Params
+        --------------------------------------------------------------
+            cycles: int.
+                Cycle where the system stops. If it is 0, the system
+                runs until all workloads have finished.
+        """
+        while not self.is_finished() and \
+            (cycles <= 0 or self.__cycle < cycles):
+            self.step()
+
+    def run_batch(self, instructions: list, victims: list = None) -> dict:
+        """This method executes a batch of memory instructions in
+        order using the array-backed kernel, without timing. CALC
+        instructions are ignored.
+
+        Params
+        --------------------------------------------------------------
+            instructions: list.
+                Instructions as the processors generate them.
+            victims: list.
+                Block to be replaced by each instruction if it is
+                needed. Random by default.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the counters of each processor.
+        """
+        n_blocks: int = self.__cpus[0].get_cache_size()
+        ways: int = self.__cpus[0].get_cache_l1().get_associativity()
+
+        if any(cpu.get_cache_size() != n_blocks or
+               cpu.get_cache_l1().get_associativity() != ways
+               for cpu in self.__cpus):
+            raise ValueError('The batch kernel needs identical caches!')
+
+        mem_size: int = self.__memory.get_size()
+        instructions = [instr for instr in instructions
+                        if instr.get('type') in kernel.KINDS]
+
+        if victims is None:
+            victims = [randint(0, ways - 1) for _ in instructions]
+
+        # Pack the instructions, compare and swaps pack the expected
+        # value in the upper bits
+        accesses = [(instr['processor'] - 1, kernel.KINDS.index(instr['type']),
+                     int(instr['address'], 2),
+                     int(instr.get('expected', '0'), 16) << 16 |
+                     int(instr.get('data', '0'), 16),
+                     victim) for instr, victim in zip(instructions, victims)]
+
+        # Pack the caches, the reservations, the directory and the
+        # memory
+        blocks = [block for cpu in self.__cpus
+                  for block in cpu.get_cache_mem()]
+        states = [kernel.STATES.index(block['state']) for block in blocks]
+        tags = [int(block['address'], 2) for block in blocks]
+        data = [int(block['data'], 16) for block in blocks]
+        links = [-1 if cpu.get_link() is None else int(cpu.get_link(), 2)
+                 for cpu in self.__cpus]
+        sharers = None
+
+        if self.__directory is not None:
+            sharers = [sum(1 << i for i in self.__directory.get_sharers(
+                addr2string(addr, mem_size))) for addr in range(mem_size)]
+
+        memory = [int(self.__memory.read(addr2string(i, mem_size)), 16)
+                  for i in range(mem_size)]
+
+        counters = kernel.process_batch(accesses, states, tags, data, memory,
+                                        n_blocks, ways,
+                                        self.__controller.get_tables(),
+                                        links=links, sharers=sharers)
+
+        # Unpack the results
+        for block, state, tag, value in zip(blocks, states, tags, data):
+            block['address'] = addr2string(tag, mem_size)
+            block['data'] = format(value, '04x')
+            block['state'] = kernel.STATES[state]
+
+        for cpu, link in zip(self.__cpus, links):
+            cpu.set_link(None if link < 0 else addr2string(link, mem_size))
+
+        for i, value in enumerate(memory):
+            self.__memory.write(addr2string(i, mem_size),
+                                format(value, '04x'))
+
+        if self.__directory is not None:
+            self.__directory.clear()
+
+            for addr, bits in enumerate(sharers):
+                for i in range(self.__size):
+                    if bits >> i & 1:
+                        self.__directory.add(addr2string(addr, mem_size), i)
+
+        # Rebuild the snoop filters from the caches
+        for snoop_filter in self.__filters:
+            snoop_filter.clear()
+
+        for i, block in enumerate(blocks):
+            if block['state'] != 'I':
+                self.__update_filter(i // n_blocks, block['address'], True)
+
+        n = len(kernel.COUNTERS)
+
+        return {cpu.get_id(): dict(zip(kernel.COUNTERS,
+                                       counters[i * n:(i + 1) * n]))
+                for i, cpu in enumerate(self.__cpus)}
+
     def set_frequency(self, frequency: float) -> None:
         """This method sets the system clock frequency.
 
@@ -270,6 +1356,18 @@ class System:
         """
         self.__frequency = frequency
 
+    def step(self) -> None:
+        """This method runs a single cycle of the system. The bus is
+        given in round-robin order starting after its last owner.
+        """
+        priority = self.__priority
+
+        for i in range(self.__size):
+            self.__tick((priority + i) % self.__size)
+
+        self.__cycle += 1
+        self.__network.release(self.__cycle)
+
     def turn_on(self, wait: bool = True) -> None:
         """This method starts the system.
 
@@ -281,16 +1379,9 @@ class System:
         # Run system
         self.__running: bool = True
 
-        # Create and start threads
-        self.__threads: list = [Thread(target=self.__control_processor,
-                                args=(i, wait)) for i in range(self.__size)]
-
-        # Shuffle threads
-        shuffle(self.__threads)
-
-        # Start all threads
-        for thread in self.__threads:
-            thread.start()
+        # Create and start the clock
+        self.__thread: Thread = Thread(target=self.__clock, args=(wait,))
+        self.__thread.start()
 
     def turn_off(self) -> None:
         """This method stops the system.
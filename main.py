@@ -1,15 +1,475 @@
-from PyQt5 import QtWidgets, uic
+from argparse import ArgumentParser, Namespace
+from json import dump
+from os import environ
+from time import perf_counter
 import sys
 
-from gui.mainwindow import MainWindow
 
+def cli(args: Namespace) -> None:
+    """This function runs the system without the GUI at full speed and
+    writes its statistics. Only the simulation core is imported.
+
+    Params
+    ------------------------------------------------------------------
+        args: Namespace.
+            Terminal arguments.
+    """
+    start = perf_counter()
+
+    from utils.config import load_config
+    from utils.export import export_report
+    from utils.simulation import run_simulation
+
+    # Terminal arguments override the configuration file
+    overrides = {key: value for key, value in (('cores', args.cores),
+                                               ('cycles', args.cycles),
+                                               ('protocol', args.protocol),
+                                               ('seed', args.seed))
+                 if value is not None}
+
+    try:
+        config = load_config(args.config, overrides)
+        report = run_simulation(config, args.verbose, args.timeline,
+                                args.metrics, args.metrics_interval,
+                                args.record, args.checkpoints,
+                                args.events, args.sharing)
+    except (OSError, ValueError) as error:
+        sys.exit(f'Invalid configuration: {error}')
+
+    report['seconds'] = round(perf_counter() - start, 6)
+
+    try:
+        export_report(report, args.format, args.output)
+    except ImportError as error:
+        sys.exit(str(error))
+
+
+def compile_ui(args: Namespace) -> None:
+    """This function compiles the .ui file to a Python module.
+
+    Params
+    ------------------------------------------------------------------
+        args: Namespace.
+            Terminal arguments.
+    """
+    from gui.mainwindow import compile_ui
+
+    compile_ui()
+
+
+def explore(args: Namespace) -> None:
+    """This function explores every reachable state of a small system
+    and writes the invariant violations found with their traces. It
+    exits with an error if there is any.
+
+    Params
+    ------------------------------------------------------------------
+        args: Namespace.
+            Terminal arguments.
+    """
+    start = perf_counter()
+
+    from utils.explorer import Explorer
+
+    try:
+        explorer = Explorer(args.protocol, args.cores, args.cache_size,
+                            args.associativity, args.mem_size, args.values,
+                            args.bits, args.atomics, args.directory)
+    except ValueError as error:
+        sys.exit(f'Invalid configuration: {error}')
+
+    result = explorer.run(args.max_states, args.max_errors)
+    result['seconds'] = round(perf_counter() - start, 6)
+
+    dump(result, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+    if result['violations']:
+        sys.exit(1)
+
+
+def gui(args: Namespace) -> None:
+    """This function shows the main window.
+
+    Params
+    ------------------------------------------------------------------
+        args: Namespace.
+            Terminal arguments.
+    """
+    from PyQt5 import QtWidgets
+
+    from gui.mainwindow import MainWindow, check_view
+    from utils.replay import Replay, load_recording
+
+    replay = None
+
+    if args.replay is not None:
+        try:
+            replay = Replay(load_recording(args.replay))
+            check_view(replay.get_state())
+        except (OSError, ValueError) as error:
+            sys.exit(f'Invalid recording: {error}')
 
-if __name__ == '__main__':
     # Setup the terminal arguments
-    app = QtWidgets.QApplication(sys.argv)
+    app = QtWidgets.QApplication(sys.argv[:1])
     # Create and show app
-    mainwindow = MainWindow()
+    mainwindow = MainWindow(replay)
     mainwindow.show()
     # Execute the application
     app.exec_()
 
+
+def litmus(args: Namespace) -> None:
+    """This function runs litmus tests and writes the observed
+    outcomes. It exits with an error if an outcome is not sequentially
+    consistent or a coherence invariant is violated.
+
+    Params
+    ------------------------------------------------------------------
+        args: Namespace.
+            Terminal arguments.
+    """
+    from utils.config import load_config
+    from utils.litmus import TESTS, run_litmus
+
+    overrides = {key: value for key, value in (('protocol', args.protocol),
+                                               ('seed', args.seed))
+                 if value is not None}
+    overrides['check'] = args.check
+
+    try:
+        config = load_config(args.config, overrides)
+        results = [run_litmus(name, config, args.runs, args.jobs, args.delay)
+                   for name in args.tests or TESTS]
+    except (OSError, ValueError) as error:
+        sys.exit(f'Invalid configuration: {error}')
+
+    dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+    if any(result['forbidden'] or result['violations'] for result in results):
+        sys.exit(1)
+
+
+def replay(args: Namespace) -> None:
+    """This function writes the state of recorded cycles. Without a
+    cycle, it reads commands from stdin: 'seek N', 'step [N]',
+    'back [N]' and 'quit'.
+
+    Params
+    ------------------------------------------------------------------
+        args: Namespace.
+            Terminal arguments.
+    """
+    from utils.replay import Replay, load_recording
+
+    try:
+        player = Replay(load_recording(args.file))
+    except (OSError, ValueError) as error:
+        sys.exit(f'Invalid recording: {error}')
+
+    if args.cycle is not None:
+        dump(player.seek(args.cycle), sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return
+
+    for line in sys.stdin:
+        op, *values = line.split() or ['']
+
+        try:
+            cycles = int(values[0]) if values else 1
+
+            if op == 'seek' and values:
+                state = player.seek(cycles)
+            elif op == 'step':
+                state = player.step(cycles)
+            elif op == 'back':
+                state = player.step(-cycles)
+            elif op == 'quit':
+                break
+            else:
+                raise ValueError(f'Unknown command {line.strip()}!')
+
+            dump(state, sys.stdout)
+        except ValueError as error:
+            dump({ 'error': str(error) }, sys.stdout)
+
+        sys.stdout.write('\n')
+        sys.stdout.flush()
+
+
+def sharing(args: Namespace) -> None:
+    """This function classifies the blocks of an event log by their
+    sharing pattern and writes the report.
+
+    Params
+    ------------------------------------------------------------------
+        args: Namespace.
+            Terminal arguments.
+    """
+    from utils.sharing import analyze_events
+
+    try:
+        report = analyze_events(args.file, args.top, args.wide)
+    except (OSError, ValueError) as error:
+        sys.exit(f'Invalid event log: {error}')
+
+    dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+def sweep(args: Namespace) -> None:
+    """This function simulates private LRU caches of several sizes and
+    associativities with a single pass over the addresses of a trace
+    or an event log, and writes their misses.
+
+    Params
+    ------------------------------------------------------------------
+        args: Namespace.
+            Terminal arguments.
+    """
+    from hardware.memory.stack import sweep_caches
+    from utils.formats import string2instr
+    from utils.sharing import read_events
+
+    streams = {}
+
+    try:
+        if args.file.endswith('.trace'):
+            with open(args.file) as trace:
+                for line in trace:
+                    if not line.strip() or line.startswith('#'):
+                        continue
+
+                    _id, instr = string2instr(line)
+
+                    if instr['type'] != 'CALC':
+                        streams.setdefault(_id, []).append(
+                            int(instr['address'], 2))
+        else:
+            for _, core, _, address, _, _ in read_events(args.file):
+                streams.setdefault(core, []).append(int(address, 2))
+
+        configs = [(size, associativity) for size in args.sizes
+                   for associativity in args.associativities
+                   if associativity <= size and size % associativity == 0]
+        results = sweep_caches(list(streams.values()), configs, args.backend,
+                               args.chunk)
+    except (OSError, ValueError) as error:
+        sys.exit(f'Invalid sweep: {error}')
+
+    dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+def serve(args: Namespace) -> None:
+    """This function serves simulation jobs to other tools until it is
+    interrupted.
+
+    Params
+    ------------------------------------------------------------------
+        args: Namespace.
+            Terminal arguments.
+    """
+    from asyncio import run
+
+    from utils.server import SimulationServer
+
+    server = SimulationServer(args.workers, args.interval)
+
+    try:
+        run(server.serve(args.address))
+    except KeyboardInterrupt:
+        pass
+
+
+def select_kernel() -> None:
+    """This function selects the backend of the batch kernel given by
+    the CE4302_KERNEL environment variable, the pure Python one by
+    default. It exits with an error if it is unknown or the compiled
+    kernel does not match the Python one.
+    """
+    from hardware.kernel import select_backend
+
+    try:
+        select_backend(environ.get('CE4302_KERNEL', 'python'))
+    except (RuntimeError, ValueError) as error:
+        sys.exit(f'Invalid kernel: {error}')
+
+
+def parse_args(argv: list) -> Namespace:
+    """This function parses the terminal arguments.
+
+    Params
+    ------------------------------------------------------------------
+        argv: list.
+            Terminal arguments.
+
+    Returns
+    ------------------------------------------------------------------
+        The parsed arguments.
+    """
+    parser = ArgumentParser(description='Coherence protocols in '
+                                        'multiprocessor systems.')
+    parser.set_defaults(command=gui, replay=None)
+    commands = parser.add_subparsers()
+
+    parser_gui = commands.add_parser('gui',
+                                     help='show the main window (default)')
+    parser_gui.add_argument('--replay',
+                            help='recording to be shown instead of a new '
+                                 'system')
+
+    parser_cli = commands.add_parser('cli', help='run without the GUI')
+    parser_cli.set_defaults(command=cli)
+    parser_cli.add_argument('config', nargs='?',
+                            help='YAML or TOML configuration file')
+    parser_cli.add_argument('--cores', type=int,
+                            help='number of processors')
+    parser_cli.add_argument('--cycles', type=int,
+                            help='cycles to be executed, 0 runs until the '
+                                 'workload finishes')
+    parser_cli.add_argument('--protocol', help='coherence protocol')
+    parser_cli.add_argument('--seed', type=int, help='random seed')
+    parser_cli.add_argument('--format', default='json',
+                            choices=('json', 'csv', 'parquet'),
+                            help='statistics format')
+    parser_cli.add_argument('--output', '-o',
+                            help='statistics file, stdout by default')
+    parser_cli.add_argument('--timeline',
+                            help='Chrome trace event file of the run, '
+                                 'compressed if it ends with .gz')
+    parser_cli.add_argument('--metrics',
+                            help='serve Prometheus metrics while running '
+                                 'on a port, host:port or Unix socket path')
+    parser_cli.add_argument('--metrics-interval', type=int, default=1000,
+                            help='cycles between metrics updates')
+    parser_cli.add_argument('--record',
+                            help='file where the run is recorded for '
+                                 'replays, compressed if it ends with .gz')
+    parser_cli.add_argument('--checkpoints', type=int, default=1000,
+                            help='cycles between the checkpoints of the '
+                                 'recording')
+    parser_cli.add_argument('--events',
+                            help='file where the memory accesses are '
+                                 'written, compressed if it ends with .gz')
+    parser_cli.add_argument('--sharing', action='store_true',
+                            help='classify the blocks by their sharing '
+                                 'pattern')
+    parser_cli.add_argument('--verbose', action='store_true',
+                            help='print the bus activity')
+
+    parser_litmus = commands.add_parser('litmus', help='run litmus tests')
+    parser_litmus.set_defaults(command=litmus)
+    parser_litmus.add_argument('tests', nargs='*',
+                               help='SB, MP, LB or IRIW, all by default')
+    parser_litmus.add_argument('--config',
+                               help='YAML or TOML configuration file')
+    parser_litmus.add_argument('--protocol', help='coherence protocol')
+    parser_litmus.add_argument('--seed', type=int, help='first random seed')
+    parser_litmus.add_argument('--runs', type=int, default=1000,
+                               help='runs of each test')
+    parser_litmus.add_argument('--jobs', type=int, default=1,
+                               help='parallel processes')
+    parser_litmus.add_argument('--delay', type=int, default=4,
+                               help='maximum CALC instructions before each '
+                                    'operation')
+    parser_litmus.add_argument('--check', action='store_true',
+                               help='check the coherence invariants')
+
+    parser_explore = commands.add_parser('explore',
+                                         help='explore every reachable '
+                                              'state of a small system')
+    parser_explore.set_defaults(command=explore)
+    parser_explore.add_argument('--protocol', default='MOESI',
+                                help='coherence protocol')
+    parser_explore.add_argument('--cores', type=int, default=2,
+                                help='number of processors')
+    parser_explore.add_argument('--cache-size', type=int, default=2,
+                                help='blocks of each cache')
+    parser_explore.add_argument('--associativity', type=int, default=1,
+                                help='associativity of each cache')
+    parser_explore.add_argument('--mem-size', type=int, default=2,
+                                help='memory blocks')
+    parser_explore.add_argument('--values', type=int, default=2,
+                                help='data values written')
+    parser_explore.add_argument('--max-states', type=int, default=0,
+                                help='states where the search stops, 0 '
+                                     'for no limit')
+    parser_explore.add_argument('--max-errors', type=int, default=1,
+                                help='violations where the search stops, '
+                                     '0 for no limit')
+    parser_explore.add_argument('--bits', type=int, default=1 << 30,
+                                help='maximum size of the visited bit '
+                                     'array, states are kept exactly until '
+                                     'they need more memory')
+    parser_explore.add_argument('--no-atomics', action='store_false',
+                                dest='atomics',
+                                help='explore only reads and writes')
+    parser_explore.add_argument('--directory', action='store_true',
+                                help='use a directory instead of snooping')
+
+    parser_replay = commands.add_parser('replay',
+                                        help='show the cycles of a '
+                                             'recorded run')
+    parser_replay.set_defaults(command=replay)
+    parser_replay.add_argument('file', help='recording file')
+    parser_replay.add_argument('--cycle', type=int,
+                               help='cycle to be shown, commands are read '
+                                    'from stdin by default')
+
+    parser_sharing = commands.add_parser('sharing',
+                                         help='classify the blocks of an '
+                                              'event log by their sharing '
+                                              'pattern')
+    parser_sharing.set_defaults(command=sharing)
+    parser_sharing.add_argument('file', help='event log written by cli '
+                                             '--events')
+    parser_sharing.add_argument('--top', type=int, default=10,
+                                help='blocks ranked by their misses and '
+                                     'invalidations')
+    parser_sharing.add_argument('--wide', type=int, default=3,
+                                help='processors that make a block widely '
+                                     'shared')
+
+    parser_sweep = commands.add_parser('sweep',
+                                       help='simulate private LRU caches of '
+                                            'several geometries in a single '
+                                            'pass')
+    parser_sweep.set_defaults(command=sweep)
+    parser_sweep.add_argument('file', help='trace (.trace) or event log '
+                                           'written by cli --events')
+    parser_sweep.add_argument('--sizes', type=int, nargs='+',
+                              default=[2, 4, 8, 16, 32],
+                              help='cache sizes in blocks')
+    parser_sweep.add_argument('--associativities', type=int, nargs='+',
+                              default=[1, 2, 4, 8],
+                              help='associativities, the ones that do not '
+                                   'divide a size are skipped')
+    parser_sweep.add_argument('--backend', choices=('python', 'numpy'),
+                              help='stack distance backend, NumPy if it is '
+                                   'installed by default')
+    parser_sweep.add_argument('--chunk', type=int, default=256,
+                              help='accesses processed together by NumPy')
+
+    parser_serve = commands.add_parser('serve',
+                                       help='serve simulation jobs')
+    parser_serve.set_defaults(command=serve)
+    parser_serve.add_argument('address', nargs='?', default='8765',
+                              help='port, host:port or Unix socket path')
+    parser_serve.add_argument('--workers', type=int, default=2,
+                              help='jobs that run at the same time')
+    parser_serve.add_argument('--interval', type=int, default=1000,
+                              help='cycles between progress messages')
+
+    parser_ui = commands.add_parser('compile-ui',
+                                    help='compile the .ui file to Python')
+    parser_ui.set_defaults(command=compile_ui)
+
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    select_kernel()
+    args.command(args)
@@ -0,0 +1,6 @@
+from os.path import dirname
+import sys
+
+
+# Modules are imported from the root of the repository
+sys.path.insert(0, dirname(dirname(__file__)))
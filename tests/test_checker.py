@@ -0,0 +1,82 @@
+from hardware.control.checker import InvariantChecker, block_errors, \
+    written_value
+from hardware.control.directory import Directory
+from hardware.memory.ram import RAM
+
+
+def empty_memory() -> RAM:
+    memory = RAM.get_instance(4)
+    memory.clear(4)
+
+    return memory
+
+
+class Cache:
+    def __init__(self, blocks: dict) -> None:
+        self.blocks = blocks
+
+    def read_cache(self, address: str) -> dict:
+        return self.blocks.get(address)
+
+
+def test_coherent_blocks():
+    assert block_errors([], '0001', '0001') == []
+    assert block_errors([(0, 'S', '0001'), (1, 'S', '0001')], '0001',
+                        '0001') == []
+    assert block_errors([(0, 'O', '0002'), (1, 'S', '0002')], '0001',
+                        '0002') == []
+
+
+def test_single_writer():
+    assert block_errors([(0, 'M', '0001'), (1, 'S', '0001')], '0001',
+                        '0001') == ["an exclusive copy is shared ['M', 'S']"]
+    assert block_errors([(0, 'O', '0001'), (1, 'F', '0001')], '0001',
+                        '0001') == ["there are several owners ['O', 'F']"]
+
+
+def test_data_value():
+    assert block_errors([(1, 'S', '0001')], '0001', '0002') == \
+        ['P1 has 0001 in S instead of 0002',
+         'the memory has 0001 instead of 0002']
+    assert block_errors([(0, 'M', '0002')], '0001', '0002') == []
+
+
+def test_written_values():
+    assert written_value({ 'type': 'WRITE', 'data': '0003' }, None) == '0003'
+    assert written_value({ 'type': 'TAS' }, '0000') == '0001'
+    assert written_value({ 'type': 'FAA', 'data': '0002' }, 'ffff') == '0001'
+    assert written_value({ 'type': 'CAS', 'expected': '0001',
+                           'data': '0004' }, '0001') == '0004'
+    assert written_value({ 'type': 'CAS', 'expected': '0001',
+                           'data': '0004' }, '0000') is None
+    assert written_value({ 'type': 'SC', 'data': '0005' }, '0000') is None
+    assert written_value({ 'type': 'READ' }, '0000') is None
+
+
+def test_checker_reports_the_directory():
+    memory = empty_memory()
+    directory = Directory()
+    caches = [Cache({ '01': { 'state': 'S', 'data': '0000' } }),
+              Cache({ '01': { 'state': 'S', 'data': '0000' } })]
+    checker = InvariantChecker(caches, memory, directory)
+    directory.add('01', 0)
+
+    assert checker.check('01', 7) == \
+        ['Cycle 7, block 01: the directory misses [1]']
+    assert checker.get_violations() == \
+        ['Cycle 7, block 01: the directory misses [1]']
+
+
+def test_checker_follows_the_writes():
+    memory = empty_memory()
+    caches = [Cache({ '10': { 'state': 'M', 'data': '0003' } }), Cache({})]
+    checker = InvariantChecker(caches, memory)
+
+    assert checker.check('10', 1, '0003') == []
+    assert checker.check('10', 2) == []
+
+    caches[1].blocks['10'] = { 'state': 'S', 'data': '0000' }
+
+    assert checker.check('10', 3) == \
+        ["Cycle 3, block 10: an exclusive copy is shared ['M', 'S']",
+         'Cycle 3, block 10: P1 has 0000 in S instead of 0003']
@@ -0,0 +1,119 @@
+import pytest
+
+from hardware import kernel
+from hardware.system import System
+from utils.explorer import Explorer, VisitedSet
+from utils.formats import string2instr
+
+
+def replay(violation: dict, protocol: str, cores: int, directory: bool,
+           **sizes) -> System:
+    system = System(cores, verbose=False, protocol=protocol,
+                    directory=directory, **sizes)
+
+    # The broken kernels look at the first access of each batch
+    for line, victim in zip(violation['trace'], violation['victims']):
+        processor, instr = string2instr(line)
+        instr['processor'] = processor
+        system.run_batch([instr], [victim])
+
+    return system
+
+
+@pytest.mark.parametrize('directory', [False, True])
+@pytest.mark.parametrize('protocol', ['MSI', 'MESI', 'MOESI', 'MESIF'])
+def test_protocols_have_no_violations(protocol, directory):
+    result = Explorer(protocol, 2, directory=directory).run()
+
+    assert result['exhaustive']
+    assert result['violations'] == []
+    assert 'deadlocks' not in result
+
+
+def test_atomics_reach_more_states():
+    atomics = Explorer('MESI', 2).run()
+    plain = Explorer('MESI', 2, atomics=False).run()
+
+    assert atomics['states'] > plain['states']
+
+
+def test_symmetric_associative_search():
+    result = Explorer('MOESI', 3, associativity=2, atomics=False).run()
+
+    assert result['exhaustive']
+    assert result['violations'] == []
+
+
+def test_values_are_validated():
+    with pytest.raises(ValueError, match='two data values'):
+        Explorer('MESI', 2, values=1)
+
+
+def test_lost_write_back_is_replayed(monkeypatch):
+    process = kernel._process_batch
+
+    # Reads forget the write backs of the blocks that they replace
+    def broken(cores, kinds, addresses, values, victims, states, tags,
+               data, memory, *args):
+        words = memory[:]
+        process(cores, kinds, addresses, values, victims, states, tags,
+                data, memory, *args)
+
+        if kinds[0] == kernel.READ:
+            memory[:] = words
+
+    monkeypatch.setattr(kernel, '_process_batch', broken)
+    result = Explorer('MSI', 2, mem_size=4, atomics=False).run()
+    violation = result['violations'][0]
+
+    assert violation['errors'] == ['block 0: the memory has 0 instead of 1']
+    assert ': READ ' in violation['trace'][-1]
+
+    system = replay(violation, 'MSI', 2, False, cache_size=2,
+                    associativity=1, mem_size=4)
+
+    assert system.get_shared_mem()[0] == '0000'
+
+
+def test_directory_errors_name_the_replayed_processor(monkeypatch):
+    process = kernel._process_batch
+
+    # The third reader of a block is left out of the directory
+    def broken(cores, kinds, addresses, values, victims, states, tags,
+               data, memory, links, sharers, *args):
+        bits = sharers[addresses[0]]
+        process(cores, kinds, addresses, values, victims, states, tags,
+                data, memory, links, sharers, *args)
+
+        if bin(bits).count('1') == 2:
+            sharers[addresses[0]] = bits
+
+    monkeypatch.setattr(kernel, '_process_batch', broken)
+    result = Explorer('MESI', 3, associativity=2, mem_size=3,
+                      directory=True).run()
+    violation = result['violations'][0]
+
+    assert len(violation['trace']) == 3
+    core = int(violation['trace'][-1][1]) - 1
+
+    assert violation['errors'] == [f'block 0: the directory misses [{core}]']
+
+    system = replay(violation, 'MESI', 3, True, cache_size=2,
+                    associativity=2, mem_size=3)
+
+    assert system.get_directory().get_sharers('00') == {0, 1, 2} - {core}
+
+
+def test_visited_set_moves_into_bits():
+    visited = VisitedSet(1 << 16, 1 << 16)
+
+    assert all(visited.add(code) for code in range(0, 1 << 16, 7))
+    assert not visited.add(7)
+    assert visited.is_exact()
+
+    hashed = VisitedSet(1 << 20, 1 << 10)
+
+    for code in range(0, 1 << 20, 997):
+        hashed.add(code)
+
+    assert not hashed.is_exact()
@@ -0,0 +1,41 @@
+from hardware.network.interconnect import Bus, Ring
+
+
+def test_earlier_message_uses_the_gap_before_a_later_one():
+    bus = Bus(5)
+
+    assert bus.send(0, 4, 16, 100) == 102
+    assert bus.send(1, 4, 8, 0) == 1
+    assert bus.get_statistics()['contention_cycles'] == 0
+
+
+def test_message_waits_for_a_gap_long_enough():
+    bus = Bus(5)
+
+    assert bus.send(0, 4, 16, 1) == 3
+    # One free cycle before the reservation is not enough
+    assert bus.send(1, 4, 16, 0) == 5
+    assert bus.send(2, 4, 8, 0) == 1
+    assert bus.get_statistics()['contention_cycles'] == 3
+    assert bus.get_links()['bus']['free'] == 5
+
+
+def test_messages_queue_on_a_busy_link():
+    bus = Bus(5)
+    arrivals = [bus.send(i, 4, 16, 0) for i in range(4)]
+
+    assert arrivals == [2, 4, 6, 8]
+    assert bus.get_links()['bus']['busy'] == 8
+
+
+def test_released_cycles_are_forgotten():
+    ring = Ring(5)
+
+    for cycle in range(0, 400, 4):
+        ring.send(0, 2, 16, cycle)
+        ring.release(cycle)
+
+    reserved = ring._Interconnect__reserved
+
+    assert sum(map(len, reserved.values())) <= 2 * len(reserved)
+    assert ring.get_links()[(0, 1)]['messages'] == 100
@@ -0,0 +1,72 @@
+from os import environ
+from os.path import dirname
+import subprocess
+import sys
+
+import pytest
+
+from hardware import kernel
+
+
+ROOT = dirname(dirname(__file__))
+
+
+def test_python_backend_matches_itself():
+    assert kernel.verify_backend('python', length=2000)
+
+
+def test_numba_backend_matches_python():
+    pytest.importorskip('numba')
+
+    assert kernel.select_backend('numba') == 'numba'
+    assert kernel.verify_backend('numba', length=2000)
+    kernel.select_backend('python')
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match='Unknown kernel backend'):
+        kernel.select_backend('fortran')
+
+
+def test_uncompiled_backend():
+    if kernel.get_backend() == 'numba':
+        pytest.skip('The numba kernel is compiled')
+
+    with pytest.raises(RuntimeError, match='not available'):
+        kernel.process_batch([], [kernel.I] * 4, [0] * 4, [0] * 4, [0] * 4,
+                             4, backend='numba')
+
+
+@pytest.mark.parametrize('directory', [False, True])
+@pytest.mark.parametrize('protocol', ['MSI', 'MESI', 'MOESI', 'MESIF'])
+def test_batch_matches_stepped_system(protocol, directory):
+    assert kernel.verify_system(protocol, directory, length=500)
+
+
+def test_bad_backend_is_a_normal_error():
+    result = subprocess.run([sys.executable, 'main.py', 'litmus', '--runs',
+                             '1', 'SB'], cwd=ROOT, capture_output=True,
+                            text=True, env=dict(environ,
+                                                CE4302_KERNEL='fortran'))
+
+    assert result.returncode == 1
+    assert 'Invalid kernel: Unknown kernel backend fortran!' in result.stderr
+    assert 'Traceback' not in result.stderr
+
+
+def test_batch_store_conditional_fails_after_a_write():
+    from hardware.system import System
+
+    system = System(2, verbose=False, protocol='MESI', cache_size=2,
+                    associativity=1, mem_size=4, directory=True)
+    system.run_batch([{ 'processor': 1, 'type': 'LL', 'address': '01' },
+                      { 'processor': 2, 'type': 'WRITE', 'address': '01',
+                        'data': '0005' },
+                      { 'processor': 1, 'type': 'SC', 'address': '01',
+                        'data': '0007' }], [0, 0, 0])
+    blocks = [system.get_processor(i).get_cache_mem()[1] for i in range(2)]
+
+    assert system.get_processor(0).get_link() is None
+    assert [(block['state'], block['data']) for block in blocks] == \
+        [('I', '0000'), ('M', '0005')]
+    assert system.get_directory().get_sharers('01') == {1}
@@ -0,0 +1,14 @@
+import subprocess
+import sys
+
+from test_kernel import ROOT
+
+
+def test_system_does_not_import_the_reporting_tools():
+    code = ('import sys, hardware.system; '
+            'print(sorted(name for name in sys.modules '
+            "if name in ('utils.sharing', 'utils.timeline')))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == '[]'
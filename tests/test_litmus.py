@@ -0,0 +1,33 @@
+import pytest
+
+from utils.config import load_config
+from utils.litmus import MODELS, TESTS, model_outcomes, run_litmus
+
+
+@pytest.mark.parametrize('runs, jobs', [(0, 1), (10, 0), (10, -1)])
+def test_runs_and_jobs_are_validated(runs, jobs):
+    with pytest.raises(ValueError):
+        run_litmus('SB', load_config(None, {}), runs, jobs)
+
+
+def test_store_buffering_models():
+    sc = model_outcomes(TESTS['SB'], 'SC')
+    tso = model_outcomes(TESTS['SB'], 'TSO')
+
+    assert (0, 0) not in sc
+    assert tso == sc | {(0, 0)}
+
+
+@pytest.mark.parametrize('name', sorted(TESTS))
+@pytest.mark.parametrize('protocol', ['MSI', 'MESI', 'MOESI', 'MESIF'])
+def test_only_sc_outcomes_without_violations(name, protocol):
+    config = load_config(None, { 'protocol': protocol, 'seed': 1,
+                                 'check': True })
+    result = run_litmus(name, config, runs=40)
+
+    assert result['observable'] == 'SC'
+    assert result['forbidden'] == 0
+    assert result['violations'] == []
+    assert sum(outcome['count'] for outcome in result['outcomes']) == 40
+    assert all(outcome[model.lower()] for outcome in result['outcomes']
+               for model in MODELS)
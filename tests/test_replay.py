@@ -0,0 +1,33 @@
+from random import Random
+
+from utils.config import load_config
+from utils.replay import Recorder, Replay, snapshot, unflatten
+from utils.simulation import create_system
+
+
+def test_seeking_matches_the_recorded_run():
+    system = create_system(load_config(overrides={ 'seed': 3 }))
+    recorder = Recorder(system, 16)
+    expected = []
+
+    for cycle in range(1, 101):
+        recorder.run(cycle)
+        expected.append(snapshot(system))
+
+    recording = recorder.get_recording()
+    replay = Replay(recording)
+    first = replay.get_first_cycle()
+    cycles = list(range(first + 1, replay.get_last_cycle() + 1))
+
+    assert len(cycles) == 100
+    assert expected[0] != expected[-1]
+
+    # Seeking forwards and backwards gives the state of each cycle
+    Random(1).shuffle(cycles)
+
+    for cycle in cycles:
+        state = replay.seek(cycle)
+
+        assert state['cycle'] == cycle
+        assert state == dict(cycle=cycle, **unflatten(
+            expected[cycle - first - 1], recording['blocks']))
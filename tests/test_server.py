@@ -0,0 +1,24 @@
+from asyncio import run
+
+import pytest
+
+from utils.server import SimulationServer
+
+
+def command(server: SimulationServer, message: dict) -> dict:
+    return run(server._SimulationServer__command(message, None))
+
+
+def test_unknown_command_is_reported_before_the_job():
+    with pytest.raises(ValueError, match='Unknown command bogus!'):
+        command(SimulationServer(), { 'op': 'bogus' })
+
+
+def test_unknown_job():
+    with pytest.raises(ValueError, match='Unknown job 7!'):
+        command(SimulationServer(), { 'op': 'pause', 'job': 7 })
+
+
+def test_jobs_without_any():
+    assert command(SimulationServer(), { 'op': 'jobs' }) == \
+        { 'event': 'jobs', 'jobs': [] }
@@ -0,0 +1,71 @@
+import pytest
+
+from utils.config import load_config
+from utils.simulation import run_simulation
+
+
+FEATURES: dict = {
+    'random': {},
+    'prefetch': { 'prefetcher': { 'type': 'stride', 'mode': 'adaptive' } },
+    'numa': { 'numa': { 'nodes': 2, 'policy': 'first-touch' },
+              'interconnect': { 'topology': 'mesh' } },
+    'out-of-order': { 'core': { 'window': 8, 'mshrs': 4 } },
+    'tas': { 'workload': { 'type': 'spinlock', 'iterations': 3,
+                           'primitive': 'tas' }, 'cycles': 0 },
+    'cas': { 'workload': { 'type': 'spinlock', 'iterations': 3,
+                           'primitive': 'cas' }, 'cycles': 0 },
+    'llsc': { 'workload': { 'type': 'spinlock', 'iterations': 3,
+                            'primitive': 'llsc' }, 'cycles': 0 },
+    'mcs': { 'workload': { 'type': 'mcs', 'iterations': 3 }, 'cycles': 0 },
+    'barrier': { 'workload': { 'type': 'barrier', 'iterations': 3 },
+                 'cycles': 0 }
+}
+
+
+def simulate(**overrides) -> dict:
+    return run_simulation(load_config(overrides={ 'check': True, 'seed': 1,
+                                                  **overrides }))
+
+
+@pytest.mark.parametrize('feature', sorted(FEATURES))
+@pytest.mark.parametrize('coherence', ['snooping', 'directory'])
+@pytest.mark.parametrize('protocol', ['MSI', 'MESI', 'MOESI', 'MESIF'])
+def test_runs_keep_the_invariants(protocol, coherence, feature):
+    report = simulate(protocol=protocol, coherence=coherence,
+                      **FEATURES[feature])
+
+    assert report['violations'] == []
+    assert all(stats['instructions'] > 0 for stats in report['processors'])
+
+
+@pytest.mark.parametrize('protocol', ['MSI', 'MESI', 'MOESI', 'MESIF'])
+def test_snoop_filters_keep_the_invariants(protocol):
+    report = simulate(protocol=protocol, snoop_filter={ 'type': 'bloom',
+                                                        'cluster': 2 })
+
+    assert report['violations'] == []
+
+
+def test_atomic_miss_looks_up_once():
+    trace = { 'type': 'trace', 'lines': ['P1: TAS 0001'] }
+    snooping = simulate(workload=trace, cycles=0)['processors'][0]
+    directory = simulate(workload=trace, cycles=0,
+                         coherence='directory')['processors'][0]
+
+    # One lookup in each of the other caches or in the directory
+    assert snooping['snoops'] == 3
+    assert directory['directory_lookups'] == 1
+    assert directory['snoops'] == 0
+
+
+def test_atomic_hits_do_not_write_memory():
+    trace = { 'type': 'trace', 'lines': ['P1: WRITE 0001, 0005',
+                                         'P1: TAS 0001',
+                                         'P1: CAS 0001, 0001, 0003',
+                                         'P1: FAA 0001, 0001'] }
+    stats = simulate(workload=trace, cycles=0)['processors'][0]
+
+    # Only the write miss writes the memory
+    assert stats['atomics'] == 3
+    assert stats['hits'] == 3
+    assert stats['memory_writes'] == 1
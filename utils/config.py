@@ -0,0 +1,301 @@
+from copy import deepcopy
+
+from hardware.control.controller import FSMController
+from hardware.control.filter import FILTERS
+from hardware.cpu.processor import LATENCY
+from hardware.energy import COSTS
+from hardware.memory.numa import POLICIES
+from hardware.memory.prefetcher import MODES, PREFETCHERS
+from hardware.network.interconnect import TOPOLOGIES
+
+
+# Default simulation configuration
+DEFAULTS: dict = {
+    'cores': 4,
+    'protocol': 'MOESI',
+    # Execution and cache latencies are core cycles and each core
+    # cycle takes clock_ratio system cycles
+    'core': {
+        'window': 0,
+        'mshrs': 1,
+        'clock_ratio': 1,
+        'latency': dict(LATENCY)
+    },
+    'cache': {
+        'size': 4,
+        'associativity': 2
+    },
+    'prefetcher': {
+        'type': 'none',
+        'degree': 1,
+        'mode': 'shared'
+    },
+    'memory': {
+        'size': 16
+    },
+    # Memory controllers, each one local to a socket of cores
+    'numa': {
+        'nodes': 1,
+        'page_size': 4,
+        'policy': 'interleave',
+        'placement': {},
+        'remote_latency': 16
+    },
+    'interconnect': {
+        'topology': 'bus',
+        'latency': 1,
+        'bandwidth': 8
+    },
+    'coherence': 'snooping',
+    # Caches that share a filter and size of the Bloom filters
+    'snoop_filter': {
+        'type': 'none',
+        'cluster': 1,
+        'entries': 8,
+        'hashes': 2
+    },
+    # Energy in picojoules of each event
+    'energy': dict(COSTS),
+    'workload': {
+        'type': 'random'
+    },
+    # Classes of the first cores, each one with its count and the
+    # core, cache and workload values that it overrides
+    'classes': {},
+    'cycles': 1000,
+    'seed': None,
+    'check': False
+}
+
+
+def merge(base: dict, values: dict) -> dict:
+    """This function merges a configuration into another one.
+
+    Params
+    ------------------------------------------------------------------
+        base: dict.
+            Base configuration.
+        values: dict.
+            Values that override the base configuration.
+
+    Returns
+    ------------------------------------------------------------------
+        A new dictionary with the merged configuration.
+    """
+    config = deepcopy(base)
+
+    for key, value in values.items():
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            config[key] = merge(config[key], value)
+        else:
+            config[key] = value
+
+    return config
+
+
+def get_classes(config: dict) -> list:
+    """This function returns the core classes of a configuration. The
+    cores left after the configured classes are the 'core' class.
+
+    Params
+    ------------------------------------------------------------------
+        config: dict.
+            Simulation configuration.
+
+    Returns
+    ------------------------------------------------------------------
+        A list with the name, processor indexes and core, cache and
+        workload values of each class.
+    """
+    entries = list(config['classes'].items())
+    rest = config['cores'] - sum(values.get('count', 1)
+                                 for _, values in entries)
+    classes = []
+    first = 0
+
+    if rest > 0:
+        entries.append(('core', { 'count': rest }))
+
+    for name, values in entries:
+        count = values.get('count', 1)
+        workload = values.get('workload', config['workload'])
+
+        classes.append({ 'class': name,
+                         'cores': list(range(first, first + count)),
+                         'core': merge(config['core'],
+                                       values.get('core', {})),
+                         'cache': merge(config['cache'],
+                                        values.get('cache', {})),
+                         'workload': { 'type': workload }
+                         if isinstance(workload, str) else workload })
+        first += count
+
+    return classes
+
+
+def load_config(filename: str = None, overrides: dict = None) -> dict:
+    """This function loads a YAML or TOML configuration file and fills
+    the missing values with the defaults.
+
+    Params
+    ------------------------------------------------------------------
+        filename: str.
+            Configuration file. Only the defaults are used if it is
+            None.
+        overrides: dict.
+            Values that override the file, e.g. terminal arguments.
+
+    Returns
+    ------------------------------------------------------------------
+        A dictionary with the configuration.
+    """
+    values: dict = {}
+
+    if filename is not None:
+        if filename.endswith('.toml'):
+            try:
+                import tomllib
+            except ImportError:
+                import tomli as tomllib
+
+            with open(filename, 'rb') as file:
+                values = tomllib.load(file)
+        elif filename.endswith(('.yaml', '.yml')):
+            import yaml
+
+            with open(filename) as file:
+                values = yaml.safe_load(file) or {}
+        else:
+            raise ValueError(f'Unknown configuration format {filename}!')
+
+    config = merge(merge(DEFAULTS, values), overrides or {})
+
+    # A workload can be given just by its type
+    if isinstance(config['workload'], str):
+        config['workload'] = { 'type': config['workload'] }
+
+    validate(config)
+
+    return config
+
+
+def validate(config: dict) -> None:
+    """This function checks a configuration and raises a ValueError
+    if it is invalid.
+
+    Params
+    ------------------------------------------------------------------
+        config: dict.
+            Configuration to be checked.
+    """
+    if config['cores'] < 1:
+        raise ValueError('At least one core is required!')
+
+    if config['protocol'] not in FSMController.get_protocols():
+        raise ValueError(f'Unknown protocol {config["protocol"]}!')
+
+    if config['cycles'] < 0:
+        raise ValueError('The cycles must be positive!')
+
+    for name, values in config['classes'].items():
+        if name == 'memory':
+            raise ValueError('The memory class name is reserved!')
+
+        if not set(values) <= {'count', 'core', 'cache', 'workload'}:
+            raise ValueError(f'Unknown values of the class {name}!')
+
+        if values.get('count', 1) < 1:
+            raise ValueError(f'The class {name} needs at least one core!')
+
+    if sum(values.get('count', 1)
+           for values in config['classes'].values()) > config['cores']:
+        raise ValueError('The classes have more cores than the system!')
+
+    for values in get_classes(config):
+        core, cache, workload = values['core'], values['cache'], \
+            values['workload']
+
+        if config['cycles'] == 0 and workload['type'] == 'random':
+            raise ValueError('A random workload needs a number of cycles!')
+
+        if workload['type'] == 'trace' and 'path' not in workload and \
+            'lines' not in workload:
+            raise ValueError('A trace workload needs a path or its lines!')
+
+        if core['window'] < 0 or core['mshrs'] < 1:
+            raise ValueError('The window can not be negative and at least '
+                             'one MSHR is required!')
+
+        if core['clock_ratio'] < 1 or \
+            any(core['latency'].get(stage, 1) < 1 for stage in LATENCY):
+            raise ValueError('The clock ratio and the latencies must be '
+                             'positive!')
+
+        if cache['associativity'] < 1 or \
+            cache['size'] % cache['associativity'] != 0:
+            raise ValueError('The cache size must be a multiple of its '
+                             'associativity!')
+
+    prefetcher = config['prefetcher']
+
+    if prefetcher['type'] != 'none' and prefetcher['type'] not in PREFETCHERS:
+        raise ValueError(f'Unknown prefetcher {prefetcher["type"]}!')
+
+    if prefetcher['mode'] not in MODES:
+        raise ValueError(f'Unknown prefetch mode {prefetcher["mode"]}!')
+
+    if prefetcher['degree'] < 1:
+        raise ValueError('The prefetch degree must be positive!')
+
+    if config['memory']['size'] < 1:
+        raise ValueError('The memory needs at least one block!')
+
+    numa = config['numa']
+
+    if numa['nodes'] < 1 or numa['page_size'] < 1:
+        raise ValueError('At least one memory node is required and the '
+                         'pages need at least one block!')
+
+    if numa['policy'] not in POLICIES:
+        raise ValueError(f'Unknown placement policy {numa["policy"]}!')
+
+    if numa['remote_latency'] < 1:
+        raise ValueError('The remote latency must be positive!')
+
+    for page, node in numa['placement'].items():
+        if not 0 <= node < numa['nodes']:
+            raise ValueError(f'Page {page} is placed in an unknown node '
+                             f'{node}!')
+
+    network = config['interconnect']
+
+    if network['topology'] not in TOPOLOGIES:
+        raise ValueError(f'Unknown topology {network["topology"]}!')
+
+    if network['latency'] < 1 or network['bandwidth'] < 1:
+        raise ValueError('The link latency and bandwidth must be '
+                         'positive!')
+
+    if config['coherence'] not in ('snooping', 'directory'):
+        raise ValueError(f'Unknown coherence {config["coherence"]}!')
+
+    snoop_filter = config['snoop_filter']
+
+    if snoop_filter['type'] != 'none':
+        if snoop_filter['type'] not in FILTERS:
+            raise ValueError(f'Unknown snoop filter {snoop_filter["type"]}!')
+
+        if config['coherence'] != 'snooping':
+            raise ValueError('Snoop filters are only used by snooping!')
+
+    if snoop_filter['cluster'] < 1 or snoop_filter['entries'] < 1 or \
+        snoop_filter['hashes'] < 1:
+        raise ValueError('The snoop filter cluster, entries and hashes '
+                         'must be positive!')
+
+    for event, cost in config['energy'].items():
+        if event not in COSTS:
+            raise ValueError(f'Unknown energy event {event}!')
+
+        if cost < 0:
+            raise ValueError('The energy of an event can not be negative!')
@@ -0,0 +1,846 @@
+from array import array
+
+from hardware import kernel
+from hardware.control.checker import block_errors
+from hardware.control.controller import FSMController
+from utils.formats import addr2string, instr2string
+
+
+class BitSet:
+    """This class is a set of integers kept in a bit array. Integers
+    beyond its size are hashed, so two states may share a bit and the
+    search is not exhaustive anymore (bitstate hashing).
+    """
+    def __init__(self, size: int) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            size: int.
+                Number of bits.
+        """
+        self.__size: int = size
+        self.__bits: bytearray = bytearray((size + 7) // 8)
+
+    def add(self, value: int) -> bool:
+        """This method adds an integer to the set.
+
+        Params
+        --------------------------------------------------------------
+            value: int.
+                Integer to be added.
+
+        Returns
+        --------------------------------------------------------------
+            True if it was not in the set, False otherwise.
+        """
+        if value >= self.__size:
+            value = (value * 0x9e3779b97f4a7c15 & 0xffffffffffffffff) % \
+                self.__size
+
+        byte, bit = value >> 3, 1 << (value & 7)
+
+        if self.__bits[byte] & bit:
+            return False
+
+        self.__bits[byte] |= bit
+
+        return True
+
+
+class VisitedSet:
+    """This class is the set of visited state codes. They are kept in
+    an exact set until it needs more memory than a bit array with a
+    bit for each code, up to some bits, and then they move into that
+    array. Codes beyond its size are hashed, so the search is not
+    exhaustive anymore if the code space does not fit.
+    """
+    # Approximate bytes taken by each code in a set
+    ENTRY_SIZE: int = 100
+
+    def __init__(self, size: int, bits: int) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            size: int.
+                Number of possible codes.
+            bits: int.
+                Maximum size of the bit array.
+        """
+        self.__size: int = size
+        self.__bits: int = min(size, bits)
+        self.__exact: bool = True
+        self.__array: BitSet = None
+        self.__codes: set = set()
+
+    def add(self, value: int) -> bool:
+        """This method adds a code to the set.
+
+        Params
+        --------------------------------------------------------------
+            value: int.
+                Code to be added.
+
+        Returns
+        --------------------------------------------------------------
+            True if it was not in the set, False otherwise.
+        """
+        codes = self.__codes
+
+        if codes is None:
+            return self.__array.add(value)
+
+        if value in codes:
+            return False
+
+        codes.add(value)
+
+        # The codes move into the bit array when it takes less memory
+        if len(codes) * self.ENTRY_SIZE > self.__bits // 8:
+            self.__array = BitSet(self.__bits)
+            self.__codes = None
+            self.__exact = self.__bits == self.__size
+
+            for code in codes:
+                self.__array.add(code)
+
+        return True
+
+    def is_exact(self) -> bool:
+        """This method returns True if no code has been hashed.
+
+        Returns
+        --------------------------------------------------------------
+            True if the set is exact, False otherwise.
+        """
+        return self.__exact
+
+
+class Explorer:
+    """This class enumerates with a breadth-first search every global
+    state that the batch kernel reaches for a small system, checking
+    the coherence invariants in each one. It explores the kernel, not
+    the System and Processor classes, which kernel.verify_system
+    checks against it: reads, writes, test and sets, compare and swaps,
+    load linked and store conditionals, and the directory.
+
+    A state has the blocks and the reservation of each cache, the
+    memory and the last value written in each address. Invalid blocks
+    are all equal, and the blocks of a set and the caches are sorted,
+    since permuting them gives an equivalent state (symmetry
+    reduction). States are encoded as integers in a mixed radix, with
+    a digit for each cache, visited states are kept in a VisitedSet
+    and each level of the search is an array of codes, which is enough
+    to rebuild counterexample traces.
+
+    An access only involves its cache, the caches that have or reserve
+    its block and the block in memory, so the kernel runs once for
+    each combination of them and the transitions are reused. The
+    directory is rebuilt from the caches, so it is checked on each
+    transition instead of in each state.
+    """
+    def __init__(self, protocol: str = 'MOESI', cores: int = 2,
+                 cache_size: int = 2, associativity: int = 1,
+                 mem_size: int = 2, values: int = 2,
+                 bits: int = 1 << 30, atomics: bool = True,
+                 directory: bool = False) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            protocol: str.
+                Coherence protocol.
+            cores: int.
+                Number of processors.
+            cache_size: int.
+                Number of blocks of each cache.
+            associativity: int.
+                Associativity of each cache.
+            mem_size: int.
+                Memory size.
+            values: int.
+                Number of data values written.
+            bits: int.
+                Maximum size of the visited bit array. The states are
+                kept exactly until they need more memory than it, and
+                then the search is not exhaustive.
+            atomics: bool.
+                Indicates if atomic instructions are explored besides
+                reads and writes.
+            directory: bool.
+                Indicates if the directory is checked.
+        """
+        if associativity < 1 or cache_size % associativity != 0:
+            raise ValueError('The cache size must be a multiple of its '
+                             'associativity!')
+
+        if values < 2:
+            raise ValueError('At least two data values are required!')
+
+        controller = FSMController(protocol)
+        self.__protocol: str = protocol
+        self.__tables: tuple = controller.get_tables()
+        self.__cores: int = cores
+        self.__blocks: int = cache_size
+        self.__ways: int = associativity
+        self.__sets: int = cache_size // associativity
+        self.__mem_size: int = mem_size
+        self.__values: int = values
+        self.__directory: bool = directory
+        # Valid states of the protocol and addresses of each set
+        self.__states: list = [kernel.STATES.index(state) for state
+                               in controller.get_states() if state != 'I']
+        self.__tags: int = -(-mem_size // self.__sets)
+        self.__radix: int = (1 + len(self.__states) * self.__tags *
+                             values) ** cache_size * (mem_size + 1)
+        self.__size: int = self.__radix ** cores * values ** (2 * mem_size)
+        self.__visited: VisitedSet = VisitedSet(self.__size, bits)
+        self.__accesses: list = self.__operations(atomics)
+        # Digit of each cache seen and the cache of each digit
+        self.__digits: dict = {}
+        self.__caches: dict = {}
+        # Result of each transition run by the kernel
+        self.__transitions: dict = {}
+        # Counters of the kernel, they are not used
+        self.__counters: list = [0] * (cores * len(kernel.COUNTERS))
+
+    def __operations(self, atomics: bool) -> list:
+        """This method returns the accesses tried on each address.
+        Fetch and adds are left out, their values leave the range and
+        they take the same transitions as a test and set.
+
+        Params
+        --------------------------------------------------------------
+            atomics: bool.
+                Indicates if atomic instructions are included.
+
+        Returns
+        --------------------------------------------------------------
+            A list of tuples with the kind and value of each access.
+        """
+        values = range(self.__values)
+        accesses = [(kernel.READ, 0)] + \
+            [(kernel.WRITE, value) for value in values]
+
+        if atomics:
+            accesses += [(kernel.TAS, 0), (kernel.LL, 0)] + \
+                [(kernel.CAS, expected << 16 | value)
+                 for expected in values for value in values] + \
+                [(kernel.SC, value) for value in values]
+
+        return accesses
+
+    def __digit(self, cache: tuple, link: int) -> int:
+        """This method returns the digit of a cache in the state code.
+        The blocks of each set are sorted and the digits are kept with
+        the addresses that each cache has or reserves, so each cache is
+        only encoded once.
+
+        Params
+        --------------------------------------------------------------
+            cache: tuple.
+                Blocks of the cache, a tuple (state, tag, data).
+            link: int.
+                Address reserved by its processor, -1 if there is not.
+
+        Returns
+        --------------------------------------------------------------
+            The cache digit.
+        """
+        digit = self.__digits.get((cache, link))
+
+        if digit is not None:
+            return digit
+
+        ways = self.__ways
+        # Invalid blocks are all equal
+        blocks = tuple(block if block[0] != kernel.I else (kernel.I, -1, 0)
+                       for block in cache)
+        blocks = tuple(block for s in range(0, self.__blocks, ways)
+                       for block in sorted(blocks[s:s + ways]))
+        base = 1 + len(self.__states) * self.__tags * self.__values
+        digit = 0
+
+        for _state, tag, data in blocks:
+            digit *= base
+
+            if _state != kernel.I:
+                digit += 1 + (self.__states.index(_state) * self.__tags +
+                              tag // self.__sets) * self.__values + data
+
+        digit = digit * (self.__mem_size + 1) + link + 1
+        self.__digits[(cache, link)] = digit
+        self.__caches[digit] = (blocks, link, {tag for _, tag, _ in blocks}
+                                | {link})
+
+        return digit
+
+    def __pack(self, digits: list, memory: list, last: tuple) -> int:
+        """This method encodes a state as an integer.
+
+        Params
+        --------------------------------------------------------------
+            digits: list.
+                Digit of each cache.
+            memory: list.
+                Shared memory.
+            last: tuple.
+                Last value written in each address.
+
+        Returns
+        --------------------------------------------------------------
+            The state code.
+        """
+        code = 0
+
+        for digit in sorted(digits):
+            code = code * self.__radix + digit
+
+        for value in memory:
+            code = code * self.__values + value
+
+        for value in last:
+            code = code * self.__values + value
+
+        return code
+
+    def __encode(self, blocks: tuple, links: list, memory: list,
+                 last: tuple) -> tuple:
+        """This method encodes a state given by its blocks.
+
+        Params
+        --------------------------------------------------------------
+            blocks: tuple.
+                States, tags and data of the blocks of every cache.
+            links: list.
+                Address reserved by each processor.
+            memory: list.
+                Shared memory.
+            last: tuple.
+                Last value written in each address.
+
+        Returns
+        --------------------------------------------------------------
+            A tuple with the state code and the digit of each cache.
+        """
+        states, tags, data = blocks
+        n = self.__blocks
+        digits = [self.__digit(tuple(zip(states[i:i + n], tags[i:i + n],
+                                         data[i:i + n])), links[i // n])
+                  for i in range(0, len(states), n)]
+
+        return self.__pack(digits, memory, last), digits
+
+    def __split(self, code: int) -> tuple:
+        """This method splits a state code in its digits.
+
+        Params
+        --------------------------------------------------------------
+            code: int.
+                State code.
+
+        Returns
+        --------------------------------------------------------------
+            The digit of each cache, sorted, the memory and the last
+            value written.
+        """
+        words = []
+
+        for _ in range(2 * self.__mem_size):
+            code, value = divmod(code, self.__values)
+            words.append(value)
+
+        words.reverse()
+        digits = []
+
+        for _ in range(self.__cores):
+            code, digit = divmod(code, self.__radix)
+            digits.append(digit)
+
+        digits.reverse()
+
+        return digits, words[:self.__mem_size], \
+            tuple(words[self.__mem_size:])
+
+    def __expand(self, digits: list) -> tuple:
+        """This method returns the blocks and reservations of some
+        caches.
+
+        Params
+        --------------------------------------------------------------
+            digits: list.
+                Digit of each cache, None for an empty one.
+
+        Returns
+        --------------------------------------------------------------
+            The states, tags and data of the blocks of every cache
+            and the reservations.
+        """
+        empty = ((kernel.I, -1, 0),) * self.__blocks, -1, None
+        states, tags, data, links = [], [], [], []
+
+        for digit in digits:
+            cache, link, _ = empty if digit is None else self.__caches[digit]
+            links.append(link)
+
+            for _state, tag, value in cache:
+                states.append(_state)
+                tags.append(tag)
+                data.append(value)
+
+        return (states, tags, data), links
+
+    def __decode(self, code: int) -> tuple:
+        """This method decodes a state code.
+
+        Params
+        --------------------------------------------------------------
+            code: int.
+                State code.
+
+        Returns
+        --------------------------------------------------------------
+            The states, tags and data of the blocks of every cache,
+            the reservations, the memory and the last value written.
+        """
+        digits, memory, last = self.__split(code)
+
+        return (*self.__expand(digits), memory, last)
+
+    def __errors(self, blocks: tuple, memory: list, last: tuple) -> list:
+        """This method checks the coherence invariants of a state.
+
+        Params
+        --------------------------------------------------------------
+            blocks: tuple.
+                States, tags and data of the blocks of every cache.
+            memory: list.
+                Shared memory.
+            last: tuple.
+                Last value written in each address.
+
+        Returns
+        --------------------------------------------------------------
+            A list with the violations found.
+        """
+        copies = [[] for _ in range(self.__mem_size)]
+        errors = []
+
+        for i, (_state, tag, data) in enumerate(zip(*blocks)):
+            if _state == kernel.I:
+                continue
+
+            if _state not in self.__states:
+                errors.append(f'unexpected state {kernel.STATES[_state]}')
+
+            copies[tag].append((i // self.__blocks, kernel.STATES[_state],
+                                data))
+
+        for address, block in enumerate(copies):
+            errors.extend(f'block {address}: {error}' for error
+                          in block_errors(block, memory[address],
+                                          last[address]))
+
+        return errors
+
+    def __sharers(self, blocks: tuple) -> list:
+        """This method returns the directory of some caches, the
+        processors that have each block as bits.
+
+        Params
+        --------------------------------------------------------------
+            blocks: tuple.
+                States, tags and data of the blocks of every cache.
+
+        Returns
+        --------------------------------------------------------------
+            A list with the bits of each memory block.
+        """
+        sharers = [0] * self.__mem_size
+
+        for i, (_state, tag) in enumerate(zip(blocks[0], blocks[1])):
+            if _state != kernel.I:
+                sharers[tag] |= 1 << i // self.__blocks
+
+        return sharers
+
+    def __step(self, state: tuple, access: tuple) -> tuple:
+        """This method executes an access with the batch kernel.
+
+        Params
+        --------------------------------------------------------------
+            state: tuple.
+                Blocks, reservations, memory and last value written.
+            access: tuple.
+                Processor, kind, address, value and victim.
+
+        Returns
+        --------------------------------------------------------------
+            The blocks, the reservations, the memory, the last value
+            written and the directory after the access.
+        """
+        (states, tags, data), links, memory, last = state
+        core, kind, address, value, victim = access
+        sharers = self.__sharers((states, tags))
+        states, tags, data = states[:], tags[:], data[:]
+        links, memory = links[:], memory[:]
+        remote_read, fill_alone, fill_shared = self.__tables
+
+        kernel._process_batch((core,), (kind,), (address,), (value,),
+                              (victim,), states, tags, data, memory, links,
+                              sharers, self.__counters, remote_read,
+                              self.__blocks, self.__ways, fill_alone,
+                              fill_shared)
+
+        return (states, tags, data), links, memory, \
+            self.__write(last, kind, address, value), sharers
+
+    def __write(self, last: tuple, kind: int, address: int,
+                value: int) -> tuple:
+        """This method returns the last value written in each address
+        after an access. Atomic instructions read the last value
+        written, so a compare and swap only writes if it is the
+        expected one.
+
+        Params
+        --------------------------------------------------------------
+            last: tuple.
+                Last value written in each address.
+            kind: int.
+                Access type.
+            address: int.
+                Memory address.
+            value: int.
+                Value of the access.
+
+        Returns
+        --------------------------------------------------------------
+            The last value written in each address.
+        """
+        if kind == kernel.TAS:
+            value = 1
+        elif kind == kernel.CAS:
+            value = value & 0xffff if last[address] == value >> 16 else -1
+        elif kind == kernel.READ or kind == kernel.LL:
+            value = -1
+
+        if value < 0:
+            return last
+
+        return last[:address] + (value,) + last[address + 1:]
+
+    def __missing(self, blocks: tuple, sharers: list) -> list:
+        """This method returns the valid copies that the directory
+        does not have.
+
+        Params
+        --------------------------------------------------------------
+            blocks: tuple.
+                States, tags and data of the blocks of every cache.
+            sharers: list.
+                Directory, processors of each block as bits.
+
+        Returns
+        --------------------------------------------------------------
+            A list of tuples with each block and the processors
+            missing.
+        """
+        missing = []
+
+        for address, (holders, bits) in enumerate(zip(self.__sharers(blocks),
+                                                      sharers)):
+            if holders & ~bits:
+                missing.append((address, [i for i in range(self.__cores)
+                                          if (holders & ~bits) >> i & 1]))
+
+        return missing
+
+    def __transition(self, digits: list, memory: list, last: tuple,
+                     core: int, others: list, address: int) -> tuple:
+        """This method returns the effect of every access of a
+        processor to an address. The kernel runs on the caches
+        involved, with the other caches empty and only the accessed
+        block in memory, and the results are kept for the next states
+        with equal caches involved.
+
+        Params
+        --------------------------------------------------------------
+            digits: list.
+                Digit of each cache.
+            memory: list.
+                Shared memory.
+            last: tuple.
+                Last value written in each address.
+            core: int.
+                Processor that accesses.
+            others: list.
+                Other processors that have or reserve the block.
+            address: int.
+                Memory address.
+
+        Returns
+        --------------------------------------------------------------
+            A tuple with a tuple for each access with the access, the
+            new digits of the processor and of the others, the words
+            written in memory, the last value written in the address
+            and whether the directory misses a copy.
+        """
+        key = (address, digits[core], tuple(digits[i] for i in others),
+               memory[address], last[address])
+        result = self.__transitions.get(key)
+
+        if result is not None:
+            return result
+
+        ways = self.__ways
+        cache, link, _ = self.__caches[digits[core]]
+        first = address % self.__sets * ways
+        blocks = cache[first:first + ways]
+        # Invalid blocks have no tag
+        present = any(tag == address for _, tag, _ in blocks)
+        # The victim only matters if the set is full
+        victims = (0,) if present or (kernel.I, -1, 0) in blocks \
+            else range(ways)
+        involved = [core] + others
+        local = [digits[i] if i in involved else None
+                 for i in range(self.__cores)]
+        # The words that the kernel does not need are unknown
+        words = [-1] * self.__mem_size
+        words[address] = memory[address]
+        n = self.__blocks
+        result = []
+
+        for kind, value in self.__accesses:
+            # Read hits do not change the state and failed store
+            # conditionals do not access the cache
+            if (kind == kernel.READ and present) or \
+                (kind == kernel.SC and link != address):
+                continue
+
+            for victim in victims:
+                access = (kind, address, value, victim)
+                state = self.__expand(local) + (words[:], last)
+                blocks, links, written, _, sharers = self.__step(
+                    state, (core, *access))
+                new = [self.__digit(tuple(zip(*(values[i * n:(i + 1) * n]
+                                                for values in blocks))),
+                                    links[i])
+                       for i in involved]
+                result.append((access, new[0], tuple(new[1:]),
+                               tuple((i, word) for i, word
+                                     in enumerate(written) if word >= 0),
+                               self.__write(last, kind, address,
+                                            value)[address],
+                               bool(self.__missing(blocks, sharers))))
+
+        result = tuple(result)
+        self.__transitions[key] = result
+
+        return result
+
+    def __successors(self, code: int) -> list:
+        """This method returns the states reached by every access.
+
+        Params
+        --------------------------------------------------------------
+            code: int.
+                State code.
+
+        Returns
+        --------------------------------------------------------------
+            A list of tuples with the access, the code of the state
+            that it reaches and whether the directory misses a copy
+            after it.
+        """
+        digits, memory, last = self.__split(code)
+        caches = [self.__caches[digit] for digit in digits]
+        successors = []
+
+        for core in range(self.__cores):
+            # Equal caches have equal successors
+            if core > 0 and digits[core] == digits[core - 1]:
+                continue
+
+            for address in range(self.__mem_size):
+                others = [i for i, (_, _, touched) in enumerate(caches)
+                          if i != core and address in touched]
+
+                for access, new, changed, words, value, missing \
+                    in self.__transition(digits, memory, last, core,
+                                         others, address):
+                    successor = digits[:]
+                    successor[core] = new
+                    written = memory[:]
+
+                    for i, digit in zip(others, changed):
+                        successor[i] = digit
+
+                    for i, word in words:
+                        written[i] = word
+
+                    successors.append((
+                        (core, *access),
+                        self.__pack(successor, written,
+                                    last[:address] + (value,) +
+                                    last[address + 1:]),
+                        missing and self.__directory))
+
+        return successors
+
+    def __trace(self, levels: list, code: int, last: tuple = None) -> tuple:
+        """This method rebuilds the accesses that reach a state. Each
+        level has a state that reaches the next one, and the accesses
+        are replayed from the initial state to number the processors
+        and the ways as the kernel does, and the violations are
+        checked again in the state reached, so their messages use the
+        same numbers.
+
+        Params
+        --------------------------------------------------------------
+            levels: list.
+                Codes of the states found at each depth.
+            code: int.
+                Code of the state to be reached.
+            last: tuple.
+                Access executed after that state, if the trace ends
+                with a transition.
+
+        Returns
+        --------------------------------------------------------------
+            A tuple with a list of the instructions in the trace
+            format, a list with the way replaced by each one and the
+            violations found at the end.
+        """
+        path = [] if last is None else [last]
+
+        for level in reversed(levels[:-1]):
+            for parent in level:
+                access = next((access for access, successor, _
+                               in self.__successors(parent)
+                               if successor == code), None)
+
+                if access is not None:
+                    path.insert(0, access)
+                    code = parent
+                    break
+
+        trace, victims = [], []
+        state = self.__decode(levels[0][0])
+        n, ways = self.__blocks, self.__ways
+
+        for core, kind, address, value, victim in path:
+            # Each access names a cache of the sorted state and a way
+            # of its sorted set, which are mapped back to the
+            # processor and the way that the kernel has
+            _, digits = self.__encode(*state)
+            order = sorted(range(self.__cores), key=lambda i: digits[i])
+            core = order[core]
+            first = address % self.__sets * ways
+            block = self.__caches[digits[core]][0][first + victim]
+            cache = [(s, t, d) if s != kernel.I else (kernel.I, -1, 0)
+                     for s, t, d in zip(*(values[core * n + first:
+                                                 core * n + first + ways]
+                                          for values in state[0]))]
+            victim = cache.index(block) if block in cache else 0
+            *state, sharers = self.__step(state, (core, kind, address,
+                                                  value, victim))
+            instr = { 'type': kernel.KINDS[kind],
+                      'address': addr2string(address, self.__mem_size) }
+
+            if kind == kernel.CAS:
+                instr['expected'] = format(value >> 16, '04x')
+
+            if kind in (kernel.WRITE, kernel.CAS, kernel.SC):
+                instr['data'] = format(value & 0xffff, '04x')
+
+            trace.append(instr2string(core + 1, instr).strip())
+            victims.append(victim)
+
+        blocks, _, memory, last = state
+        errors = self.__errors(blocks, memory, last)
+
+        if self.__directory:
+            errors += [f'block {address}: the directory misses {cores}'
+                       for address, cores in self.__missing(blocks,
+                                                            sharers)]
+
+        return trace, victims, errors
+
+    def run(self, max_states: int = 0, max_errors: int = 1) -> dict:
+        """This method explores the reachable states.
+
+        Params
+        --------------------------------------------------------------
+            max_states: int.
+                Number of states where the search stops, 0 for no
+                limit.
+            max_errors: int.
+                Number of violations where the search stops, 0 for
+                no limit.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the states and transitions explored,
+            the depth, whether the search was exhaustive and the
+            violations with their traces.
+        """
+        cells = self.__cores * self.__blocks
+        initial, _ = self.__encode(([kernel.I] * cells, [-1] * cells,
+                                    [0] * cells), [-1] * self.__cores,
+                                   [0] * self.__mem_size,
+                                   (0,) * self.__mem_size)
+        # Codes fit in 64 bits or are kept as Python integers
+        typecode = 'Q' if self.__size <= 1 << 64 else None
+        levels = [array(typecode, [initial]) if typecode else [initial]]
+        self.__visited.add(initial)
+        states, transitions = 1, 0
+        violations = []
+        stop = False
+
+        while levels[-1] and not stop:
+            level = array(typecode) if typecode else []
+
+            for code in levels[-1]:
+                successors = self.__successors(code)
+                transitions += len(successors)
+
+                for access, successor, missing in successors:
+                    # The directory is checked on every transition
+                    if missing:
+                        trace, victims, errors = self.__trace(levels, code,
+                                                              access)
+                        violations.append({ 'errors': errors,
+                                            'trace': trace,
+                                            'victims': victims })
+
+                    if self.__visited.add(successor):
+                        level.append(successor)
+                        states += 1
+                        blocks, _, memory, last = self.__decode(successor)
+
+                        if self.__errors(blocks, memory, last):
+                            trace, victims, errors = self.__trace(
+                                levels + [level], successor)
+                            violations.append({ 'errors': errors,
+                                                'trace': trace,
+                                                'victims': victims })
+
+                    if (max_errors and len(violations) >= max_errors) or \
+                        (max_states and states >= max_states):
+                        stop = True
+                        break
+
+                if stop:
+                    break
+
+            levels.append(level)
+
+        return {
+            'protocol': self.__protocol,
+            'states': states,
+            'transitions': transitions,
+            'depth': len(levels) - 1 - (not levels[-1]),
+            'exhaustive': self.__visited.is_exact() and not stop,
+            'violations': violations
+        }
@@ -0,0 +1,75 @@
+from csv import DictWriter
+from json import dump
+import sys
+
+
+# Supported output formats
+FORMATS: tuple = ('json', 'csv', 'parquet')
+
+
+def report2rows(report: dict) -> list:
+    """This function flattens a report to a row per processor.
+
+    Params
+    ------------------------------------------------------------------
+        report: dict.
+            Simulation report.
+
+    Returns
+    ------------------------------------------------------------------
+        A list of dictionaries, one for each processor.
+    """
+    run = {}
+
+    # Nested sections are flattened with their name as prefix
+    for key, value in report.items():
+        if isinstance(value, dict):
+            run.update({f'{key}_{name}': item for name, item in value.items()
+                        if not isinstance(item, (dict, list))})
+        elif not isinstance(value, list):
+            run[key] = value
+
+    return [dict(run, **processor) for processor in report['processors']]
+
+
+def export_report(report: dict, fmt: str = 'json',
+                  filename: str = None) -> None:
+    """This function writes a simulation report.
+
+    Params
+    ------------------------------------------------------------------
+        report: dict.
+            Simulation report.
+        fmt: str.
+            Output format, 'json', 'csv' or 'parquet'.
+        filename: str.
+            Output file. The standard output by default.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown output format {fmt}!')
+
+    if fmt == 'parquet':
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('pyarrow is required to write Parquet files!')
+
+        table = pyarrow.Table.from_pylist(report2rows(report))
+        pyarrow.parquet.write_table(table, filename or sys.stdout.buffer)
+        return
+
+    output = open(filename, 'w', newline='') if filename else sys.stdout
+
+    try:
+        if fmt == 'json':
+            dump(report, output, indent=2)
+            output.write('\n')
+        else:
+            rows = report2rows(report)
+            writer = DictWriter(output, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    finally:
+        if filename:
+            output.close()
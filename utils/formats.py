@@ -1,3 +1,10 @@
+# Instructions of the processors. Test and set (TAS), compare and swap
+# (CAS), fetch and add (FAA), load linked (LL) and store conditional
+# (SC) are atomic
+INSTRUCTIONS: tuple = ('READ', 'WRITE', 'CALC', 'TAS', 'CAS', 'FAA', 'LL',
+                       'SC')
+
+
 def instr2string(_id: int, inst: dict) -> str:
     """This method converts and instruction to string.
 
@@ -16,8 +23,63 @@ def instr2string(_id: int, inst: dict) -> str:
         return 'NOP'
     elif inst['type'] == 'CALC':
         return f'P{_id}: {inst["type"]}\n'
-    elif inst['type'] == 'READ':
+    elif inst['type'] in ('READ', 'TAS', 'LL'):
         return f'P{_id}: {inst["type"]} {inst["address"]}\n'
+    elif inst['type'] == 'CAS':
+        return f'P{_id}: {inst["type"]} {inst["address"]}, ' \
+            f'{inst["expected"]}, {inst["data"]}\n'
     else:
         return f'P{_id}: {inst["type"]} {inst["address"]}, {inst["data"]}\n'
 
+
+def addr2string(addr: int, mem_size: int = 16) -> str:
+    """This method converts a memory address to a binary string wide
+    enough for the memory size.
+
+    Params
+    ------------------------------------------------------------------
+        addr: int.
+            Memory address.
+        mem_size: int.
+            Memory size. 16 blocks by default.
+
+    Returns
+    ------------------------------------------------------------------
+        A string with the address in binary.
+    """
+    return format(addr, f'0{max(1, (mem_size - 1).bit_length())}b')
+
+def string2instr(line: str) -> tuple:
+    """This method converts a string with the instruction format back
+    to an instruction.
+
+    Params
+    ------------------------------------------------------------------
+        line: str.
+            Instruction, e.g. 'P1: WRITE 0101, 00ff' or
+            'P2: CAS 0101, 0000, 0001'.
+
+    Returns
+    ------------------------------------------------------------------
+        A tuple with the processor ID and the instruction data.
+    """
+    try:
+        processor, inst = line.split(':', 1)
+        parts = inst.replace(',', ' ').split()
+        instr = { 'type': parts[0].upper() }
+
+        if instr['type'] not in INSTRUCTIONS:
+            raise ValueError
+
+        if instr['type'] != 'CALC':
+            instr['address'] = parts[1]
+
+        if instr['type'] == 'CAS':
+            instr['expected'] = parts[2].lower()
+            instr['data'] = parts[3].lower()
+        elif instr['type'] in ('WRITE', 'FAA', 'SC'):
+            instr['data'] = parts[2].lower()
+
+        return int(processor.strip()[1:]), instr
+    except (IndexError, ValueError):
+        raise ValueError(f'Invalid instruction {line.strip()}!')
@@ -0,0 +1,252 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from random import randint, random
+
+from utils.formats import addr2string
+from utils.simulation import create_system
+
+
+# Litmus tests, the operations of each thread. Writes store 1 and
+# reads keep the value in the next register
+TESTS: dict = {
+    # Store buffering
+    'SB': ((('W', 'x'), ('R', 'y')),
+           (('W', 'y'), ('R', 'x'))),
+    # Message passing
+    'MP': ((('W', 'x'), ('W', 'y')),
+           (('R', 'y'), ('R', 'x'))),
+    # Load buffering
+    'LB': ((('R', 'x'), ('W', 'y')),
+           (('R', 'y'), ('W', 'x'))),
+    # Independent reads of independent writes
+    'IRIW': ((('W', 'x'),),
+             (('W', 'y'),),
+             (('R', 'x'), ('R', 'y')),
+             (('R', 'y'), ('R', 'x')))
+}
+# Memory models, TSO lets a write wait in a FIFO store buffer while
+# later reads of the same thread go on
+MODELS: tuple = ('SC', 'TSO')
+# Model that the simulator implements, its processors have no store
+# buffer, so the outcomes that only TSO allows are never observed
+OBSERVABLE: str = 'SC'
+
+
+def model_outcomes(test: tuple, model: str) -> set:
+    """This function enumerates every execution of a litmus test in a
+    memory model and returns the outcomes that it allows.
+
+    Params
+    ------------------------------------------------------------------
+        test: tuple.
+            Operations of each thread.
+        model: str.
+            Memory model, 'SC' or 'TSO'.
+
+    Returns
+    ------------------------------------------------------------------
+        A set with the allowed values of the registers.
+    """
+    outcomes = set()
+    # Thread positions, memory, store buffers and registers
+    pending = [(tuple([0] * len(test)), (), ((),) * len(test), ())]
+    seen = set()
+
+    while pending:
+        state = pending.pop()
+
+        if state in seen:
+            continue
+
+        seen.add(state)
+        pcs, memory, buffers, registers = state
+        values = dict(memory)
+        finished = True
+
+        for i, ops in enumerate(test):
+            # The oldest buffered write reaches the memory
+            if buffers[i]:
+                finished = False
+                var = buffers[i][0]
+                pending.append((pcs, tuple(sorted(dict(values,
+                                                       **{var: 1}).items())),
+                                buffers[:i] + (buffers[i][1:],) +
+                                buffers[i + 1:], registers))
+
+            if pcs[i] == len(ops):
+                continue
+
+            finished = False
+            op, var = ops[pcs[i]]
+            pcs_next = pcs[:i] + (pcs[i] + 1,) + pcs[i + 1:]
+
+            if op == 'R':
+                # A thread reads its own buffered writes first
+                value = 1 if var in buffers[i] else values.get(var, 0)
+                pending.append((pcs_next, memory, buffers,
+                                registers + ((i, pcs[i], value),)))
+            elif model == 'TSO':
+                pending.append((pcs_next, memory, buffers[:i] +
+                                (buffers[i] + (var,),) + buffers[i + 1:],
+                                registers))
+            else:
+                pending.append((pcs_next,
+                                tuple(sorted(dict(values,
+                                                  **{var: 1}).items())),
+                                buffers, registers))
+
+        if finished:
+            outcomes.add(tuple(value for _, _, value in sorted(registers)))
+
+    return outcomes
+
+
+def thread(ops: tuple, addresses: dict, registers: list, delay: int,
+           warm: float):
+    """This function generates the instructions of a litmus thread.
+    Random CALC instructions before each operation change the timing
+    of each run, and the variables can be read first to have shared
+    copies when they are written.
+
+    Params
+    ------------------------------------------------------------------
+        ops: tuple.
+            Operations of the thread.
+        addresses: dict.
+            Address of each variable.
+        registers: list.
+            List where the values read are added.
+        delay: int.
+            Maximum CALC instructions before each operation.
+        warm: float.
+            Probability of reading each variable first.
+    """
+    for address in addresses.values():
+        if random() < warm:
+            yield { 'type': 'READ', 'address': address }
+
+    for op, var in ops:
+        for _ in range(randint(0, delay)):
+            yield { 'type': 'CALC' }
+
+        if op == 'W':
+            yield { 'type': 'WRITE', 'address': addresses[var],
+                    'data': '0001' }
+        else:
+            registers.append(int((yield { 'type': 'READ',
+                                          'address': addresses[var] }), 16))
+
+
+def run_test(name: str, config: dict, seeds: range, delay: int = 4,
+             warm: float = 0.5) -> tuple:
+    """This function runs a litmus test once for each seed.
+
+    Params
+    ------------------------------------------------------------------
+        name: str.
+            Test name.
+        config: dict.
+            Simulation configuration, the cores are the test threads.
+        seeds: range.
+            Seed of each run.
+        delay: int.
+            Maximum CALC instructions before each operation.
+        warm: float.
+            Probability of reading each variable first.
+
+    Returns
+    ------------------------------------------------------------------
+        A tuple with a counter of the outcomes and the invariant
+        violations found.
+    """
+    test = TESTS[name]
+    mem_size = config['memory']['size']
+    variables = sorted({var for ops in test for _, var in ops})
+    addresses = {var: addr2string(i, mem_size)
+                 for i, var in enumerate(variables)}
+    outcomes = Counter()
+    violations = []
+
+    for seed in seeds:
+        registers = [[] for _ in test]
+        run = dict(config, cores=len(test), seed=seed)
+        # The workloads are created after seeding
+        workloads = [thread(ops, addresses, regs, delay, warm)
+                     for ops, regs in zip(test, registers)]
+        system = create_system(run, workloads=workloads)
+        system.run()
+
+        outcomes[tuple(value for regs in registers
+                       for value in regs)] += 1
+        violations.extend(system.get_violations())
+
+    return outcomes, violations
+
+
+def run_litmus(name: str, config: dict, runs: int = 1000, jobs: int = 1,
+               delay: int = 4, warm: float = 0.5) -> dict:
+    """This function runs a litmus test many times, in parallel if
+    there are several jobs, and classifies the observed outcomes by
+    the memory models that allow them.
+
+    Params
+    ------------------------------------------------------------------
+        name: str.
+            Test name.
+        config: dict.
+            Simulation configuration, its seed is the first one.
+        runs: int.
+            Number of runs.
+        jobs: int.
+            Number of processes.
+        delay: int.
+            Maximum CALC instructions before each operation.
+        warm: float.
+            Probability of reading each variable first.
+
+    Returns
+    ------------------------------------------------------------------
+        A dictionary with the outcomes, the model whose outcomes can
+        be observed, the runs with an outcome that sequential
+        consistency forbids and the invariant violations.
+    """
+    if name not in TESTS:
+        raise ValueError(f'Unknown litmus test {name}!')
+
+    if runs < 1:
+        raise ValueError('A litmus test needs at least one run!')
+
+    if jobs < 1:
+        raise ValueError('At least one job is required!')
+
+    first = config['seed'] or 0
+    # Each job runs a contiguous range of seeds
+    chunk = -(-runs // jobs)
+    ranges = [range(first + i, first + min(i + chunk, runs))
+              for i in range(0, runs, chunk)]
+
+    if jobs > 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            results = list(pool.map(run_test, [name] * len(ranges),
+                                    [config] * len(ranges), ranges,
+                                    [delay] * len(ranges),
+                                    [warm] * len(ranges)))
+    else:
+        results = [run_test(name, config, seeds, delay, warm)
+                   for seeds in ranges]
+
+    outcomes = sum((counter for counter, _ in results), Counter())
+    allowed = {model: model_outcomes(TESTS[name], model) for model in MODELS}
+
+    return {
+        'test': name,
+        'runs': runs,
+        'observable': OBSERVABLE,
+        'outcomes': [dict(registers=list(outcome), count=count,
+                          **{model.lower(): outcome in allowed[model]
+                             for model in MODELS})
+                     for outcome, count in sorted(outcomes.items())],
+        'forbidden': sum(count for outcome, count in outcomes.items()
+                         if outcome not in allowed['SC']),
+        'violations': [error for _, errors in results for error in errors]
+    }
@@ -0,0 +1,213 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import unlink
+from socketserver import ThreadingMixIn, UnixStreamServer
+from threading import Thread
+from time import perf_counter
+
+from hardware.system import System
+
+
+def escape(value) -> str:
+    """This function escapes a Prometheus label value.
+
+    Params
+    ------------------------------------------------------------------
+        value: any.
+            Label value.
+
+    Returns
+    ------------------------------------------------------------------
+        The escaped value.
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def render_metrics(system: System, rate: float) -> str:
+    """This function writes the counters of a system in the Prometheus
+    text format.
+
+    Params
+    ------------------------------------------------------------------
+        system: System.
+            Simulated system.
+        rate: float.
+            Cycles simulated each second.
+
+    Returns
+    ------------------------------------------------------------------
+        The metrics text.
+    """
+    cycle = system.get_cycle()
+    protocol = escape(system.get_protocol())
+    lines = []
+
+    def metric(name: str, kind: str, doc: str, samples: list) -> None:
+        lines.append(f'# HELP coherence_{name} {doc}')
+        lines.append(f'# TYPE coherence_{name} {kind}')
+        lines.extend(f'coherence_{name}{{{labels}}} {value}'
+                     for labels, value in samples)
+
+    run = f'protocol="{protocol}"'
+    metric('cycles_total', 'counter', 'Simulated cycles.', [(run, cycle)])
+    metric('cycles_per_second', 'gauge', 'Cycles simulated each second.',
+           [(run, round(rate, 3))])
+    metric('finished', 'gauge', '1 if every workload has finished.',
+           [(run, int(system.is_finished()))])
+
+    stats = system.get_statistics()
+    cores = {_id: f'{run},core="{_id}"' for _id in stats}
+
+    for name in next(iter(stats.values())):
+        metric(f'core_{name}_total', 'counter', f'Processor {name} counter.',
+               [(cores[_id], counters[name])
+                for _id, counters in stats.items()])
+
+    rates = []
+
+    for _id, counters in stats.items():
+        misses = counters['read_misses'] + counters['write_misses'] + \
+            counters['upgrades']
+        accesses = misses + counters['hits'] + counters['mshr_merges']
+        rates.append((cores[_id], misses / accesses if accesses else 0))
+
+    metric('core_miss_rate', 'gauge', 'Misses over memory accesses.', rates)
+    metric('core_window_occupancy', 'gauge',
+           'Instructions in flight in the window.',
+           [(cores[cpu.get_id()], cpu.get_in_flight(cycle)) for cpu
+            in map(system.get_processor, range(system.get_size()))])
+    metric('core_mshr_occupancy', 'gauge', 'Outstanding misses.',
+           [(cores[cpu.get_id()], cpu.get_cache_l1().get_outstanding(cycle))
+            for cpu in map(system.get_processor, range(system.get_size()))])
+
+    network = system.get_interconnect()
+    traffic = network.get_statistics()
+    topology = f'{run},topology="{escape(traffic["topology"])}"'
+
+    for name in ('messages', 'bytes', 'contention_cycles'):
+        metric(f'interconnect_{name}_total', 'counter',
+               f'Interconnect {name}.', [(topology, traffic[name])])
+
+    links = {f'{topology},link="{escape(link)}"': counters
+             for link, counters in network.get_links().items()}
+    metric('link_utilization', 'gauge', 'Busy cycles over the cycles.',
+           [(labels, round(link['busy'] / cycle, 6) if cycle else 0)
+            for labels, link in links.items()])
+    # Messages wait until the link is free, so the cycles reserved
+    # after the current one are its queue
+    metric('link_backlog_cycles', 'gauge',
+           'Cycles reserved by the queued messages.',
+           [(labels, max(link['free'] - cycle, 0))
+            for labels, link in links.items()])
+
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """This class answers the scrapes with the last metrics published.
+    """
+    def do_GET(self) -> None:
+        """This method sends the metrics.
+        """
+        if self.path not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+
+        body = self.server.exporter.get_body()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        """This method does not print the requests.
+        """
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """This class serves HTTP through a Unix socket.
+    """
+    daemon_threads = True
+
+
+class MetricsServer:
+    """This class serves the counters of a running simulation to
+    Prometheus. The simulation publishes them every few cycles and the
+    server thread only sends the last text published, so the
+    simulation loop never waits for it.
+    """
+    def __init__(self, address: str) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Port, host and port ('host:port') or path of a Unix
+                socket. Ports listen on localhost by default.
+        """
+        self.__path: str = None
+
+        if '/' in address:
+            self.__path = address
+            self.__server = UnixHTTPServer(address, MetricsHandler)
+        else:
+            host, _, port = address.rpartition(':')
+            self.__server = ThreadingHTTPServer((host or '127.0.0.1',
+                                                 int(port)), MetricsHandler)
+
+        self.__server.exporter = self
+        self.__body: bytes = b''
+        # Cycle and time of the last publication
+        self.__last: tuple = None
+        self.__thread: Thread = Thread(target=self.__server.serve_forever,
+                                       daemon=True)
+        self.__thread.start()
+
+    def close(self) -> None:
+        """This method stops the server.
+        """
+        self.__server.shutdown()
+        self.__server.server_close()
+
+        if self.__path is not None:
+            unlink(self.__path)
+
+    def get_address(self):
+        """This method returns the address where the server listens.
+
+        Returns
+        --------------------------------------------------------------
+            The host and port, or the socket path.
+        """
+        return self.__server.server_address
+
+    def get_body(self) -> bytes:
+        """This method returns the last metrics published.
+
+        Returns
+        --------------------------------------------------------------
+            The metrics text.
+        """
+        return self.__body
+
+    def publish(self, system: System) -> None:
+        """This method updates the metrics. It must be called by the
+        thread that runs the system.
+
+        Params
+        --------------------------------------------------------------
+            system: System.
+                Simulated system.
+        """
+        now = perf_counter()
+        cycle = system.get_cycle()
+        rate = 0
+
+        if self.__last is not None and now > self.__last[1]:
+            rate = (cycle - self.__last[0]) / (now - self.__last[1])
+
+        self.__last = (cycle, now)
+        # Replacing the reference is atomic, scrapes see the old text
+        # or the new one
+        self.__body = render_metrics(system, rate).encode()
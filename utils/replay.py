@@ -0,0 +1,309 @@
+from gzip import open as gzip_open
+from json import dump, load
+
+from hardware.system import System
+from utils.formats import instr2string
+
+
+# Version of the recording files
+VERSION: int = 1
+# Values kept for each processor and for each cache block
+CPU_FIELDS: tuple = ('instruction', 'previous', 'state')
+BLOCK_FIELDS: tuple = ('address', 'data', 'state')
+
+
+def snapshot(system: System) -> list:
+    """This function flattens the state shown by the GUI, that is the
+    instructions and state of each processor, its cache blocks and
+    the shared memory.
+
+    Params
+    ------------------------------------------------------------------
+        system: System.
+            Simulated system.
+
+    Returns
+    ------------------------------------------------------------------
+        A list with every value of the state.
+    """
+    instructions = system.get_instructions()
+    old_instructions = system.get_old_instructions()
+    state = []
+
+    for i in range(system.get_size()):
+        cpu = system.get_processor(i)
+        state += (instr2string(i, instructions[i]),
+                  instr2string(i, old_instructions[i]), cpu.get_state())
+
+        for block in cpu.get_cache_mem():
+            state += (block['address'], block['data'], block['state'])
+
+    return state + system.get_shared_mem()
+
+
+def unflatten(state: list, blocks: list) -> dict:
+    """This function rebuilds the structure of a flattened state.
+
+    Params
+    ------------------------------------------------------------------
+        state: list.
+            Values of the state.
+        blocks: list.
+            Blocks of the cache of each processor.
+
+    Returns
+    ------------------------------------------------------------------
+        A dictionary with the state of each processor and the memory.
+    """
+    processors = []
+    first = 0
+
+    for n_blocks in blocks:
+        size = len(CPU_FIELDS) + n_blocks * len(BLOCK_FIELDS)
+        values = state[first:first + size]
+        cpu = dict(zip(CPU_FIELDS, values))
+        cpu['cache'] = [dict(zip(BLOCK_FIELDS,
+                                 values[j:j + len(BLOCK_FIELDS)]))
+                        for j in range(len(CPU_FIELDS), size,
+                                       len(BLOCK_FIELDS))]
+        processors.append(cpu)
+        first += size
+
+    return { 'processors': processors, 'memory': state[first:] }
+
+
+def load_recording(filename: str) -> dict:
+    """This function reads a recording, which is compressed if its
+    name ends with .gz.
+
+    Params
+    ------------------------------------------------------------------
+        filename: str.
+            Recording file.
+
+    Returns
+    ------------------------------------------------------------------
+        The recording.
+    """
+    with gzip_open(filename, 'rt') if filename.endswith('.gz') else \
+        open(filename) as file:
+        recording = load(file)
+
+    if recording.get('version') != VERSION:
+        raise ValueError(f'Unknown recording version '
+                         f'{recording.get("version")}!')
+
+    return recording
+
+
+def save_recording(recording: dict, filename: str) -> None:
+    """This function writes a recording, compressed if its name ends
+    with .gz.
+
+    Params
+    ------------------------------------------------------------------
+        recording: dict.
+            Recording to be written.
+        filename: str.
+            Output file.
+    """
+    with gzip_open(filename, 'wt') if filename.endswith('.gz') else \
+        open(filename, 'w') as file:
+        dump(recording, file, separators=(',', ':'))
+
+
+class Recorder:
+    """This class records a run as a full checkpoint of its state every
+    few cycles and the values changed in each cycle between them.
+    Few values change each cycle, so the log is much smaller than the
+    states, and any cycle is rebuilt from the checkpoint before it.
+    """
+    def __init__(self, system: System, interval: int = 1000) -> None:
+        """Constructor. The current state is the first checkpoint.
+
+        Params
+        --------------------------------------------------------------
+            system: System.
+                Simulated system.
+            interval: int.
+                Cycles between checkpoints.
+        """
+        if interval < 1:
+            raise ValueError('The checkpoints need an interval of at least '
+                             'one cycle!')
+
+        self.__system: System = system
+        self.__interval: int = interval
+        self.__start: int = system.get_cycle()
+        self.__state: list = snapshot(system)
+        self.__checkpoints: list = [list(self.__state)]
+        # Changes of cycle c are in range(offsets[c], offsets[c + 1])
+        # of the indexes and values, counted from the first one
+        self.__offsets: list = [0, 0]
+        self.__indexes: list = []
+        self.__values: list = []
+
+    def capture(self) -> None:
+        """This method records the changes of the cycle that was just
+        executed.
+        """
+        state = snapshot(self.__system)
+
+        if state != self.__state:
+            for i, (value, old) in enumerate(zip(state, self.__state)):
+                if value != old:
+                    self.__indexes.append(i)
+                    self.__values.append(value)
+
+        self.__offsets.append(len(self.__indexes))
+        self.__state = state
+
+        if (len(self.__offsets) - 2) % self.__interval == 0:
+            self.__checkpoints.append(list(state))
+
+    def get_recording(self) -> dict:
+        """This method returns the recording.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the checkpoints and the changes.
+        """
+        system = self.__system
+
+        return { 'version': VERSION,
+                 'blocks': [system.get_processor(i).get_cache_size()
+                            for i in range(system.get_size())],
+                 'start': self.__start,
+                 'cycles': len(self.__offsets) - 2,
+                 'interval': self.__interval,
+                 'checkpoints': self.__checkpoints,
+                 'offsets': self.__offsets, 'indexes': self.__indexes,
+                 'values': self.__values }
+
+    def run(self, cycles: int = 0) -> None:
+        """This method runs the system like System.run, recording each
+        cycle.
+
+        Params
+        --------------------------------------------------------------
+            cycles: int.
+                Cycle where the system stops. If it is 0, the system
+                runs until all workloads have finished.
+        """
+        system = self.__system
+
+        while not system.is_finished() and \
+            (cycles <= 0 or system.get_cycle() < cycles):
+            system.step()
+            self.capture()
+
+
+class Replay:
+    """This class moves through a recorded run, forwards or backwards.
+    Seeking restores the checkpoint before the cycle and applies the
+    changes after it, so it never applies more changes than the
+    checkpoint interval. Moving forwards in the same interval goes on
+    from the current state.
+    """
+    def __init__(self, recording: dict) -> None:
+        """Constructor. The replay starts at the first cycle.
+
+        Params
+        --------------------------------------------------------------
+            recording: dict.
+                Recording of a run.
+        """
+        self.__recording: dict = recording
+        self.__cycle: int = 0
+        self.__state: list = list(recording['checkpoints'][0])
+
+    def get_cycle(self) -> int:
+        """This method returns the current cycle.
+
+        Returns
+        --------------------------------------------------------------
+            The current cycle.
+        """
+        return self.__recording['start'] + self.__cycle
+
+    def get_first_cycle(self) -> int:
+        """This method returns the first cycle recorded.
+
+        Returns
+        --------------------------------------------------------------
+            The first cycle.
+        """
+        return self.__recording['start']
+
+    def get_last_cycle(self) -> int:
+        """This method returns the last cycle recorded.
+
+        Returns
+        --------------------------------------------------------------
+            The last cycle.
+        """
+        return self.__recording['start'] + self.__recording['cycles']
+
+    def get_state(self) -> dict:
+        """This method returns the state of the current cycle.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the cycle, the state of each processor
+            and the memory.
+        """
+        state = unflatten(self.__state, self.__recording['blocks'])
+
+        return dict(cycle=self.get_cycle(), **state)
+
+    def seek(self, cycle: int) -> dict:
+        """This method moves to a cycle, which is clamped to the ones
+        recorded.
+
+        Params
+        --------------------------------------------------------------
+            cycle: int.
+                Cycle to be shown.
+
+        Returns
+        --------------------------------------------------------------
+            The state of the cycle.
+        """
+        recording = self.__recording
+        interval = recording['interval']
+        offsets = recording['offsets']
+        indexes = recording['indexes']
+        values = recording['values']
+
+        target = min(max(cycle - recording['start'], 0), recording['cycles'])
+        base = target - target % interval
+
+        # The new state is built in a copy, so readers in other
+        # threads never see half of it
+        if base <= self.__cycle <= target:
+            current, state = self.__cycle, list(self.__state)
+        else:
+            current = base
+            state = list(recording['checkpoints'][base // interval])
+
+        for i in range(offsets[current + 1], offsets[target + 1]):
+            state[indexes[i]] = values[i]
+
+        self.__state = state
+        self.__cycle = target
+
+        return self.get_state()
+
+    def step(self, cycles: int = 1) -> dict:
+        """This method moves some cycles from the current one.
+
+        Params
+        --------------------------------------------------------------
+            cycles: int.
+                Cycles to be moved, negative ones move backwards.
+
+        Returns
+        --------------------------------------------------------------
+            The state of the new cycle.
+        """
+        return self.seek(self.get_cycle() + cycles)
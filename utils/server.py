@@ -0,0 +1,280 @@
+from asyncio import (Semaphore, get_running_loop, start_server,
+                     start_unix_server)
+from json import dumps, loads
+from multiprocessing import Pipe, Process
+
+from utils.config import load_config
+from utils.simulation import create_report, create_system
+
+
+# Commands of a running job
+CONTROLS: tuple = ('pause', 'resume', 'step', 'stop')
+
+
+def worker(config: dict, conn, interval: int) -> None:
+    """This function runs a job in its own process. It sends the
+    progress every few cycles and the report at the end, and it
+    follows the commands received between them. Steps pause the job
+    and run some cycles, like the Step button of the GUI.
+
+    Params
+    ------------------------------------------------------------------
+        config: dict.
+            Simulation configuration.
+        conn: Connection.
+            Pipe to the server.
+        interval: int.
+            Cycles between progress messages.
+    """
+    try:
+        system = create_system(config)
+    except (OSError, ValueError) as error:
+        conn.send({ 'event': 'error', 'message': str(error) })
+        return
+
+    cycles = config['cycles']
+    paused = False
+    steps = 0
+    stopped = False
+
+    def progress() -> None:
+        conn.send({ 'event': 'progress', 'cycle': system.get_cycle(),
+                    'paused': paused,
+                    'statistics': system.get_statistics() })
+
+    while not system.is_finished() and \
+        (cycles <= 0 or system.get_cycle() < cycles):
+        # Wait for a command while it is paused
+        while conn.poll(None if paused and not steps else 0):
+            command = conn.recv()
+
+            if command['op'] == 'pause':
+                paused = True
+                progress()
+            elif command['op'] == 'resume':
+                paused, steps = False, 0
+            elif command['op'] == 'step':
+                paused = True
+                steps += command.get('cycles', 1)
+            elif command['op'] == 'stop':
+                stopped = True
+                break
+
+        if stopped:
+            break
+
+        stop = system.get_cycle() + (steps if paused else interval)
+        system.run(min(stop, cycles) if cycles > 0 else stop)
+        steps = 0
+        progress()
+
+    conn.send({ 'event': 'stopped' if stopped else 'finished',
+                'report': create_report(system, config) })
+
+
+class SimulationServer:
+    """This class serves simulation jobs through a TCP or Unix socket.
+    Clients send a JSON command in each line and receive JSON events.
+    Jobs run in their own processes, at most some of them at a time,
+    and their events are sent to every client subscribed to them.
+
+    The commands are 'submit' with a 'config', which includes the
+    workload, 'jobs' to list them, 'subscribe', 'report', 'pause',
+    'resume', 'step' with the 'cycles' to run and 'stop', which take
+    the 'job' ID.
+    """
+    def __init__(self, workers: int = 2, interval: int = 1000) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            workers: int.
+                Jobs that run at the same time.
+            interval: int.
+                Cycles between progress messages.
+        """
+        self.__workers: int = workers
+        self.__interval: int = interval
+        self.__jobs: dict = {}
+        self.__slots: Semaphore = None
+
+    async def __send(self, writer, message: dict) -> bool:
+        """This method sends an event to a client.
+
+        Params
+        --------------------------------------------------------------
+            writer: StreamWriter.
+                Client stream.
+            message: dict.
+                Event to be sent.
+
+        Returns
+        --------------------------------------------------------------
+            True if it was sent, False if the client is gone.
+        """
+        try:
+            writer.write(dumps(message).encode() + b'\n')
+            await writer.drain()
+        except (ConnectionError, RuntimeError):
+            return False
+
+        return True
+
+    async def __publish(self, job: dict, message: dict) -> None:
+        """This method sends an event of a job to its subscribers.
+
+        Params
+        --------------------------------------------------------------
+            job: dict.
+                Job information.
+            message: dict.
+                Event to be sent.
+        """
+        message = dict(message, job=job['id'])
+
+        for writer in list(job['subscribers']):
+            if not await self.__send(writer, message):
+                job['subscribers'].discard(writer)
+
+    async def __run(self, job: dict) -> None:
+        """This method runs a job when a worker is free and forwards
+        its events.
+
+        Params
+        --------------------------------------------------------------
+            job: dict.
+                Job information.
+        """
+        loop = get_running_loop()
+
+        async with self.__slots:
+            conn, child = job['conn'], job['child']
+            process = Process(target=worker, args=(job['config'], child,
+                                                   self.__interval),
+                              daemon=True)
+            process.start()
+            child.close()
+            job['state'] = 'running'
+            await self.__publish(job, { 'event': 'started' })
+
+            while True:
+                try:
+                    message = await loop.run_in_executor(None, conn.recv)
+                except EOFError:
+                    message = { 'event': 'error',
+                                'message': 'The worker has died!' }
+
+                if message['event'] == 'progress':
+                    job['cycle'] = message['cycle']
+                    job['state'] = 'paused' if message['paused'] \
+                        else 'running'
+                else:
+                    job['state'] = message['event']
+                    job['report'] = message.get('report')
+
+                await self.__publish(job, message)
+
+                if message['event'] != 'progress':
+                    break
+
+            await loop.run_in_executor(None, process.join)
+            conn.close()
+
+    async def __command(self, command: dict, writer) -> dict:
+        """This method executes a command of a client.
+
+        Params
+        --------------------------------------------------------------
+            command: dict.
+                Client command.
+            writer: StreamWriter.
+                Client stream.
+
+        Returns
+        --------------------------------------------------------------
+            The answer to the client.
+        """
+        op = command.get('op')
+
+        if op == 'submit':
+            config = load_config(None, command.get('config', {}))
+            conn, child = Pipe()
+            _id = len(self.__jobs) + 1
+            job = self.__jobs[_id] = { 'id': _id, 'config': config,
+                                       'state': 'queued', 'cycle': 0,
+                                       'conn': conn, 'child': child,
+                                       'subscribers': {writer},
+                                       'report': None }
+            get_running_loop().create_task(self.__run(job))
+
+            return { 'event': 'submitted', 'job': _id }
+        elif op == 'jobs':
+            return { 'event': 'jobs',
+                     'jobs': [{ 'job': job['id'], 'state': job['state'],
+                                'cycle': job['cycle'] }
+                              for job in self.__jobs.values()] }
+        elif op not in ('subscribe', 'report') + CONTROLS:
+            raise ValueError(f'Unknown command {op}!')
+
+        job = self.__jobs.get(command.get('job'))
+
+        if job is None:
+            raise ValueError(f'Unknown job {command.get("job")}!')
+
+        if op == 'subscribe':
+            job['subscribers'].add(writer)
+        elif op == 'report':
+            return { 'event': 'report', 'job': job['id'],
+                     'state': job['state'], 'report': job['report'] }
+        elif job['report'] is not None or job['state'] == 'error':
+            raise ValueError(f'The job {job["id"]} has finished!')
+        else:
+            # Commands wait in the pipe until the job starts
+            job['conn'].send(command)
+
+        return { 'event': 'accepted', 'op': op, 'job': job['id'] }
+
+    async def __handle(self, reader, writer) -> None:
+        """This method serves a client until it disconnects.
+
+        Params
+        --------------------------------------------------------------
+            reader: StreamReader.
+                Client input.
+            writer: StreamWriter.
+                Client output.
+        """
+        while line := await reader.readline():
+            try:
+                answer = await self.__command(loads(line), writer)
+            except (OSError, ValueError, TypeError, AttributeError) as error:
+                answer = { 'event': 'error', 'message': str(error) }
+
+            if not await self.__send(writer, answer):
+                break
+
+        for job in self.__jobs.values():
+            job['subscribers'].discard(writer)
+
+        writer.close()
+
+    async def serve(self, address: str) -> None:
+        """This method listens for clients until it is cancelled.
+
+        Params
+        --------------------------------------------------------------
+            address: str.
+                Port, host and port ('host:port') or path of a Unix
+                socket. Ports listen on localhost by default.
+        """
+        self.__slots = Semaphore(self.__workers)
+
+        if '/' in address:
+            server = await start_unix_server(self.__handle, address)
+        else:
+            host, _, port = address.rpartition(':')
+            server = await start_server(self.__handle, host or '127.0.0.1',
+                                        int(port))
+
+        async with server:
+            await server.serve_forever()
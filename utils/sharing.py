@@ -0,0 +1,282 @@
+from gzip import open as gzip_open
+from heapq import nlargest
+
+
+# Sharing patterns of the blocks
+PATTERNS: tuple = ('private', 'read-only', 'migratory', 'producer-consumer',
+                   'widely-shared')
+
+
+def read_events(filename: str):
+    """This function reads an event log line by line, so logs of any
+    size are read in constant memory.
+
+    Params
+    ------------------------------------------------------------------
+        filename: str.
+            Event log, compressed if its name ends with .gz.
+
+    Returns
+    ------------------------------------------------------------------
+        A generator of tuples with the cycle, processor, operation,
+        address, miss flag and invalidations of each access.
+    """
+    with gzip_open(filename, 'rt') if filename.endswith('.gz') else \
+        open(filename) as file:
+        for line in file:
+            if line.startswith('#') or not line.strip():
+                continue
+
+            try:
+                cycle, core, op, address, miss, invalidations = line.split()
+                event = (int(cycle), int(core), op, address, miss == '1',
+                         int(invalidations))
+            except ValueError:
+                raise ValueError(f'Invalid event {line.strip()}!')
+
+            yield event
+
+
+class EventLog:
+    """This class writes the memory accesses of a system, one for each
+    line with its cycle, processor, operation (R, W or A for atomics),
+    address, 1 if it missed and the copies that it invalidated. The
+    file is compressed if its name ends with .gz.
+    """
+    def __init__(self, filename: str) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            filename: str.
+                Output file.
+        """
+        self.__file = gzip_open(filename, 'wt') if filename.endswith('.gz') \
+            else open(filename, 'w')
+        self.__events: int = 0
+
+        self.__file.write('# cycle processor operation address miss '
+                          'invalidations\n')
+
+    def access(self, cycle: int, core: int, op: str, address: str,
+               miss: bool, invalidations: int) -> None:
+        """This method writes a memory access.
+
+        Params
+        --------------------------------------------------------------
+            cycle: int.
+                Cycle when it is issued.
+            core: int.
+                Processor ID.
+            op: str.
+                Operation, R, W or A.
+            address: str.
+                Memory address.
+            miss: bool.
+                Indicates if it missed.
+            invalidations: int.
+                Copies invalidated by it.
+        """
+        self.__file.write(f'{cycle} {core} {op} {address} {int(miss)} '
+                          f'{invalidations}\n')
+        self.__events += 1
+
+    def close(self) -> None:
+        """This method closes the file.
+        """
+        self.__file.close()
+
+    def get_events(self) -> int:
+        """This method returns the number of accesses written.
+
+        Returns
+        --------------------------------------------------------------
+            The number of accesses.
+        """
+        return self.__events
+
+
+class SharingAnalyzer:
+    """This class classifies the blocks by the way that the processors
+    share them, in a single pass over the accesses. It keeps a fixed
+    set of counters for each block, so the memory depends on the
+    blocks used and not on the length of the run.
+
+    A block is private if a single processor uses it and read-only if
+    it is never written. Otherwise it is producer-consumer if a single
+    processor writes it, migratory if at least half of the times that
+    another processor writes it, that processor was the only one
+    reading it since the last write, widely shared if at least some
+    processors use it and producer-consumer for the rest.
+    """
+    def __init__(self, wide: int = 3) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            wide: int.
+                Processors that make a block widely shared.
+        """
+        self.__wide: int = wide
+        self.__blocks: dict = {}
+        self.__accesses: int = 0
+        # Copies invalidated by each write
+        self.__fan_out: dict = {}
+
+    def access(self, cycle: int, core: int, op: str, address: str,
+               miss: bool, invalidations: int) -> None:
+        """This method counts a memory access.
+
+        Params
+        --------------------------------------------------------------
+            cycle: int.
+                Cycle when it is issued.
+            core: int.
+                Processor ID.
+            op: str.
+                Operation, R, W or A.
+            address: str.
+                Memory address.
+            miss: bool.
+                Indicates if it missed.
+            invalidations: int.
+                Copies invalidated by it.
+        """
+        block = self.__blocks.get(address)
+
+        if block is None:
+            # Processors are kept as bit masks
+            block = self.__blocks[address] = {
+                'cores': 0, 'writers': 0, 'readers': 0, 'writer': None,
+                'reads': 0, 'writes': 0, 'misses': 0, 'invalidations': 0,
+                'handoffs': 0, 'migrations': 0, 'consumed': 0 }
+
+        bit = 1 << core
+        self.__accesses += 1
+        block['cores'] |= bit
+        block['misses'] += miss
+        block['invalidations'] += invalidations
+
+        if op == 'R':
+            block['reads'] += 1
+            block['readers'] |= bit
+            return
+
+        self.__fan_out[invalidations] = \
+            self.__fan_out.get(invalidations, 0) + 1
+        readers = block['readers'] | (bit if op == 'A' else 0)
+        block['writes'] += 1
+        block['writers'] |= bit
+
+        # Another processor read the last value
+        if readers & ~bit:
+            block['consumed'] += 1
+
+        # The block changes hands, it migrates if the new writer was
+        # its only reader
+        if block['writer'] not in (None, core):
+            block['handoffs'] += 1
+            block['migrations'] += readers == bit
+
+        block['readers'] = 0
+        block['writer'] = core
+
+    def classify(self, block: dict) -> str:
+        """This method returns the sharing pattern of a block.
+
+        Params
+        --------------------------------------------------------------
+            block: dict.
+                Counters of the block.
+
+        Returns
+        --------------------------------------------------------------
+            The pattern name.
+        """
+        cores = bin(block['cores']).count('1')
+
+        if cores == 1:
+            return 'private'
+        elif not block['writes']:
+            return 'read-only'
+        elif bin(block['writers']).count('1') == 1:
+            return 'producer-consumer'
+        elif block['handoffs'] and \
+            2 * block['migrations'] >= block['handoffs']:
+            return 'migratory'
+        elif cores >= self.__wide:
+            return 'widely-shared'
+
+        return 'producer-consumer'
+
+    def get_report(self, top: int = 10) -> dict:
+        """This method returns the patterns found.
+
+        Params
+        --------------------------------------------------------------
+            top: int.
+                Blocks ranked by their misses and invalidations.
+
+        Returns
+        --------------------------------------------------------------
+            A dictionary with the blocks, accesses, misses and
+            invalidations of each pattern, the histograms of sharers
+            of each block and invalidations of each write and the top
+            offending blocks.
+        """
+        patterns = {pattern: { 'blocks': 0, 'accesses': 0, 'misses': 0,
+                               'invalidations': 0 }
+                    for pattern in PATTERNS}
+        sharers = {}
+
+        for block in self.__blocks.values():
+            counters = patterns[self.classify(block)]
+            cores = bin(block['cores']).count('1')
+            sharers[cores] = sharers.get(cores, 0) + 1
+            counters['blocks'] += 1
+            counters['accesses'] += block['reads'] + block['writes']
+            counters['misses'] += block['misses']
+            counters['invalidations'] += block['invalidations']
+
+        offenders = nlargest(top, self.__blocks.items(),
+                             key=lambda item: (item[1]['misses'] +
+                                               item[1]['invalidations']))
+
+        return {
+            'accesses': self.__accesses,
+            'blocks': len(self.__blocks),
+            'patterns': patterns,
+            'sharers': dict(sorted(sharers.items())),
+            'fan_out': dict(sorted(self.__fan_out.items())),
+            'top': [{ 'address': address, 'pattern': self.classify(block),
+                      'cores': bin(block['cores']).count('1'),
+                      **{name: block[name] for name in
+                         ('reads', 'writes', 'misses', 'invalidations',
+                          'migrations', 'consumed')} }
+                    for address, block in offenders]
+        }
+
+
+def analyze_events(filename: str, top: int = 10, wide: int = 3) -> dict:
+    """This function classifies the blocks of an event log in a single
+    pass.
+
+    Params
+    ------------------------------------------------------------------
+        filename: str.
+            Event log, compressed if its name ends with .gz.
+        top: int.
+            Blocks ranked by their misses and invalidations.
+        wide: int.
+            Processors that make a block widely shared.
+
+    Returns
+    ------------------------------------------------------------------
+        The report of the patterns found.
+    """
+    analyzer = SharingAnalyzer(wide)
+
+    for event in read_events(filename):
+        analyzer.access(*event)
+
+    return analyzer.get_report(top)
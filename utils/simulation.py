@@ -0,0 +1,307 @@
+from random import seed
+
+from hardware.energy import estimate_energy
+from hardware.memory.numa import AddressMap
+from hardware.network.interconnect import create_interconnect
+from hardware.system import System
+from utils.config import get_classes
+from utils.replay import Recorder, save_recording
+from utils.sharing import EventLog, SharingAnalyzer
+from utils.timeline import Timeline
+from utils.workloads import create_workloads
+
+
+def create_system(config: dict, verbose: bool = False,
+                  workloads: list = None, timeline: Timeline = None,
+                  events: list = None) -> System:
+    """This function creates a system from a configuration. The random
+    generator is seeded if the configuration has a seed.
+
+    Params
+    ------------------------------------------------------------------
+        config: dict.
+            Simulation configuration.
+        verbose: bool.
+            Indicates if the bus activity is printed.
+        workloads: list.
+            Workload of each processor, instead of the configured one.
+        timeline: Timeline.
+            Timeline where the activity is written, if it is given.
+        events: list.
+            Listeners of the memory accesses.
+
+    Returns
+    ------------------------------------------------------------------
+        The new system.
+    """
+    if config['seed'] is not None:
+        seed(config['seed'])
+
+    network = config['interconnect']
+    prefetcher = config['prefetcher']
+    numa = config['numa']
+    snoop_filter = config['snoop_filter']
+    mem_size = config['memory']['size']
+    specs = [None] * config['cores']
+
+    if workloads is None:
+        workloads = create_workloads(config['workload'], config['cores'],
+                                     mem_size)
+
+        # Classes with their own workload take it for their cores
+        for values in get_classes(config):
+            if values['workload'] != config['workload']:
+                own = create_workloads(values['workload'], config['cores'],
+                                       mem_size)
+
+                for i in values['cores']:
+                    workloads[i] = own[i]
+
+    for values in get_classes(config):
+        core, cache = values['core'], values['cache']
+
+        for i in values['cores']:
+            specs[i] = { 'class': values['class'], 'cache_size': cache['size'],
+                         'associativity': cache['associativity'],
+                         'window': core['window'], 'mshrs': core['mshrs'],
+                         'latency': core['latency'],
+                         'clock_ratio': core['clock_ratio'] }
+
+    return System(config['cores'], verbose=verbose,
+                  protocol=config['protocol'],
+                  mem_size=mem_size, workloads=workloads, specs=specs,
+                  interconnect=create_interconnect(network['topology'],
+                                                   config['cores'] +
+                                                   numa['nodes'],
+                                                   network['latency'],
+                                                   network['bandwidth'],
+                                                   numa['nodes']),
+                  directory=config['coherence'] == 'directory',
+                  prefetcher=None if prefetcher['type'] == 'none' else
+                  prefetcher['type'],
+                  degree=prefetcher['degree'],
+                  prefetch_mode=prefetcher['mode'],
+                  check=config['check'], timeline=timeline,
+                  numa=AddressMap(config['cores'], numa['nodes'],
+                                  numa['page_size'], numa['policy'],
+                                  numa['placement'],
+                                  numa['remote_latency']),
+                  snoop_filter=None if snoop_filter['type'] == 'none' else
+                  snoop_filter['type'],
+                  cluster=snoop_filter['cluster'],
+                  entries=snoop_filter['entries'],
+                  hashes=snoop_filter['hashes'], events=events)
+
+
+def create_report(system: System, config: dict) -> dict:
+    """This function creates the statistics report of a system.
+
+    Params
+    ------------------------------------------------------------------
+        system: System.
+            Simulated system.
+        config: dict.
+            Simulation configuration.
+
+    Returns
+    ------------------------------------------------------------------
+        A dictionary with the run information and the counters of
+        each processor.
+    """
+    stats = system.get_statistics()
+    total = {name: sum(processor[name] for processor in stats.values())
+             for name in next(iter(stats.values()))}
+    useful = total['prefetch_hits']
+    misses = total['read_misses'] + total['write_misses']
+    energy = {_id: estimate_energy(processor, config['energy'])
+              for _id, processor in stats.items()}
+    overall = estimate_energy(total, config['energy'])
+    instructions = total['instructions']
+    filtered = total['snoops_filtered']
+    false_positives = total['snoop_false_positives']
+    nodes = system.get_address_map().get_statistics()
+    remote = sum(node['remote'] for node in nodes)
+    accesses = remote + sum(node['local'] for node in nodes)
+    cpus = [system.get_processor(i) for i in range(system.get_size())]
+    classes = {}
+
+    # Counters of each core class, its IPC is given in core cycles
+    for cpu in cpus:
+        counters = stats[cpu.get_id()]
+        values = classes.setdefault(cpu.get_class(), {
+            'class': cpu.get_class(), 'processors': [],
+            'clock_ratio': cpu.get_clock_ratio(),
+            'cache_size': cpu.get_cache_size(),
+            'associativity': cpu.get_cache_l1().get_associativity(),
+            'instructions': 0, 'misses': 0, 'messages': 0, 'bytes': 0 })
+        values['processors'].append(cpu.get_id())
+        values['instructions'] += counters['instructions']
+        values['misses'] += counters['read_misses'] + \
+            counters['write_misses'] + counters['upgrades']
+        values['messages'] += counters['messages']
+        values['bytes'] += counters['bytes']
+
+    for values in classes.values():
+        core_cycles = len(values['processors']) * \
+            (system.get_cycle() // values['clock_ratio'])
+        values['ipc'] = values['instructions'] / core_cycles \
+            if core_cycles else 0
+
+    return {
+        'protocol': system.get_protocol(),
+        'coherence': config['coherence'],
+        'cores': system.get_size(),
+        'cycles': system.get_cycle(),
+        'seed': config['seed'],
+        'interconnect': system.get_interconnect().get_statistics(),
+        # Useful prefetches over the issued ones, over the misses
+        # without prefetching and the ones that arrived on time
+        'prefetcher': dict(config['prefetcher'],
+            accuracy=useful / total['prefetches'] if total['prefetches']
+            else 0,
+            coverage=useful / (useful + misses) if useful + misses else 0,
+            timeliness=1 - total['prefetch_late'] / useful if useful else 0),
+        # Average cycles from a release to the next acquisition and
+        # traffic of each acquisition
+        'locks': {name: dict(lock,
+            handoff_latency=lock['handoff_cycles'] / lock['handoffs']
+            if lock['handoffs'] else 0,
+            messages_per_acquisition=lock['messages'] / lock['acquisitions']
+            if lock['acquisitions'] else 0)
+            for name, lock in system.get_locks().items()},
+        # Snoops skipped over the ones needed without a filter, and
+        # snoops let through over the caches without the block
+        'snoop_filter': dict(config['snoop_filter'], filtered=filtered,
+            forwarded=total['snoops'],
+            filter_rate=filtered / (filtered + total['snoops'])
+            if filtered + total['snoops'] else 0,
+            false_positive_rate=false_positives / (false_positives +
+                                                   filtered)
+            if false_positives + filtered else 0),
+        # Memory accesses of each node and share of remote ones
+        'numa': dict({key: value for key, value in config['numa'].items()
+                      if key != 'placement'},
+                     remote_ratio=remote / accesses if accesses else 0,
+                     controllers=[dict(node=i, **node)
+                                  for i, node in enumerate(nodes)]),
+        # Energy and traffic of the whole system, to compare protocols
+        'energy': dict(overall, bytes=total['bytes'],
+            per_instruction=overall['total'] / instructions
+            if instructions else 0,
+            bytes_per_instruction=total['bytes'] / instructions
+            if instructions else 0),
+        'classes': list(classes.values()),
+        # Messages and bytes delivered from each class to another one
+        'class_traffic': [{ 'source': src, 'destination': dst, **flow }
+                          for (src, dst), flow
+                          in system.get_class_traffic().items()],
+        'violations': system.get_violations(),
+        'processors': [dict(processor=_id, **{'class': cpu.get_class()},
+                            **counters,
+                            energy=energy[_id].pop('total'),
+                            **{f'{event}_energy': value for event, value
+                               in energy[_id].items()})
+                       for cpu, (_id, counters) in zip(cpus, stats.items())]
+    }
+
+
+def run_simulation(config: dict, verbose: bool = False,
+                   timeline: str = None, metrics: str = None,
+                   interval: int = 1000, record: str = None,
+                   checkpoints: int = 1000, events: str = None,
+                   sharing: bool = False) -> dict:
+    """This function runs a simulation without the GUI at full speed.
+
+    Params
+    ------------------------------------------------------------------
+        config: dict.
+            Simulation configuration.
+        verbose: bool.
+            Indicates if the bus activity is printed.
+        timeline: str.
+            File where the timeline is written, if it is given.
+        metrics: str.
+            Address where the metrics are served while it runs, if it
+            is given.
+        interval: int.
+            Cycles between metrics updates.
+        record: str.
+            File where the run is recorded for replays, if it is given.
+        checkpoints: int.
+            Cycles between the checkpoints of the recording.
+        events: str.
+            File where the memory accesses are written, if it is
+            given.
+        sharing: bool.
+            Indicates if the sharing patterns of the blocks are
+            analyzed.
+
+    Returns
+    ------------------------------------------------------------------
+        The statistics report.
+    """
+    writer = Timeline(timeline) if timeline else None
+    server = None
+
+    # The HTTP server is only imported when the metrics are served
+    if metrics:
+        from utils.metrics import MetricsServer
+
+        server = MetricsServer(metrics)
+
+    log = EventLog(events) if events else None
+    analyzer = SharingAnalyzer() if sharing else None
+    cycles = config['cycles']
+
+    try:
+        system = create_system(config, verbose, timeline=writer,
+                               events=[listener for listener in (log,
+                                                                 analyzer)
+                                       if listener is not None])
+        recorder = Recorder(system, checkpoints) if record else None
+        # The recorder runs the system when it is given
+        run = system.run if recorder is None else recorder.run
+
+        if server is None:
+            run(cycles)
+        else:
+            # Run a chunk of cycles between the updates
+            while True:
+                server.publish(system)
+
+                if system.is_finished() or 0 < cycles <= system.get_cycle():
+                    break
+
+                stop = system.get_cycle() + interval
+                run(min(stop, cycles) if cycles > 0 else stop)
+    finally:
+        if writer is not None:
+            writer.close()
+
+        if server is not None:
+            server.close()
+
+        if log is not None:
+            log.close()
+
+    report = create_report(system, config)
+
+    if recorder is not None:
+        recording = recorder.get_recording()
+        save_recording(recording, record)
+        report['recording'] = { 'file': record,
+                                'cycles': recording['cycles'],
+                                'checkpoints': len(recording['checkpoints']),
+                                'changes': len(recording['values']) }
+
+    if writer is not None:
+        report['timeline'] = { 'file': timeline,
+                               'events': writer.get_events() }
+
+    if log is not None:
+        report['events'] = { 'file': events, 'accesses': log.get_events() }
+
+    if analyzer is not None:
+        report['sharing'] = analyzer.get_report()
+
+    return report
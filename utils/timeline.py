@@ -0,0 +1,209 @@
+from gzip import open as gzip_open
+from json import dumps
+
+
+# Process of the cores and of the interconnect links
+CORES: int = 1
+LINKS: int = 2
+# Thread of the coherence events of each core, after its lanes
+COHERENCE: int = 999
+
+
+class Timeline:
+    """This class writes the activity of a system as Chrome trace
+    events, which Perfetto and chrome://tracing open. Each cycle is a
+    microsecond. Events are written as they happen, so the run is not
+    kept in memory, and the file is compressed if its name ends with
+    .gz.
+
+    Each core has a track for its instructions, with the miss stalls
+    inside them, and the instructions that overlap in an out-of-order
+    core go to extra lanes. The invalidations sent by a miss are flow
+    events between the coherence tracks of the cores, and each link of
+    the interconnect has a track with the cycles it is held.
+    """
+    def __init__(self, filename: str) -> None:
+        """Constructor.
+
+        Params
+        --------------------------------------------------------------
+            filename: str.
+                Output file.
+        """
+        self.__file = gzip_open(filename, 'wt') if filename.endswith('.gz') \
+            else open(filename, 'w')
+        self.__events: int = 0
+        self.__flows: int = 0
+        # Cycle when each lane of each core is free and thread of
+        # each link
+        self.__lanes: dict = {}
+        self.__links: dict = {}
+        self.__threads: set = set()
+
+        self.__file.write('[\n')
+        self.__write({ 'ph': 'M', 'pid': CORES, 'name': 'process_name',
+                       'args': { 'name': 'Cores' } })
+        self.__write({ 'ph': 'M', 'pid': LINKS, 'name': 'process_name',
+                       'args': { 'name': 'Interconnect' } })
+
+    def __write(self, event: dict) -> None:
+        """This method writes an event.
+
+        Params
+        --------------------------------------------------------------
+            event: dict.
+                Trace event.
+        """
+        if self.__events:
+            self.__file.write(',\n')
+
+        self.__file.write(dumps(event, separators=(',', ':')))
+        self.__events += 1
+
+    def __thread(self, pid: int, tid: int, name: str) -> None:
+        """This method names a track the first time it is used.
+
+        Params
+        --------------------------------------------------------------
+            pid: int.
+                Process of the track.
+            tid: int.
+                Thread of the track.
+            name: str.
+                Track name.
+        """
+        if (pid, tid) not in self.__threads:
+            self.__threads.add((pid, tid))
+            self.__write({ 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'name': 'thread_name', 'args': { 'name': name } })
+
+    def __slice(self, pid: int, tid: int, name: str, start: int, end: int,
+                args: dict = None) -> None:
+        """This method writes a complete event.
+
+        Params
+        --------------------------------------------------------------
+            pid: int.
+                Process of the track.
+            tid: int.
+                Thread of the track.
+            name: str.
+                Event name.
+            start: int.
+                First cycle.
+            end: int.
+                Cycle after the last one.
+            args: dict.
+                Extra information shown by the viewer.
+        """
+        event = { 'ph': 'X', 'pid': pid, 'tid': tid, 'name': name,
+                  'ts': start, 'dur': end - start }
+
+        if args:
+            event['args'] = args
+
+        self.__write(event)
+
+    def close(self) -> None:
+        """This method ends the event list and closes the file.
+        """
+        self.__file.write('\n]\n')
+        self.__file.close()
+
+    def get_events(self) -> int:
+        """This method returns the number of events written.
+
+        Returns
+        --------------------------------------------------------------
+            The number of events.
+        """
+        return self.__events
+
+    def hold(self, link, start: int, end: int, size: int) -> None:
+        """This method adds the cycles that a link is held by a
+        message.
+
+        Params
+        --------------------------------------------------------------
+            link: hashable.
+                Link identifier.
+            start: int.
+                First cycle.
+            end: int.
+                Cycle when the link is free.
+            size: int.
+                Message size in bytes.
+        """
+        tid = self.__links.setdefault(link, len(self.__links))
+        self.__thread(LINKS, tid, f'Link {link}')
+        self.__slice(LINKS, tid, f'{size} B', start, end)
+
+    def instruction(self, core: int, name: str, start: int, end: int,
+                    stall: int = None) -> None:
+        """This method adds an instruction of a core.
+
+        Params
+        --------------------------------------------------------------
+            core: int.
+                Processor ID.
+            name: str.
+                Instruction.
+            start: int.
+                Issue cycle.
+            end: int.
+                Cycle when it is completed.
+            stall: int.
+                Cycle when its miss is served, None if it hit.
+        """
+        lanes = self.__lanes.setdefault(core, [])
+
+        # Use the first free lane
+        for lane, free in enumerate(lanes):
+            if free <= start:
+                break
+        else:
+            lane = len(lanes)
+            lanes.append(0)
+
+        lanes[lane] = end
+        tid = core * (COHERENCE + 1) + lane
+        self.__thread(CORES, tid, f'P{core}' + (f' #{lane}' if lane else ''))
+        self.__slice(CORES, tid, name, start, end)
+
+        if stall is not None:
+            self.__slice(CORES, tid, 'MISS', start, stall)
+
+    def invalidation(self, core: int, address: str, cycle: int,
+                     holders: list) -> None:
+        """This method adds the invalidations sent by a miss, with a
+        flow to each invalidated core.
+
+        Params
+        --------------------------------------------------------------
+            core: int.
+                Processor ID of the requester.
+            address: str.
+                Memory address.
+            cycle: int.
+                Cycle when they are sent.
+            holders: list.
+                Processor IDs of the invalidated copies.
+        """
+        tid = core * (COHERENCE + 1) + COHERENCE
+        self.__thread(CORES, tid, f'P{core} coherence')
+        self.__slice(CORES, tid, f'INV {address}', cycle, cycle + 1,
+                     { 'holders': [f'P{i}' for i in holders] })
+
+        for i in holders:
+            target = i * (COHERENCE + 1) + COHERENCE
+            self.__flows += 1
+            self.__thread(CORES, target, f'P{i} coherence')
+            self.__slice(CORES, target, f'INVALIDATED {address}', cycle,
+                         cycle + 1, { 'by': f'P{core}' })
+            self.__write({ 'ph': 's', 'pid': CORES, 'tid': tid,
+                           'name': 'invalidation', 'cat': 'coherence',
+                           'id': self.__flows, 'ts': cycle })
+            self.__write({ 'ph': 'f', 'bp': 'e', 'pid': CORES,
+                           'tid': target, 'name': 'invalidation',
+                           'cat': 'coherence', 'id': self.__flows,
+                           'ts': cycle })
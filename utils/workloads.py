@@ -0,0 +1,380 @@
+from random import randint
+
+from utils.formats import addr2string, string2instr
+
+
+# Synchronization workloads and their default parameters. Each
+# processor runs some iterations, choosing a lock each time, with a
+# critical section of some CALC instructions that increments a
+# counter, and up to think CALC instructions outside it
+SYNC_DEFAULTS: dict = { 'iterations': 10, 'locks': 1, 'critical': 2,
+                        'think': 4, 'primitive': 'tas' }
+
+
+def parse_trace(lines, size: int) -> list:
+    """This function parses the lines of a trace. Each line has an
+    instruction in the same format shown by the GUI, e.g.
+    'P1: READ 0101', and empty lines or lines starting with '#' are
+    ignored.
+
+    Params
+    ------------------------------------------------------------------
+        lines: iterable.
+            Trace lines.
+        size: int.
+            Number of processors.
+
+    Returns
+    ------------------------------------------------------------------
+        A list with the instructions of each processor.
+    """
+    workloads: list = [[] for _ in range(size)]
+
+    for line in lines:
+        line = line.strip()
+
+        if not line or line.startswith('#'):
+            continue
+
+        _id, instr = string2instr(line)
+
+        if not 1 <= _id <= size:
+            raise ValueError(f'Invalid processor P{_id} in the trace!')
+
+        workloads[_id - 1].append(instr)
+
+    return workloads
+
+
+def load_trace(filename: str, size: int) -> list:
+    """This function loads a trace file.
+
+    Params
+    ------------------------------------------------------------------
+        filename: str.
+            Trace file.
+        size: int.
+            Number of processors.
+
+    Returns
+    ------------------------------------------------------------------
+        A list with the instructions of each processor.
+    """
+    with open(filename) as trace:
+        return parse_trace(trace, size)
+
+
+def word(value: int) -> str:
+    """This function converts a value to the data format of memory.
+
+    Params
+    ------------------------------------------------------------------
+        value: int.
+            Value to be converted, it wraps around at 16 bits.
+
+    Returns
+    ------------------------------------------------------------------
+        A string with the value in hexadecimal.
+    """
+    return format(value & 0xffff, '04x')
+
+
+def critical_section(address: str, length: int):
+    """This function generates a critical section that increments a
+    shared counter, so the final counter shows if the lock works.
+
+    Params
+    ------------------------------------------------------------------
+        address: str.
+            Counter address.
+        length: int.
+            CALC instructions between reading and writing it.
+    """
+    value = yield { 'type': 'READ', 'address': address }
+
+    for _ in range(length):
+        yield { 'type': 'CALC' }
+
+    yield { 'type': 'WRITE', 'address': address,
+            'data': word(int(value, 16) + 1) }
+
+
+def think(length: int):
+    """This function generates a random number of CALC instructions
+    between two synchronizations.
+
+    Params
+    ------------------------------------------------------------------
+        length: int.
+            Maximum number of instructions.
+    """
+    for _ in range(randint(0, length)):
+        yield { 'type': 'CALC' }
+
+
+def spinlock(_id: int, size: int, config: dict, mem_size: int):
+    """This function generates the instructions of a processor using
+    test-and-test-and-set locks. The lock is spinned on with reads and
+    taken with a test and set, a compare and swap or a load linked and
+    store conditional pair. Each lock uses two words, the lock and its
+    counter.
+
+    Params
+    ------------------------------------------------------------------
+        _id: int.
+            Processor index.
+        size: int.
+            Number of processors.
+        config: dict.
+            Workload configuration.
+        mem_size: int.
+            Memory size.
+    """
+    for _ in range(config['iterations']):
+        k = randint(0, config['locks'] - 1)
+        name = f'lock{k}'
+        lock = addr2string(2 * k, mem_size)
+        event = { 'event': 'request' }
+
+        while True:
+            # Test
+            value = yield dict(event, type='READ', address=lock, lock=name)
+            event = {}
+
+            if value != '0000':
+                continue
+
+            # And set
+            if config['primitive'] == 'tas':
+                acquired = (yield { 'type': 'TAS', 'address': lock,
+                                    'lock': name, 'event': 'acquire',
+                                    'expect': '0000' }) == '0000'
+            elif config['primitive'] == 'cas':
+                acquired = (yield { 'type': 'CAS', 'address': lock,
+                                    'expected': '0000', 'data': '0001',
+                                    'lock': name, 'event': 'acquire',
+                                    'expect': '0000' }) == '0000'
+            else:
+                value = yield { 'type': 'LL', 'address': lock, 'lock': name }
+                acquired = value == '0000' and \
+                    (yield { 'type': 'SC', 'address': lock, 'data': '0001',
+                             'lock': name, 'event': 'acquire',
+                             'expect': '0001' }) == '0001'
+
+            if acquired:
+                break
+
+        yield from critical_section(addr2string(2 * k + 1, mem_size),
+                                    config['critical'])
+        yield { 'type': 'WRITE', 'address': lock, 'data': '0000',
+                'lock': name, 'event': 'release' }
+        yield from think(config['think'])
+
+
+def ticket(_id: int, size: int, config: dict, mem_size: int):
+    """This function generates the instructions of a processor using
+    ticket locks, which are granted in arrival order. Each lock uses
+    three words, the next ticket, the ticket being served and the
+    counter.
+
+    Params
+    ------------------------------------------------------------------
+        _id: int.
+            Processor index.
+        size: int.
+            Number of processors.
+        config: dict.
+            Workload configuration.
+        mem_size: int.
+            Memory size.
+    """
+    for _ in range(config['iterations']):
+        k = randint(0, config['locks'] - 1)
+        name = f'lock{k}'
+        serving = addr2string(3 * k + 1, mem_size)
+
+        number = yield { 'type': 'FAA', 'address': addr2string(3 * k,
+                                                               mem_size),
+                         'data': '0001', 'lock': name, 'event': 'request' }
+
+        while (yield { 'type': 'READ', 'address': serving, 'lock': name,
+                       'event': 'acquire', 'expect': number }) != number:
+            pass
+
+        yield from critical_section(addr2string(3 * k + 2, mem_size),
+                                    config['critical'])
+        yield { 'type': 'FAA', 'address': serving, 'data': '0001',
+                'lock': name, 'event': 'release' }
+        yield from think(config['think'])
+
+
+def mcs(_id: int, size: int, config: dict, mem_size: int):
+    """This function generates the instructions of a processor using
+    MCS locks, where each processor spins on its own queue node. Each
+    lock uses the tail of the queue, the counter and a node with the
+    locked flag and the next processor (1-based, 0 is none) for each
+    processor.
+
+    Params
+    ------------------------------------------------------------------
+        _id: int.
+            Processor index.
+        size: int.
+            Number of processors.
+        config: dict.
+            Workload configuration.
+        mem_size: int.
+            Memory size.
+    """
+    me = word(_id + 1)
+
+    for _ in range(config['iterations']):
+        k = randint(0, config['locks'] - 1)
+        name = f'lock{k}'
+        base = k * (2 + 2 * size)
+        tail = addr2string(base, mem_size)
+        locked = addr2string(base + 2 + 2 * _id, mem_size)
+        after = addr2string(base + 3 + 2 * _id, mem_size)
+
+        yield { 'type': 'WRITE', 'address': after, 'data': '0000',
+                'lock': name, 'event': 'request' }
+        yield { 'type': 'WRITE', 'address': locked, 'data': '0001',
+                'lock': name }
+
+        # Swap the tail, the lock is free if the queue was empty
+        while True:
+            last = yield { 'type': 'READ', 'address': tail, 'lock': name }
+            event = { 'event': 'acquire', 'expect': '0000' } \
+                if last == '0000' else {}
+
+            if (yield dict(event, type='CAS', address=tail, expected=last,
+                           data=me, lock=name)) == last:
+                break
+
+        # Wait for the predecessor
+        if last != '0000':
+            yield { 'type': 'WRITE', 'data': me, 'lock': name,
+                    'address': addr2string(base + 1 + 2 * int(last, 16),
+                                           mem_size) }
+
+            while (yield { 'type': 'READ', 'address': locked, 'lock': name,
+                           'event': 'acquire', 'expect': '0000' }) != '0000':
+                pass
+
+        yield from critical_section(addr2string(base + 1, mem_size),
+                                    config['critical'])
+
+        # Empty the queue or wait for the successor to pass it the lock
+        successor = yield { 'type': 'READ', 'address': after, 'lock': name }
+
+        if successor == '0000':
+            if (yield { 'type': 'CAS', 'address': tail, 'expected': me,
+                        'data': '0000', 'lock': name, 'event': 'release',
+                        'expect': me }) == me:
+                yield from think(config['think'])
+                continue
+
+            while successor == '0000':
+                successor = yield { 'type': 'READ', 'address': after,
+                                    'lock': name }
+
+        yield { 'type': 'WRITE', 'data': '0000', 'lock': name,
+                'address': addr2string(base + 2 * int(successor, 16),
+                                       mem_size), 'event': 'release' }
+        yield from think(config['think'])
+
+
+def barrier(_id: int, size: int, config: dict, mem_size: int):
+    """This function generates the instructions of a processor using a
+    sense-reversing barrier. The last processor arriving releases the
+    others. The barrier uses two words, the arrival count and the
+    sense.
+
+    Params
+    ------------------------------------------------------------------
+        _id: int.
+            Processor index.
+        size: int.
+            Number of processors.
+        config: dict.
+            Workload configuration.
+        mem_size: int.
+            Memory size.
+    """
+    count = addr2string(0, mem_size)
+    address = addr2string(1, mem_size)
+    sense = '0000'
+
+    for _ in range(config['iterations']):
+        yield from think(config['think'])
+        sense = word(1 - int(sense, 16))
+
+        arrived = yield { 'type': 'FAA', 'address': count, 'data': '0001',
+                          'lock': 'barrier', 'event': 'request' }
+
+        if int(arrived, 16) == size - 1:
+            yield { 'type': 'WRITE', 'address': count, 'data': '0000',
+                    'lock': 'barrier' }
+            yield { 'type': 'WRITE', 'address': address, 'data': sense,
+                    'lock': 'barrier', 'event': 'release' }
+        else:
+            while (yield { 'type': 'READ', 'address': address,
+                           'lock': 'barrier', 'event': 'acquire',
+                           'expect': sense }) != sense:
+                pass
+
+
+# Synchronization workloads and the words that they need for a
+# number of processors and locks
+SYNC_WORKLOADS: dict = {
+    'spinlock': (spinlock, lambda size, locks: 2 * locks),
+    'ticket': (ticket, lambda size, locks: 3 * locks),
+    'mcs': (mcs, lambda size, locks: (2 + 2 * size) * locks),
+    'barrier': (barrier, lambda size, locks: 2)
+}
+
+
+def create_workloads(config: dict, size: int, mem_size: int = 16) -> list:
+    """This function creates the workload of each processor.
+
+    Params
+    ------------------------------------------------------------------
+        config: dict.
+            Workload configuration. Its type can be 'random', 'trace',
+            which needs a 'path' or its 'lines', or a synchronization
+            workload, 'spinlock', 'ticket', 'mcs' or 'barrier'.
+        size: int.
+            Number of processors.
+        mem_size: int.
+            Memory size.
+
+    Returns
+    ------------------------------------------------------------------
+        A list with the workload of each processor, None if it is
+        generated randomly.
+    """
+    if config['type'] == 'random':
+        return [None] * size
+    elif config['type'] == 'trace':
+        if 'lines' in config:
+            return parse_trace(config['lines'], size)
+
+        return load_trace(config['path'], size)
+    elif config['type'] in SYNC_WORKLOADS:
+        generator, words = SYNC_WORKLOADS[config['type']]
+        config = dict(SYNC_DEFAULTS, **config)
+
+        if config['primitive'] not in ('tas', 'cas', 'llsc'):
+            raise ValueError(f'Unknown primitive {config["primitive"]}!')
+
+        if config['locks'] < 1:
+            raise ValueError('At least one lock is required!')
+
+        if words(size, config['locks']) > mem_size:
+            raise ValueError(f'The {config["type"]} workload needs '
+                             f'{words(size, config["locks"])} memory '
+                             'blocks!')
+
+        return [generator(i, size, config, mem_size) for i in range(size)]
+
+    raise ValueError(f'Unknown workload {config["type"]}!')